@@ -1,8 +1,10 @@
 from fastapi import APIRouter
-from app.api.v1 import auth, courses
+from app.api.v1 import auth, courses, attendance, dashboard
 
 api_router = APIRouter()
 
 # Include all route modules
 api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 api_router.include_router(courses.router, prefix="/courses", tags=["Courses"])
+api_router.include_router(attendance.router, prefix="/attendance", tags=["Attendance"])
+api_router.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
@@ -0,0 +1,954 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, tuple_
+from pydantic import ValidationError
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+import asyncio
+import logging
+import math
+import uuid
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.pagination import encode_cursor, decode_created_at_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.security import verify_token
+from app.api.v1.auth import get_current_user
+from app.api.v1.courses import check_lecturer_or_admin
+from app.models.user import User, UserRole
+from app.models.course import Course, CourseEnrollment
+from app.models.session import Session, SessionStatus
+from app.models.attendance import AttendanceRecord, AttendanceSession, AttendanceStatus, CheckInMethod, AtRiskStudent
+from app.models.archive import ArchivedAttendanceRecord
+from app.schemas.attendance import (
+    CheckInRequest, AttendanceRecordResponse,
+    AttendanceSessionStart, AttendanceSessionResponse,
+    IdentifyRequest, IdentifyResponse, QRCodeResponse, RosterSyncResponse,
+    BulkMarkRequest, BulkMarkResponse, AttendanceRollupResponse,
+    CourseAnalyticsResponse, StudentAnalytics, SessionTrend, AtRiskStudentResponse,
+    ArchivedAttendanceRecordResponse, ArchivedAttendancePage,
+    OfflineCheckInEvent, OfflineSyncResult, OfflineSyncResponse, OfflineKeyResponse
+)
+from app.services.geofence_service import get_session_geofence, verify_location, geofence_cache
+from app.services.face_service import verify_face, parse_face_encoding
+from app.services.roster_cache import warm_course_roster, identify_student
+from app.services.session_state import get_session_state, get_session_windows, invalidate_session_state
+from app.services.qr_service import issue_qr_token, verify_qr_token, QRTokenError
+from app.services.event_bus import event_bus, session_channel, publish_session_event
+from app.services.roster_state import roster_states
+from app.services.export_service import EXPORT_FORMATS, build_export_query, stream_rows
+from app.services.rollup_service import apply_rollup_changes, get_student_rollups, get_course_rollups
+from app.services.attendance_service import (
+    close_attendance_session, bulk_mark_attendance, apply_offline_checkins, lock_student_records
+)
+from app.services.offline_sync import (
+    SIGNED_FIELDS, OfflineEventError, encode_device_key, verify_event_signature, read_event_lines
+)
+from app.services.analytics_service import course_matrices
+from app.services.partition_service import records_created_since
+from app.services.metrics_service import record_active_sessions
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+SESSION_COUNTER_COLUMNS = (
+    AttendanceSession.total_students, AttendanceSession.present_count,
+    AttendanceSession.late_count, AttendanceSession.absent_count
+)
+
+def session_counters(row) -> dict:
+    """Counter payload sent to live feed subscribers"""
+    total_students, present_count, late_count, absent_count = row
+    return {
+        "total_students": total_students or 0,
+        "present_count": present_count or 0,
+        "late_count": late_count or 0,
+        "absent_count": absent_count or 0
+    }
+
+async def get_owned_session(db: AsyncSession, session_id, current_user: User) -> Session:
+    """Load a session the current lecturer (or any admin) is allowed to manage"""
+    check_lecturer_or_admin(current_user)
+
+    result = await db.execute(
+        select(Session, Course.lecturer_id)
+        .join(Course, Course.id == Session.course_id)
+        .where(Session.id == session_id)
+    )
+    row = result.one_or_none()
+
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found"
+        )
+
+    session, lecturer_id = row
+    if current_user.role == UserRole.LECTURER and lecturer_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only manage your own sessions"
+        )
+
+    return session
+
+async def get_owned_course(db: AsyncSession, course_id, current_user: User):
+    """Load (course_code, lecturer_id) of a course the current lecturer (or any admin) can manage"""
+    check_lecturer_or_admin(current_user)
+
+    result = await db.execute(select(Course.course_code, Course.lecturer_id).where(Course.id == course_id))
+    course = result.one_or_none()
+
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+
+    if current_user.role == UserRole.LECTURER and course.lecturer_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only manage your own courses"
+        )
+
+    return course
+
+@router.post("/sessions/{session_id}/start", response_model=AttendanceSessionResponse)
+async def start_attendance_session(
+    session_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
+    start_data: Optional[AttendanceSessionStart] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Open attendance for a session (Lecturer/Admin only)"""
+    session = await get_owned_session(db, session_id, current_user)
+    start_data = start_data or AttendanceSessionStart()
+
+    if session.status in (SessionStatus.COMPLETED, SessionStatus.CANCELLED):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Session is {session.status.value}"
+        )
+
+    result = await db.execute(select(AttendanceSession).where(AttendanceSession.session_id == session_id))
+    attendance_session = result.scalar_one_or_none()
+
+    if attendance_session and attendance_session.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Attendance is already open for this session"
+        )
+
+    enrolled_result = await db.execute(
+        select(func.count()).select_from(CourseEnrollment).where(CourseEnrollment.course_id == session.course_id)
+    )
+
+    if not attendance_session:
+        attendance_session = AttendanceSession(session_id=session_id)
+        db.add(attendance_session)
+
+    now = datetime.now(timezone.utc)
+    attendance_session.is_active = True
+    attendance_session.started_at = now
+    attendance_session.ended_at = None
+    attendance_session.auto_close_minutes = start_data.auto_close_minutes
+    attendance_session.require_geofence = (
+        session.require_geofence if start_data.require_geofence is None else start_data.require_geofence
+    )
+    attendance_session.require_face_recognition = (
+        session.require_face_recognition if start_data.require_face_recognition is None
+        else start_data.require_face_recognition
+    )
+    attendance_session.total_students = enrolled_result.scalar_one()
+
+    session.status = SessionStatus.ACTIVE
+    session.actual_start = session.actual_start or now
+
+    await record_active_sessions(db, 1)
+    await db.commit()
+    await db.refresh(attendance_session)
+
+    # Pick up any location change and preload the roster for kiosk identification
+    geofence_cache.invalidate(session_id)
+    invalidate_session_state(session_id)
+    background_tasks.add_task(warm_course_roster, session.course_id)
+    background_tasks.add_task(publish_session_event, session_id, {
+        "type": "session_started",
+        "counters": session_counters([getattr(attendance_session, c.key) for c in SESSION_COUNTER_COLUMNS])
+    })
+
+    logger.info(f"Attendance opened for session {session_id} by {current_user.email}")
+
+    return attendance_session
+
+@router.post("/sessions/{session_id}/close", response_model=AttendanceSessionResponse)
+async def close_session_attendance(
+    session_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Close attendance and mark students who did not check in as absent (Lecturer/Admin only)"""
+    session = await get_owned_session(db, session_id, current_user)
+
+    attendance_session = await close_attendance_session(db, session_id, session.course_id)
+    if attendance_session is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Attendance is not open for this session"
+        )
+
+    await db.commit()
+
+    invalidate_session_state(session_id)
+    course_matrices.bump(session.course_id)
+    await publish_session_event(session_id, {
+        "type": "session_closed",
+        "counters": session_counters([getattr(attendance_session, c.key) for c in SESSION_COUNTER_COLUMNS])
+    })
+
+    logger.info(f"Attendance closed for session {session_id} by {current_user.email}")
+
+    return attendance_session
+
+@router.post("/sessions/{session_id}/mark", response_model=BulkMarkResponse)
+async def bulk_mark_session_attendance(
+    session_id: uuid.UUID,
+    mark_data: BulkMarkRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Set the attendance status of many students at once (Lecturer/Admin only)"""
+    session = await get_owned_session(db, session_id, current_user)
+
+    result = await db.execute(
+        select(AttendanceSession.id, AttendanceSession.started_at).where(AttendanceSession.session_id == session_id)
+    )
+    attendance_session = result.one_or_none()
+
+    if attendance_session is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Attendance has not been opened for this session"
+        )
+
+    try:
+        created, updated = await bulk_mark_attendance(
+            db, session_id, session.course_id, attendance_session.id, attendance_session.started_at,
+            [(entry.student_id, entry.status, entry.notes) for entry in mark_data.records]
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    await db.commit()
+
+    if created or updated:
+        course_matrices.bump(session.course_id)
+        await publish_session_event(session_id, {"type": "bulk_mark", "created": created, "updated": updated})
+
+    logger.info(f"Bulk marked session {session_id}: {created} created, {updated} updated by {current_user.email}")
+
+    return BulkMarkResponse(created=created, updated=updated)
+
+@router.post("/sessions/{session_id}/identify", response_model=IdentifyResponse)
+async def identify_student_face(
+    session_id: uuid.UUID,
+    identify_data: IdentifyRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Identify an enrolled student from a kiosk camera capture (Lecturer/Admin only)"""
+    session = await get_owned_session(db, session_id, current_user)
+
+    try:
+        probe = parse_face_encoding(identify_data.face_encoding)
+        match = await identify_student(db, session.course_id, probe)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    if match is None:
+        return IdentifyResponse(matched=False)
+
+    student_id, distance, confidence = match
+    if distance > settings.FACE_MATCH_TOLERANCE:
+        return IdentifyResponse(matched=False, confidence=confidence, distance=distance)
+
+    return IdentifyResponse(matched=True, student_id=student_id, confidence=confidence, distance=distance)
+
+@router.get("/sessions/{session_id}/qr", response_model=QRCodeResponse)
+async def get_session_qr_code(
+    session_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the current rotating check-in code for a session (Lecturer/Admin only)"""
+    check_lecturer_or_admin(current_user)
+
+    state = await get_session_state(db, session_id)
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Attendance session is not active"
+        )
+
+    if current_user.role == UserRole.LECTURER and state.lecturer_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only manage your own sessions"
+        )
+
+    token, expires_in = issue_qr_token(session_id)
+    return QRCodeResponse(token=token, expires_in=expires_in, rotation_seconds=settings.QR_ROTATION_SECONDS)
+
+@router.get("/sessions/{session_id}/roster", response_model=RosterSyncResponse)
+async def get_session_roster(
+    session_id: uuid.UUID,
+    since_version: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Live roster for the lecturer view: changes since a version, or a full snapshot"""
+    session = await get_owned_session(db, session_id, current_user)
+    state = await roster_states.get(db, session_id, session.course_id)
+
+    if since_version is not None:
+        changes = state.delta(since_version)
+        if changes is not None:
+            return RosterSyncResponse(version=state.version, full=False, changes=changes)
+
+    return RosterSyncResponse(**state.snapshot())
+
+@router.post("/checkin", response_model=AttendanceRecordResponse)
+async def check_in(
+    checkin_data: CheckInRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Check a student in to an active attendance session"""
+
+    # A scanned QR code identifies the session by itself, verified without a query
+    session_id = checkin_data.session_id
+    check_in_method = checkin_data.check_in_method
+    if checkin_data.qr_token:
+        try:
+            qr_session_id = verify_qr_token(checkin_data.qr_token)
+        except QRTokenError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        if session_id and session_id != qr_session_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="QR code belongs to a different session"
+            )
+        session_id = qr_session_id
+        check_in_method = CheckInMethod.QR_CODE
+    elif not session_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="session_id or qr_token is required"
+        )
+
+    # Students can only check themselves in
+    if current_user.role == UserRole.STUDENT:
+        student_id = current_user.id
+    elif checkin_data.student_id:
+        student_id = checkin_data.student_id
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="student_id is required for manual check-in"
+        )
+
+    # Verify the session is open for attendance
+    state = await get_session_state(db, session_id)
+
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Attendance session is not active"
+        )
+
+    if current_user.role == UserRole.LECTURER and state.lecturer_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only check students in to your own sessions"
+        )
+
+    # Check enrollment
+    enrollment_result = await db.execute(
+        select(CourseEnrollment.id).where(
+            CourseEnrollment.course_id == state.course_id,
+            CourseEnrollment.student_id == student_id
+        )
+    )
+    if enrollment_result.first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Student is not enrolled in this course"
+        )
+
+    # Check if already checked in, holding off a concurrent check-in of the same student
+    await lock_student_records(db, session_id, [student_id])
+    existing_result = await db.execute(
+        select(AttendanceRecord.id).where(
+            AttendanceRecord.session_id == session_id,
+            AttendanceRecord.student_id == student_id,
+            records_created_since(state.started_at)
+        )
+    )
+    if existing_result.first() is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Student already checked in for this session"
+        )
+
+    # Verify location against the session geofence
+    fence = await get_session_geofence(db, session_id)
+    location_verified = verify_location(fence, checkin_data.latitude, checkin_data.longitude)
+
+    if state.require_geofence and fence is not None and not location_verified \
+            and current_user.role == UserRole.STUDENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Check-in location is outside the session geofence"
+        )
+
+    # Verify the live face capture against the enrolled encoding
+    face_result = None
+    if checkin_data.face_encoding is not None:
+        # face_encoding is deferred on the mapper, so fetch just that column
+        encoding_result = await db.execute(select(User.face_encoding).where(User.id == student_id))
+        enrolled_encoding = encoding_result.scalar_one_or_none()
+
+        try:
+            face_result = await verify_face(session_id, checkin_data.face_encoding, enrolled_encoding)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+    if state.require_face_recognition and current_user.role == UserRole.STUDENT \
+            and (face_result is None or not face_result.verified):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Face verification failed" if face_result else "Face verification is required for this session"
+        )
+
+    # Determine attendance status based on time
+    now = datetime.now(timezone.utc)
+    started_at = state.started_at or now
+    if now <= started_at + timedelta(minutes=state.window_minutes):
+        attendance_status = AttendanceStatus.PRESENT
+    else:
+        attendance_status = AttendanceStatus.LATE
+
+    new_record = AttendanceRecord(
+        session_id=session_id,
+        student_id=student_id,
+        status=attendance_status,
+        check_in_method=check_in_method,
+        check_in_time=now,
+        latitude=checkin_data.latitude,
+        longitude=checkin_data.longitude,
+        location_verified=location_verified,
+        face_verified=face_result.verified if face_result else False,
+        face_confidence=face_result.confidence if face_result else None,
+        notes=checkin_data.notes,
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent")
+    )
+    db.add(new_record)
+
+    # Update session statistics. The cached state may be stale on this worker, so only a
+    # session that is still open is counted; the row lock also orders this after a close
+    counter = (
+        AttendanceSession.present_count if attendance_status == AttendanceStatus.PRESENT
+        else AttendanceSession.late_count
+    )
+    counters_result = await db.execute(
+        update(AttendanceSession)
+        .where(AttendanceSession.id == state.attendance_session_id, AttendanceSession.is_active.is_(True))
+        .values({counter: counter + 1})
+        .returning(*SESSION_COUNTER_COLUMNS)
+    )
+    counters_row = counters_result.one_or_none()
+    if counters_row is None:
+        await db.rollback()
+        invalidate_session_state(session_id)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Attendance session is not active"
+        )
+    counters = session_counters(counters_row)
+
+    await apply_rollup_changes(db, state.course_id, [(student_id, None, attendance_status)])
+
+    await db.commit()
+    await db.refresh(new_record)
+    course_matrices.bump(state.course_id)
+
+    # Push the check-in to lecturers watching the live feed
+    await publish_session_event(session_id, {
+        "type": "checkin",
+        "record": AttendanceRecordResponse.model_validate(new_record).model_dump(mode="json"),
+        "counters": counters
+    })
+
+    logger.info(f"Check-in recorded: {student_id} for session {session_id} ({attendance_status.value})")
+
+    return new_record
+
+@router.get("/offline-key", response_model=OfflineKeyResponse)
+async def get_offline_signing_key(current_user: User = Depends(get_current_user)):
+    """Get the key this user's devices sign offline check-ins with"""
+    return OfflineKeyResponse(key=encode_device_key(current_user.id), signed_fields=list(SIGNED_FIELDS))
+
+@router.post("/checkin/sync", response_model=OfflineSyncResponse)
+async def sync_offline_checkins(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Apply check-ins queued while offline, sent as JSON lines (one signed event per line).
+
+    Every event gets an outcome; one bad event never fails the batch. The device
+    key only shows who sent an event, so a student's event must also carry the
+    QR code scanned at the time it claims.
+    """
+    results: List[OfflineSyncResult] = []
+    events = []
+    # QR slots the device clock may be off by, on top of the usual tolerance
+    qr_skew_slots = settings.QR_CLOCK_SKEW_SLOTS + math.ceil(
+        settings.OFFLINE_SYNC_CLOCK_SKEW_SECONDS / settings.QR_ROTATION_SECONDS
+    )
+
+    async for line, raw, error in read_event_lines(request.stream()):
+        if line > settings.OFFLINE_SYNC_MAX_EVENTS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {settings.OFFLINE_SYNC_MAX_EVENTS} events can be synced at once"
+            )
+
+        result = OfflineSyncResult(line=line, outcome="rejected", detail=error)
+        results.append(result)
+        if error:
+            continue
+
+        result.event_id = str(raw["event_id"]) if raw.get("event_id") is not None else None
+        try:
+            verify_event_signature(raw, current_user.id)
+            event = OfflineCheckInEvent(**raw)
+        except OfflineEventError as e:
+            result.detail = str(e)
+            continue
+        except ValidationError as e:
+            result.detail = f"Invalid event: {e.errors()[0]['msg']}"
+            continue
+        result.session_id = event.session_id
+
+        # Students sync their own check-ins; lecturers and admins sync a kiosk's
+        if current_user.role == UserRole.STUDENT:
+            if event.student_id not in (None, current_user.id):
+                result.detail = "Students can only check themselves in"
+                continue
+            student_id = current_user.id
+        elif event.student_id is None:
+            result.detail = "student_id is required for check-ins synced by lecturers"
+            continue
+        else:
+            student_id = event.student_id
+
+        occurred_at = event.occurred_at
+        if occurred_at.tzinfo is None:
+            occurred_at = occurred_at.replace(tzinfo=timezone.utc)
+
+        # The code on the lecturer screen proves the device was there when the event says
+        if event.qr_token:
+            try:
+                qr_session_id = verify_qr_token(event.qr_token, occurred_at.timestamp(), qr_skew_slots)
+            except QRTokenError as e:
+                result.detail = str(e)
+                continue
+            if qr_session_id != event.session_id:
+                result.detail = "QR code belongs to a different session"
+                continue
+            event.check_in_method = CheckInMethod.QR_CODE
+        elif current_user.role == UserRole.STUDENT or event.check_in_method == CheckInMethod.QR_CODE:
+            result.detail = "qr_token is required for QR check-ins and for students"
+            continue
+        events.append((result, event, student_id, occurred_at))
+
+    # Validate against the attendance windows, one query for all uncached sessions
+    windows = await get_session_windows(db, {event.session_id for _, event, _, _ in events})
+    fences = {session_id: await get_session_geofence(db, session_id) for session_id in windows}
+    now = datetime.now(timezone.utc)
+    skew = timedelta(seconds=settings.OFFLINE_SYNC_CLOCK_SKEW_SECONDS)
+
+    valid = []
+    for result, event, student_id, occurred_at in events:
+        window = windows.get(event.session_id)
+        location_verified = False
+        if window is None:
+            result.detail = "Attendance was never opened for this session"
+        elif current_user.role == UserRole.LECTURER and window.lecturer_id != current_user.id:
+            result.detail = "You can only check students in to your own sessions"
+        elif occurred_at > now + skew:
+            result.detail = "Check-in time is in the future"
+        elif window.ended_at and now > window.ended_at + timedelta(seconds=settings.OFFLINE_SYNC_MAX_DELAY_SECONDS):
+            result.detail = "Check-in was synced too long after attendance was closed"
+        elif window.started_at and occurred_at < window.started_at - skew:
+            result.detail = "Check-in happened before attendance was opened"
+        elif window.ended_at and occurred_at > window.ended_at + skew:
+            result.detail = "Check-in happened after attendance was closed"
+        elif window.require_face_recognition and current_user.role == UserRole.STUDENT:
+            result.detail = "Face verification is required for this session"
+        else:
+            fence = fences[event.session_id]
+            location_verified = verify_location(fence, event.latitude, event.longitude)
+            if window.require_geofence and fence is not None and not location_verified \
+                    and current_user.role == UserRole.STUDENT:
+                result.detail = "Check-in location is outside the session geofence"
+            else:
+                valid.append((result, event, student_id, occurred_at, location_verified, window))
+
+    # Check enrollment of every (course, student) pair at once
+    pairs = {(window.course_id, student_id) for _, _, student_id, _, _, window in valid}
+    enrolled = set()
+    if pairs:
+        enrollment_result = await db.execute(
+            select(CourseEnrollment.course_id, CourseEnrollment.student_id)
+            .where(tuple_(CourseEnrollment.course_id, CourseEnrollment.student_id).in_(list(pairs)))
+        )
+        enrolled = {tuple(row) for row in enrollment_result.all()}
+
+    # Group by session, keeping each student's earliest event
+    by_session = {}
+    for result, event, student_id, occurred_at, location_verified, window in valid:
+        if (window.course_id, student_id) not in enrolled:
+            result.detail = "Student is not enrolled in this course"
+            continue
+        session_events = by_session.setdefault(event.session_id, {})
+        earlier = session_events.get(student_id)
+        if earlier is not None and earlier[3] <= occurred_at:
+            result.outcome, result.detail = "duplicate", "Student already checked in earlier in this batch"
+            continue
+        if earlier is not None:
+            earlier[0].outcome, earlier[0].detail = "duplicate", "Student already checked in earlier in this batch"
+        session_events[student_id] = (result, event, student_id, occurred_at, location_verified, window)
+
+    ip_address = request.client.host if request.client else None
+    user_agent = request.headers.get("user-agent")
+
+    # One batched write per session, in a stable order so concurrent syncs lock alike
+    applied = {}
+    for session_id in sorted(by_session, key=str):
+        session_events = by_session[session_id]
+        window = next(iter(session_events.values()))[5]
+        checkins = []
+        for result, event, student_id, occurred_at, location_verified, _ in session_events.values():
+            started_at = window.started_at or occurred_at
+            if occurred_at <= started_at + timedelta(minutes=window.window_minutes):
+                result.attendance_status = AttendanceStatus.PRESENT
+            else:
+                result.attendance_status = AttendanceStatus.LATE
+            checkins.append({
+                "student_id": student_id,
+                "status": result.attendance_status,
+                "check_in_method": event.check_in_method,
+                "check_in_time": occurred_at,
+                "latitude": event.latitude,
+                "longitude": event.longitude,
+                "location_verified": location_verified,
+                "face_verified": False,
+                "notes": event.notes,
+                "ip_address": ip_address,
+                "user_agent": user_agent
+            })
+
+        # Only lecturers can overturn an absence recorded at close-out
+        outcomes = await apply_offline_checkins(
+            db, session_id, window.course_id, window.attendance_session_id, window.started_at, checkins,
+            upgrade_absent=current_user.role != UserRole.STUDENT
+        )
+        for result, _, student_id, _, _, _ in session_events.values():
+            if outcomes[student_id] == "duplicate":
+                result.outcome, result.detail = "duplicate", "Student already has an attendance record for this session"
+                result.attendance_status = None
+            else:
+                result.outcome, result.detail = "accepted", None
+        applied[session_id] = sum(outcome != "duplicate" for outcome in outcomes.values())
+
+    await db.commit()
+
+    for session_id, count in applied.items():
+        if count:
+            course_matrices.bump(windows[session_id].course_id)
+            await publish_session_event(session_id, {"type": "offline_sync", "applied": count})
+
+    response = OfflineSyncResponse(
+        accepted=sum(result.outcome == "accepted" for result in results),
+        duplicates=sum(result.outcome == "duplicate" for result in results),
+        rejected=sum(result.outcome == "rejected" for result in results),
+        results=results
+    )
+    logger.info(
+        f"Offline sync by {current_user.email}: {response.accepted} accepted, "
+        f"{response.duplicates} duplicates, {response.rejected} rejected"
+    )
+    return response
+
+@router.get("/me/summary", response_model=List[AttendanceRollupResponse])
+async def get_my_attendance_summary(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the current student's attendance totals for each course"""
+    return await get_student_rollups(db, current_user.id)
+
+@router.get("/courses/{course_id}/summary", response_model=List[AttendanceRollupResponse])
+async def get_course_attendance_summary(
+    course_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get every student's attendance totals for a course (Lecturer/Admin only)"""
+    await get_owned_course(db, course_id, current_user)
+    return await get_course_rollups(db, course_id)
+
+@router.get("/courses/{course_id}/analytics", response_model=CourseAnalyticsResponse)
+async def get_course_analytics(
+    course_id: uuid.UUID,
+    at_risk_only: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Per-student percentages and absence streaks plus per-session trends (Lecturer/Admin only)"""
+    await get_owned_course(db, course_id, current_user)
+
+    matrix = await course_matrices.get(db, course_id)
+    percentages = matrix.percentages()
+    at_risk = matrix.at_risk(settings.AT_RISK_THRESHOLD_PERCENT, settings.AT_RISK_ABSENCE_STREAK)
+
+    students = [
+        StudentAnalytics(
+            student_id=student_id,
+            attendance_percentage=round(percentage, 1),
+            sessions_attended=attended,
+            sessions_absent=absent,
+            current_absence_streak=current_streak,
+            longest_absence_streak=longest_streak,
+            at_risk=flagged
+        )
+        for student_id, percentage, attended, absent, current_streak, longest_streak, flagged in zip(
+            matrix.student_ids,
+            percentages.tolist(),
+            matrix.attended_counts().tolist(),
+            matrix.absent_counts().tolist(),
+            matrix.current_absence_streaks().tolist(),
+            matrix.longest_absence_streaks().tolist(),
+            at_risk.tolist()
+        )
+        if flagged or not at_risk_only
+    ]
+
+    sessions = [
+        SessionTrend(
+            session_id=session_id,
+            scheduled_start=scheduled_start,
+            attendance_rate=round(rate, 1),
+            change=round(change, 1)
+        )
+        for session_id, scheduled_start, rate, change in zip(
+            matrix.session_ids,
+            matrix.session_starts,
+            matrix.session_rates().tolist(),
+            matrix.session_trend().tolist()
+        )
+    ]
+
+    return CourseAnalyticsResponse(
+        course_id=course_id,
+        total_students=matrix.shape[0],
+        total_sessions=matrix.shape[1],
+        average_attendance=round(float(percentages.mean()), 1) if percentages.size else 0.0,
+        at_risk_count=int(at_risk.sum()),
+        students=students,
+        sessions=sessions
+    )
+
+@router.get("/courses/{course_id}/at-risk", response_model=List[AtRiskStudentResponse])
+async def get_course_at_risk_students(
+    course_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Students flagged by the latest at-risk job run, lowest attendance first (Lecturer/Admin only)"""
+    await get_owned_course(db, course_id, current_user)
+
+    result = await db.execute(
+        select(AtRiskStudent)
+        .where(AtRiskStudent.course_id == course_id)
+        .order_by(AtRiskStudent.attendance_percentage)
+    )
+    return result.scalars().all()
+
+async def archived_records_page(db: AsyncSession, query, cursor: Optional[str], limit: int) -> ArchivedAttendancePage:
+    """Newest-first keyset page of archived records on (created_at, id)"""
+    if cursor:
+        last_created_at, last_id = decode_created_at_cursor(cursor)
+        query = query.where(
+            tuple_(ArchivedAttendanceRecord.created_at, ArchivedAttendanceRecord.id) < (last_created_at, last_id)
+        )
+
+    result = await db.execute(
+        query
+        .order_by(ArchivedAttendanceRecord.created_at.desc(), ArchivedAttendanceRecord.id.desc())
+        .limit(limit + 1)
+    )
+    rows = result.scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return ArchivedAttendancePage(
+        items=[ArchivedAttendanceRecordResponse.model_validate(row) for row in rows],
+        next_cursor=next_cursor
+    )
+
+@router.get("/me/archive", response_model=ArchivedAttendancePage)
+async def get_my_archived_attendance(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the current student's attendance records from past academic years"""
+    query = select(ArchivedAttendanceRecord).where(ArchivedAttendanceRecord.student_id == current_user.id)
+    return await archived_records_page(db, query, cursor, limit)
+
+@router.get("/courses/{course_id}/archive", response_model=ArchivedAttendancePage)
+async def get_course_archived_attendance(
+    course_id: uuid.UUID,
+    session_id: Optional[uuid.UUID] = None,
+    student_id: Optional[uuid.UUID] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a course's attendance records from past academic years (Lecturer/Admin only)"""
+    await get_owned_course(db, course_id, current_user)
+
+    # Sessions themselves are never archived, so they still scope records to the course
+    query = (
+        select(ArchivedAttendanceRecord)
+        .join(Session, Session.id == ArchivedAttendanceRecord.session_id)
+        .where(Session.course_id == course_id)
+    )
+    if session_id:
+        query = query.where(ArchivedAttendanceRecord.session_id == session_id)
+    if student_id:
+        query = query.where(ArchivedAttendanceRecord.student_id == student_id)
+
+    return await archived_records_page(db, query, cursor, limit)
+
+@router.get("/courses/{course_id}/export")
+async def export_course_attendance(
+    course_id: uuid.UUID,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|xlsx)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream a course's attendance records as CSV or XLSX (Lecturer/Admin only)"""
+    course = await get_owned_course(db, course_id, current_user)
+
+    # Rows are read through a server-side cursor in the response's own session,
+    # so memory use does not grow with the number of records
+    media_type, encode = EXPORT_FORMATS[export_format]
+    query = build_export_query(course_id, date_from, date_to)
+    filename = f"{course.course_code}_attendance.{export_format}"
+
+    logger.info(f"Attendance export of course {course_id} ({export_format}) by {current_user.email}")
+
+    return StreamingResponse(
+        encode(stream_rows(query)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.websocket("/sessions/{session_id}/ws")
+async def session_live_feed(websocket: WebSocket, session_id: uuid.UUID, token: str):
+    """Live check-in events and counters for a session (Lecturer/Admin only)
+
+    Browsers cannot set headers on WebSocket requests, so the access token
+    is passed as the ``token`` query parameter.
+    """
+    payload = verify_token(token)
+    user_id = payload.get("sub") if payload else None
+    if user_id is None or not database.AsyncSessionLocal:
+        await websocket.close(code=4401)
+        return
+
+    # Use a short-lived database session; the socket may stay open for hours
+    async with database.AsyncSessionLocal() as db:
+        user_result = await db.execute(select(User.role).where(User.id == user_id))
+        role = user_result.scalar_one_or_none()
+
+        session_result = await db.execute(
+            select(Course.lecturer_id, *SESSION_COUNTER_COLUMNS)
+            .select_from(Session)
+            .join(Course, Course.id == Session.course_id)
+            .outerjoin(AttendanceSession, AttendanceSession.session_id == Session.id)
+            .where(Session.id == session_id)
+        )
+        row = session_result.one_or_none()
+
+    if role not in (UserRole.LECTURER, UserRole.ADMIN) or row is None:
+        await websocket.close(code=4403)
+        return
+    if role == UserRole.LECTURER and str(row[0]) != str(user_id):
+        await websocket.close(code=4403)
+        return
+
+    # Subscribe before sending the snapshot so no event falls in between
+    subscription = event_bus.subscribe(session_channel(session_id))
+    await websocket.accept()
+
+    async def forward_events():
+        await websocket.send_json({"type": "snapshot", "counters": session_counters(row[1:])})
+        async for message in subscription:
+            await websocket.send_text(message)
+
+    async def wait_for_disconnect():
+        while True:
+            await websocket.receive_text()
+
+    sender = asyncio.create_task(forward_events())
+    receiver = asyncio.create_task(wait_for_disconnect())
+    try:
+        await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        subscription.close()
+        for task in (sender, receiver):
+            task.cancel()
+        for task in (sender, receiver):
+            try:
+                await task
+            except (asyncio.CancelledError, WebSocketDisconnect, RuntimeError):
+                pass
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
@@ -8,6 +8,7 @@ import secrets
 import string
 
 from app.core.database import get_db
+from app.core.etag import conditional_response
 from app.core.security import (
     verify_password, get_password_hash, create_access_token, 
     create_refresh_token, verify_token
@@ -19,6 +20,7 @@ from app.schemas.user import (
     Token
 )
 from app.services.email_service import send_verification_email, send_password_reset_email
+from app.services.metrics_service import record_user_change
 
 router = APIRouter()
 security = HTTPBearer()
@@ -117,6 +119,7 @@ async def register_user(
     )
     
     db.add(new_user)
+    await record_user_change(db, user_data.role, None, UserStatus.PENDING)
     await db.commit()
     await db.refresh(new_user)
     
@@ -212,6 +215,9 @@ async def verify_email(
             detail="Verification code expired"
         )
     
+    # Read before the UPDATE, which synchronizes the loaded user object
+    previous_status = user.status
+    
     # Update user status
     await db.execute(
         update(User)
@@ -223,6 +229,8 @@ async def verify_email(
             email_verification_expires=None
         )
     )
+    if previous_status != UserStatus.ACTIVE:
+        await record_user_change(db, user.role, previous_status, UserStatus.ACTIVE)
     await db.commit()
     
     logger.info(f"Email verified for user: {user.email}")
@@ -355,9 +363,18 @@ async def reset_password(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
     """Get current user information"""
+    # Every write to the user row moves updated_at
+    not_modified = conditional_response(
+        request, response, "auth_me", current_user.id, current_user.updated_at or current_user.created_at
+    )
+    if not_modified:
+        return not_modified
+    
     return current_user
 
 @router.post("/refresh", response_model=Token)
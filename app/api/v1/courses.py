@@ -1,17 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
-from sqlalchemy.orm import selectinload
-from typing import List
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
+import io
 import logging
 
 from app.core.database import get_db
+from app.core.pagination import encode_cursor, decode_text_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.etag import conditional_response, bump_enrollment_versions
 from app.api.v1.auth import get_current_user
 from app.models.user import User, UserRole
-from app.models.course import Course, CourseEnrollment, CourseStatus
+from app.models.course import Course, CourseEnrollment, CourseStatus, CourseWaitlist, course_enrollments
+from app.models.session import Session
 from app.schemas.course import (
-    CourseCreate, CourseUpdate, CourseResponse,
-    EnrollmentCreate, EnrollmentResponse
+    CourseCreate, CourseUpdate, CourseResponse, CoursePage, CourseSuggestionResponse,
+    EnrollmentCreate, EnrollmentResponse, WaitlistResponse, BulkEnrollmentResponse
+)
+from app.services.roster_cache import roster_cache
+from app.services.geofence_service import geofence_cache
+from app.services.session_state import invalidate_session_state
+from app.services.analytics_service import course_matrices
+from app.services.metrics_service import record_course_change
+from app.services.course_catalog import course_prefix_index, search_clauses
+from app.services.enrollment_service import (
+    BulkEnrollmentError, bulk_enroll, claim_seat, release_seat, fill_from_waitlist, join_waitlist
 )
 
 router = APIRouter()
@@ -51,6 +64,7 @@ async def create_course(
         semester=course_data.semester,
         academic_year=course_data.academic_year,
         max_students=course_data.max_students,
+        waitlist_enabled=course_data.waitlist_enabled,
         geofence_enabled=course_data.geofence_enabled,
         geofence_latitude=course_data.geofence_latitude,
         geofence_longitude=course_data.geofence_longitude,
@@ -59,64 +73,178 @@ async def create_course(
     )
     
     db.add(new_course)
+    await record_course_change(db, None, CourseStatus.ACTIVE)
     await db.commit()
     await db.refresh(new_course)
     
+    course_prefix_index.put(new_course.id, new_course.course_code, new_course.course_name)
+    
     logger.info(f"Course created: {course_data.course_code} by {current_user.email}")
     
     return new_course
 
-@router.get("/", response_model=List[CourseResponse])
+# Only the columns CourseResponse carries, read as plain rows rather than ORM objects
+COURSE_RESPONSE_COLUMNS = [Course.__table__.c[name] for name in CourseResponse.model_fields]
+
+def course_response(row) -> CourseResponse:
+    return CourseResponse(**{**row, "status": row["status"].value if row["status"] else CourseStatus.ACTIVE.value})
+
+def visible_courses(query, current_user: User):
+    """Restrict a courses query to what the user can see"""
+    if current_user.role == UserRole.LECTURER:
+        # Lecturer can see their own courses
+        return query.where(Course.lecturer_id == current_user.id)
+    if current_user.role != UserRole.ADMIN:
+        # Student can see enrolled courses
+        return (
+            query.join(CourseEnrollment, CourseEnrollment.course_id == Course.id)
+            .where(CourseEnrollment.student_id == current_user.id)
+        )
+    return query
+
+@router.get("/", response_model=CoursePage)
 async def get_courses(
+    request: Request,
+    response: Response,
+    semester: Optional[str] = None,
+    academic_year: Optional[str] = None,
+    course_status: Optional[CourseStatus] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get courses based on user role"""
+    """Get courses based on user role, one page at a time in course code order"""
     
-    if current_user.role == UserRole.ADMIN:
-        # Admin can see all courses
-        result = await db.execute(
-            select(Course).options(selectinload(Course.lecturer))
-        )
-        courses = result.scalars().all()
+    conditions = []
+    if semester:
+        conditions.append(Course.semester == semester)
+    if academic_year:
+        conditions.append(Course.academic_year == academic_year)
+    if course_status:
+        conditions.append(Course.status == course_status)
     
-    elif current_user.role == UserRole.LECTURER:
-        # Lecturer can see their own courses
-        result = await db.execute(
-            select(Course)
-            .where(Course.lecturer_id == current_user.id)
-            .options(selectinload(Course.lecturer))
-        )
-        courses = result.scalars().all()
+    # course_code is unique, so it alone is a stable keyset
+    if cursor:
+        last_code = decode_text_cursor(cursor)
+        conditions.append(Course.course_code > last_code)
     
-    else:  # Student
-        # Student can see enrolled courses
-        result = await db.execute(
-            select(Course)
-            .join(CourseEnrollment)
-            .where(CourseEnrollment.student_id == current_user.id)
-            .options(selectinload(Course.lecturer))
-        )
-        courses = result.scalars().all()
+    # Version of everything the page is drawn from: a change, addition or removal moves
+    # the latest timestamp or the count (for students, enrolling and dropping too)
+    version_columns = [func.count(), func.max(func.coalesce(Course.updated_at, Course.created_at))]
+    if current_user.role not in [UserRole.LECTURER, UserRole.ADMIN]:
+        version_columns.append(func.max(CourseEnrollment.enrolled_at))
+    version_query = visible_courses(select(*version_columns).select_from(Course), current_user).where(*conditions)
+    version = (await db.execute(version_query)).one()
     
-    return courses
+    not_modified = conditional_response(
+        request, response, "courses",
+        current_user.id, current_user.role.value, semester, academic_year, course_status, cursor, limit, *version
+    )
+    if not_modified:
+        return not_modified
+    
+    query = visible_courses(select(*COURSE_RESPONSE_COLUMNS), current_user).where(*conditions)
+    result = await db.execute(query.order_by(Course.course_code).limit(limit + 1))
+    rows = result.mappings().all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["course_code"])
+    
+    return CoursePage(items=[course_response(row) for row in rows], next_cursor=next_cursor)
 
-@router.post("/{course_id}/enroll", response_model=EnrollmentResponse)
-async def enroll_student(
+@router.get("/search", response_model=List[CourseResponse])
+async def search_courses(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(20, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Search the active course catalog by code, name or description, best matches first"""
+    condition, rank = search_clauses(q.strip())
+    result = await db.execute(
+        select(*COURSE_RESPONSE_COLUMNS)
+        .where(Course.status == CourseStatus.ACTIVE, condition)
+        .order_by(rank.desc(), Course.course_code)
+        .limit(limit)
+    )
+    return [course_response(row) for row in result.mappings().all()]
+
+@router.get("/autocomplete", response_model=List[CourseSuggestionResponse])
+async def autocomplete_courses(
+    prefix: str = Query(..., min_length=1, max_length=20),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user)
+):
+    """Active courses whose code starts with prefix, answered from memory"""
+    suggestions = await course_prefix_index.suggest(prefix, limit)
+    return [suggestion._asdict() for suggestion in suggestions]
+
+@router.put("/{course_id}", response_model=CourseResponse)
+async def update_course(
     course_id: str,
+    course_data: CourseUpdate,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Enroll student in course"""
-    if current_user.role != UserRole.STUDENT:
+    """Update a course (owning Lecturer/Admin only)"""
+    check_lecturer_or_admin(current_user)
+    
+    # Locked so seat claims cannot interleave with a capacity change
+    result = await db.execute(select(Course).where(Course.id == course_id).with_for_update())
+    course = result.scalar_one_or_none()
+    
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    
+    if current_user.role != UserRole.ADMIN and course.lecturer_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only students can enroll in courses"
+            detail="You can only update your own courses"
         )
     
-    # Check if course exists
-    result = await db.execute(select(Course).where(Course.id == course_id))
-    course = result.scalar_one_or_none()
+    changes = course_data.model_dump(exclude_none=True)
+    if "max_students" in changes and changes["max_students"] < course.seats_taken:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"max_students cannot be lower than the {course.seats_taken} students already enrolled"
+        )
+    
+    for field, value in changes.items():
+        setattr(course, field, value)
+    await db.flush()
+    
+    # Seats added by a higher limit go to the waitlist first
+    promoted = await fill_from_waitlist(db, course_id) if "max_students" in changes else []
+    await db.commit()
+    await db.refresh(course)
+    
+    course_prefix_index.put(course.id, course.course_code, course.course_name, course.status == CourseStatus.ACTIVE)
+    if promoted:
+        roster_cache.invalidate(course_id)
+        course_matrices.bump(course_id)
+        await bump_enrollment_versions(promoted)
+    
+    # Sessions fall back to the course fence, so open sessions must stop enforcing the old one
+    if any(field.startswith("geofence_") for field in changes):
+        result = await db.execute(select(Session.id).where(Session.course_id == course.id))
+        for session_id in result.scalars().all():
+            geofence_cache.invalidate(session_id)
+            invalidate_session_state(session_id)
+    
+    logger.info(f"Course updated: {course.course_code} by {current_user.email}")
+    
+    return course_response({name: getattr(course, name) for name in CourseResponse.model_fields})
+
+async def raise_no_seat(db: AsyncSession, course_id: str):
+    """Explain why no seat could be claimed: missing, inactive or full course"""
+    result = await db.execute(select(Course.status, Course.waitlist_enabled).where(Course.id == course_id))
+    course = result.one_or_none()
     
     if not course:
         raise HTTPException(
@@ -130,9 +258,27 @@ async def enroll_student(
             detail="Course is not active for enrollment"
         )
     
-    # Check if already enrolled
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Course is full, join the waitlist instead" if course.waitlist_enabled else "Course is full"
+    )
+
+@router.post("/{course_id}/enroll", response_model=EnrollmentResponse)
+async def enroll_student(
+    course_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Enroll student in course"""
+    if current_user.role != UserRole.STUDENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only students can enroll in courses"
+        )
+    
+    # Check if already enrolled (a plain read, before any seat is locked)
     enrollment_result = await db.execute(
-        select(CourseEnrollment).where(
+        select(CourseEnrollment.id).where(
             CourseEnrollment.course_id == course_id,
             CourseEnrollment.student_id == current_user.id
         )
@@ -143,6 +289,10 @@ async def enroll_student(
             detail="Already enrolled in this course"
         )
     
+    # Take a seat; the course row stays locked only until the commit below
+    if not await claim_seat(db, course_id):
+        await raise_no_seat(db, course_id)
+    
     # Create enrollment
     new_enrollment = CourseEnrollment(
         course_id=course_id,
@@ -150,9 +300,179 @@ async def enroll_student(
     )
     
     db.add(new_enrollment)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request enrolled the same student; the rollback gives the seat back
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Already enrolled in this course"
+        )
     await db.refresh(new_enrollment)
     
-    logger.info(f"Student enrolled: {current_user.email} in {course.course_code}")
+    # The course roster matrix no longer matches the enrollment list
+    roster_cache.invalidate(course_id)
+    course_matrices.bump(course_id)
+    await bump_enrollment_versions([current_user.id])
+    
+    logger.info(f"Student enrolled: {current_user.email} in course {course_id}")
     
     return new_enrollment
+
+@router.post("/enrollments/bulk", response_model=BulkEnrollmentResponse)
+async def bulk_enroll_students(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Enroll students from a CSV of course_code and student_id or email (Admin only)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can bulk enroll students"
+        )
+    
+    # utf-8-sig drops the byte order mark spreadsheet exports start with
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        report, enrolled_by_course = await bulk_enroll(db, lines)
+    except BulkEnrollmentError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV file must be UTF-8 encoded"
+        )
+    finally:
+        # Leave the upload itself open for FastAPI to close
+        lines.detach()
+    
+    for course_id, student_ids in enrolled_by_course.items():
+        roster_cache.invalidate(course_id)
+        course_matrices.bump(course_id)
+        await bump_enrollment_versions(student_ids)
+    
+    logger.info(f"Bulk enrollment by {current_user.email}: {report['enrolled']} enrolled in {len(enrolled_by_course)} courses")
+    
+    return report
+
+@router.delete("/{course_id}/enroll")
+async def drop_course(
+    course_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Drop a course; the freed seat goes to the first student on the waitlist"""
+    if current_user.role != UserRole.STUDENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only students can drop courses"
+        )
+    
+    result = await db.execute(
+        delete(CourseEnrollment)
+        .where(CourseEnrollment.course_id == course_id, CourseEnrollment.student_id == current_user.id)
+        .returning(CourseEnrollment.id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not enrolled in this course"
+        )
+    await db.execute(
+        delete(course_enrollments).where(
+            course_enrollments.c.course_id == course_id,
+            course_enrollments.c.student_id == current_user.id
+        )
+    )
+    
+    await release_seat(db, course_id)
+    promoted = await fill_from_waitlist(db, course_id)
+    await db.commit()
+    
+    roster_cache.invalidate(course_id)
+    course_matrices.bump(course_id)
+    await bump_enrollment_versions([current_user.id, *promoted])
+    
+    logger.info(f"Student dropped: {current_user.email} from course {course_id}, {len(promoted)} promoted from the waitlist")
+    
+    return {"message": "Course dropped successfully"}
+
+@router.post("/{course_id}/waitlist", response_model=WaitlistResponse)
+async def join_course_waitlist(
+    course_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Wait for a seat in a full course; enrolls right away if one is free"""
+    if current_user.role != UserRole.STUDENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only students can join waitlists"
+        )
+    
+    result = await db.execute(select(Course.status, Course.waitlist_enabled).where(Course.id == course_id))
+    course = result.one_or_none()
+    
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    
+    if course.status != CourseStatus.ACTIVE or not course.waitlist_enabled:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Course has no waitlist"
+        )
+    
+    enrollment_result = await db.execute(
+        select(CourseEnrollment.id).where(
+            CourseEnrollment.course_id == course_id,
+            CourseEnrollment.student_id == current_user.id
+        )
+    )
+    if enrollment_result.scalar_one_or_none():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Already enrolled in this course"
+        )
+    
+    position, promoted = await join_waitlist(db, course_id, current_user.id)
+    await db.commit()
+    
+    if promoted:
+        roster_cache.invalidate(course_id)
+        course_matrices.bump(course_id)
+        await bump_enrollment_versions(promoted)
+    
+    return WaitlistResponse(
+        course_id=course_id,
+        status="waitlisted" if position else "enrolled",
+        position=position
+    )
+
+@router.delete("/{course_id}/waitlist")
+async def leave_course_waitlist(
+    course_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Leave a course waitlist"""
+    result = await db.execute(
+        delete(CourseWaitlist)
+        .where(CourseWaitlist.course_id == course_id, CourseWaitlist.student_id == current_user.id)
+        .returning(CourseWaitlist.id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not on the waitlist of this course"
+        )
+    await db.commit()
+    
+    return {"message": "Left the waitlist"}
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.api.v1.auth import get_current_user
+from app.core.etag import conditional_stats
+from app.models.user import User, UserRole
+from app.services.dashboard_service import get_dashboard_stats
+
+router = APIRouter()
+
+@router.get("/stats")
+async def get_dashboard_statistics(current_user: User = Depends(get_current_user)):
+    """Get dashboard statistics based on user role"""
+    return await get_dashboard_stats(current_user.role, current_user.id)
+
+@router.get("/conditional-requests")
+async def get_conditional_request_stats(current_user: User = Depends(get_current_user)):
+    """304 Not Modified responses served per route by this worker (Admin only)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can view request statistics"
+        )
+    return conditional_stats.snapshot()
@@ -20,7 +20,92 @@ class Settings(BaseSettings):
     
     # Redis for real-time
     REDIS_URL: str = "redis://localhost:6379"
+    REALTIME_BACKEND: str = "memory"  # "memory" for a single worker, "redis" to fan out across workers
+    REALTIME_QUEUE_SIZE: int = 64  # Events buffered per WebSocket before it is asked to resync
     
+    # Geofencing
+    GEOFENCE_CACHE_SIZE: int = 1024  # Sessions with a pre-parsed fence kept in memory
+    GEOFENCE_CACHE_TTL_SECONDS: int = 300
+    
+    # Face recognition
+    FACE_MATCH_TOLERANCE: float = 0.6  # Maximum embedding distance accepted as a match
+    FACE_BATCH_WINDOW_MS: int = 5  # How long concurrent verifications wait to share a batch
+    FACE_BATCH_MAX_SIZE: int = 64
+    
+    # Kiosk identification
+    ROSTER_CACHE_MAX_MB: int = 256  # Memory budget for cached course embedding matrices
+    ROSTER_ANN_MIN_SIZE: int = 5000  # Rosters at least this large use the approximate index
+    ROSTER_ANN_NPROBE: int = 8
+    
+    # Session state cache (open attendance sessions)
+    SESSION_STATE_CACHE_SIZE: int = 2048
+    SESSION_STATE_TTL_SECONDS: int = 30
+    SESSION_WINDOW_TTL_SECONDS: int = 600  # Closed sessions' attendance windows, for offline sync
+    
+    # Live roster delta sync
+    ROSTER_STATE_CACHE_SIZE: int = 512
+    ROSTER_STATE_TTL_SECONDS: int = 3600
+    ROSTER_CHANGELOG_SIZE: int = 2048  # Changes kept per session before clients need a full snapshot
+    ROSTER_SYNC_OVERLAP_SECONDS: int = 5
+    
+    # QR check-in
+    QR_ROTATION_SECONDS: int = 15  # How often the lecturer screen code changes
+    QR_CLOCK_SKEW_SLOTS: int = 1  # Neighbouring time slots still accepted
+    
+    # Offline check-in sync
+    OFFLINE_SYNC_MAX_EVENTS: int = 500  # Events accepted per sync request
+    OFFLINE_SYNC_MAX_LINE_BYTES: int = 8192  # Longer event lines are rejected
+    OFFLINE_SYNC_CLOCK_SKEW_SECONDS: int = 120  # Device clock drift tolerated around the attendance window
+    OFFLINE_SYNC_MAX_DELAY_SECONDS: int = 21600  # Events synced later than this after attendance closed are rejected
+    
+    # Attendance close-out
+    AUTO_CLOSE_INTERVAL_SECONDS: int = 60  # How often expired attendance sessions are closed
+    
+    # Course analytics
+    ANALYTICS_CACHE_SIZE: int = 256  # Course attendance matrices kept in memory
+    ANALYTICS_CACHE_TTL_SECONDS: int = 300  # Upper bound on staleness across workers
+    AT_RISK_THRESHOLD_PERCENT: float = 75.0
+    AT_RISK_ABSENCE_STREAK: int = 3  # Consecutive absences that flag a student regardless of percentage
+    AT_RISK_MIN_SESSIONS: int = 3  # The nightly job ignores courses with fewer completed sessions
+    AT_RISK_CHUNK_COURSES: int = 200  # Courses evaluated per statement by the nightly job
+    
+    # attendance_records partitioning
+    PARTITION_MONTHS_AHEAD: int = 3  # Monthly partitions kept ready beyond the current month
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS: int = 21600
+    
+    # Archival of past academic years
+    ACADEMIC_YEAR_START_MONTH: int = 9  # Sessions before the current academic year are archived
+    ARCHIVE_CHUNK_SIZE: int = 5000  # Rows moved per transaction
+    ARCHIVE_THROTTLE_MS: int = 200  # Pause between chunks to leave headroom for live traffic
+    ARCHIVE_LOCK_TIMEOUT_MS: int = 2000  # A chunk gives up (and retries later) rather than queue behind locks
+    
+    # Idempotent retries (Idempotency-Key header)
+    IDEMPOTENCY_BACKEND: str = "memory"  # "memory" for a single worker, "redis" to share keys across workers
+    IDEMPOTENCY_CACHE_SIZE: int = 10000  # Keys kept by the in-memory backend
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # How long a stored response is replayed
+    IDEMPOTENCY_LOCK_SECONDS: int = 60  # A key stays reserved at most this long while its request runs
+    IDEMPOTENCY_MAX_RESPONSE_BYTES: int = 65536  # Larger responses are not stored
+    
+    # Conditional GET (ETag / If-None-Match)
+    CONDITIONAL_VERSION_BACKEND: str = "memory"  # Version counters: "memory" for a single worker, "redis" to share them
+    CONDITIONAL_COUNTER_MAX_AGE_SECONDS: int = 300  # Counter-based ETags also change this often, for writes made outside the API
+    
+    # Dashboard
+    DASHBOARD_CACHE_SIZE: int = 4096  # Cached stats entries (one per lecturer/student, one for all admins)
+    DASHBOARD_CACHE_TTL_SECONDS: int = 30
+    METRIC_COUNTER_SHARDS: int = 16  # Rows per counter that concurrent writers spread over
+    METRIC_CHECKIN_DAYS_KEPT: int = 30  # Daily check-in counters kept by the nightly reconciler
+    
+    # Course catalog search
+    CATALOG_PREFIX_REFRESH_SECONDS: int = 60  # Autocomplete index reload; bounds staleness for changes made by other workers
+    
+    # Bulk enrollment
+    BULK_ENROLLMENT_MAX_ROWS: int = 100000  # Rows accepted per CSV upload
+    BULK_ENROLLMENT_MAX_ERRORS: int = 1000  # Row errors listed in the report; the count covers all of them
+    
+    # Exports
+    EXPORT_CHUNK_ROWS: int = 1000  # Rows fetched from the server-side cursor per streamed chunk
+
     # Email (optional for now)
     SMTP_HOST: Optional[str] = None
     SMTP_PORT: Optional[int] = None
@@ -135,6 +135,8 @@ async def init_db():
     try:
         # Create tables
         async with async_engine.begin() as connection:
+            # Trigram indexes of the course catalog need pg_trgm
+            await connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
             await connection.run_sync(Base.metadata.create_all)
         logger.info("✅ Database tables created/verified")
         return True
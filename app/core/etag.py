@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Clients may keep the body but must revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*version) -> str:
+    """Weak ETag over what identifies a response version (scope, timestamps, counts, counters),
+    never over the serialized body"""
+    digest = hashlib.blake2b("\x1f".join(map(str, version)).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison against an If-None-Match header, as GET requires"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+class ConditionalStats:
+    """Per-route counts of 304s served and full responses sent, for this worker"""
+
+    def __init__(self):
+        self.not_modified: Counter = Counter()
+        self.full: Counter = Counter()
+
+    def record(self, route: str, not_modified: bool):
+        (self.not_modified if not_modified else self.full)[route] += 1
+
+    def snapshot(self) -> Dict[str, dict]:
+        routes = sorted(self.not_modified.keys() | self.full.keys())
+        return {
+            route: {
+                "not_modified": self.not_modified[route],
+                "full": self.full[route],
+                "not_modified_percentage": round(
+                    100.0 * self.not_modified[route] / (self.not_modified[route] + self.full[route]), 1
+                )
+            }
+            for route in routes
+        }
+
+conditional_stats = ConditionalStats()
+
+def conditional_response(request: Request, response: Response, route: str, *version) -> Optional[Response]:
+    """Tag the response with a version ETag; returns a 304 to send instead when the client already has it.
+
+    Call it before running the query that builds the body.
+    """
+    etag = make_etag(route, *version)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        conditional_stats.record(route, True)
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+    conditional_stats.record(route, False)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
+
+class InMemoryVersionStore:
+    """Per-process version counters; enough for a single worker"""
+
+    def __init__(self):
+        self._versions: Counter = Counter()
+
+    async def get(self, *names: str) -> Tuple[int, ...]:
+        return tuple(self._versions[name] for name in names)
+
+    async def bump(self, name: str):
+        self._versions[name] += 1
+
+    async def close(self):
+        self._versions.clear()
+
+class RedisVersionStore:
+    """Version counters shared by all workers"""
+
+    PREFIX = "version:"
+
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self._redis = None
+
+    def _client(self):
+        if self._redis is None:
+            import redis.asyncio as redis
+            self._redis = redis.from_url(self.redis_url)
+        return self._redis
+
+    async def get(self, *names: str) -> Tuple[int, ...]:
+        values = await self._client().mget([self.PREFIX + name for name in names])
+        return tuple(int(value or 0) for value in values)
+
+    async def bump(self, name: str):
+        await self._client().incr(self.PREFIX + name)
+
+    async def close(self):
+        if self._redis:
+            await self._redis.close()
+
+def create_version_store():
+    if settings.CONDITIONAL_VERSION_BACKEND == "redis":
+        return RedisVersionStore(settings.REDIS_URL)
+    return InMemoryVersionStore()
+
+version_store = create_version_store()
+
+async def counter_versions(*names: str) -> Optional[Tuple]:
+    """Current counters plus an epoch, or None (no ETag) when the store is unreachable.
+
+    Counters only see writes made through this API; the epoch bounds how long
+    a change made some other way can go unnoticed.
+    """
+    try:
+        versions = await version_store.get(*names)
+    except Exception as e:
+        logger.error(f"Version store unavailable: {e}")
+        return None
+    return (*versions, int(time.time() // settings.CONDITIONAL_COUNTER_MAX_AGE_SECONDS))
+
+async def bump_version(name: str):
+    """Mark everything versioned by name as changed; never fails the write that calls it"""
+    try:
+        await version_store.bump(name)
+    except Exception as e:
+        logger.error(f"Failed to bump version {name}: {e}")
+
+def enrollment_version_name(student_id) -> str:
+    """Counter of one student's enrollments, for listings scoped by them"""
+    return f"enrollments:{student_id}"
+
+async def bump_enrollment_versions(student_ids):
+    """Mark the enrollment-scoped listings of these students as changed"""
+    for student_id in set(student_ids):
+        await bump_version(enrollment_version_name(student_id))
@@ -0,0 +1,247 @@
+import base64
+import hashlib
+import json
+import logging
+from typing import List, Optional, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotency-replayed"
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+
+# Stored in place of a response while the first request with a key is still running
+_IN_PROGRESS = "in-progress"
+
+class StoredResponse:
+    """Everything needed to replay a response: status, raw headers and body"""
+
+    def __init__(self, fingerprint: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def dumps(self) -> str:
+        return json.dumps({
+            "fingerprint": self.fingerprint,
+            "status": self.status,
+            "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in self.headers],
+            "body": base64.b64encode(self.body).decode()
+        })
+
+    @classmethod
+    def loads(cls, raw) -> "StoredResponse":
+        data = json.loads(raw)
+        return cls(
+            data["fingerprint"],
+            data["status"],
+            [(name.encode("latin-1"), value.encode("latin-1")) for name, value in data["headers"]],
+            base64.b64decode(data["body"])
+        )
+
+class InMemoryIdempotencyStore:
+    """Per-process store; enough for a single worker"""
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._entries = TTLCache(maxsize, ttl_seconds)
+
+    async def reserve(self, key: str, lock_seconds: float) -> bool:
+        """Claim a key for the request about to run; False if it is already taken"""
+        if key in self._entries:
+            return False
+        self._entries.set(key, _IN_PROGRESS, lock_seconds)
+        return True
+
+    async def get(self, key: str):
+        """The stored response, _IN_PROGRESS, or None"""
+        return self._entries.get(key)
+
+    async def save(self, key: str, response: StoredResponse):
+        self._entries.set(key, response)
+
+    async def release(self, key: str):
+        self._entries.pop(key)
+
+    async def close(self):
+        self._entries.clear()
+
+class RedisIdempotencyStore:
+    """Store shared by all workers; SET NX makes the reservation atomic across them"""
+
+    PREFIX = "idempotency:"
+
+    def __init__(self, redis_url: str, ttl_seconds: float):
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+        self._redis = None
+
+    def _client(self):
+        if self._redis is None:
+            import redis.asyncio as redis
+            self._redis = redis.from_url(self.redis_url)
+        return self._redis
+
+    async def reserve(self, key: str, lock_seconds: float) -> bool:
+        return bool(await self._client().set(self.PREFIX + key, _IN_PROGRESS, nx=True, ex=int(lock_seconds)))
+
+    async def get(self, key: str):
+        raw = await self._client().get(self.PREFIX + key)
+        if raw is None:
+            return None
+        raw = raw.decode() if isinstance(raw, bytes) else raw
+        return _IN_PROGRESS if raw == _IN_PROGRESS else StoredResponse.loads(raw)
+
+    async def save(self, key: str, response: StoredResponse):
+        await self._client().set(self.PREFIX + key, response.dumps(), ex=int(self.ttl_seconds))
+
+    async def release(self, key: str):
+        await self._client().delete(self.PREFIX + key)
+
+    async def close(self):
+        if self._redis:
+            await self._redis.close()
+
+def create_idempotency_store():
+    if settings.IDEMPOTENCY_BACKEND == "redis":
+        return RedisIdempotencyStore(settings.REDIS_URL, settings.IDEMPOTENCY_TTL_SECONDS)
+    return InMemoryIdempotencyStore(settings.IDEMPOTENCY_CACHE_SIZE, settings.IDEMPOTENCY_TTL_SECONDS)
+
+idempotency_store = create_idempotency_store()
+
+async def _send_json(send, status: int, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class _BodyFingerprint:
+    """receive() for the downstream app that hashes the request body as it streams through,
+    so uploads reach the endpoint without being buffered here"""
+
+    def __init__(self, receive):
+        self._receive = receive
+        self._digest = hashlib.sha256()
+        self.complete = False
+
+    async def __call__(self):
+        message = await self._receive()
+        if message["type"] == "http.request":
+            self._digest.update(message.get("body", b""))
+            if not message.get("more_body"):
+                self.complete = True
+        return message
+
+    async def drain(self) -> bool:
+        """Read and hash whatever the app left unread; False if the client went away"""
+        while not self.complete:
+            message = await self()
+            if message["type"] == "http.disconnect":
+                return False
+        return True
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+class IdempotencyMiddleware:
+    """Replay the original response for a repeated Idempotency-Key on mutating requests.
+
+    Pure ASGI so the response can be captured without buffering unrelated
+    traffic. Keys are scoped to the caller's Authorization header, method, path
+    and query string; reusing a key with a different body is rejected. Server
+    errors are not stored, so the client can retry them.
+    """
+
+    def __init__(self, app, store=None):
+        self.app = app
+        self.store = store or idempotency_store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+            return
+
+        caller = hashlib.sha256(headers.get(b"authorization", b"")).hexdigest()
+        key = hashlib.sha256(b"\0".join([
+            caller.encode(), scope["method"].encode(), scope["path"].encode(),
+            scope.get("query_string", b""), idempotency_key
+        ])).hexdigest()
+
+        try:
+            reserved = await self.store.reserve(key, settings.IDEMPOTENCY_LOCK_SECONDS)
+            stored = None if reserved else await self.store.get(key)
+        except Exception as e:
+            # Never fail a request because the store is down; it just runs without replay
+            logger.error(f"Idempotency store unavailable: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        body = _BodyFingerprint(receive)
+
+        if not reserved:
+            if stored == _IN_PROGRESS:
+                await _send_json(send, 409, "A request with this Idempotency-Key is still being processed")
+            elif stored is None:
+                # Expired between reserve and get; treat as a fresh request next time
+                await _send_json(send, 409, "Idempotency-Key expired, please retry")
+            elif not await body.drain():
+                return
+            elif stored.fingerprint != body.hexdigest():
+                await _send_json(send, 422, "Idempotency-Key was already used with a different request body")
+            else:
+                await send({
+                    "type": "http.response.start",
+                    "status": stored.status,
+                    "headers": stored.headers + [(REPLAYED_HEADER, b"true")]
+                })
+                await send({"type": "http.response.body", "body": stored.body})
+            return
+
+        start: Optional[dict] = None
+        chunks: List[bytes] = []
+        size = 0
+
+        async def capture(message):
+            nonlocal start, size
+            if message["type"] == "http.response.start":
+                # The fingerprint covers the whole body, even the part the endpoint did not read
+                await body.drain()
+                start = message
+            elif message["type"] == "http.response.body" and size <= settings.IDEMPOTENCY_MAX_RESPONSE_BYTES:
+                chunks.append(message.get("body", b""))
+                size += len(chunks[-1])
+            await send(message)
+
+        completed = False
+        try:
+            await self.app(scope, body, capture)
+            completed = body.complete
+        finally:
+            await self._finish(key, body.hexdigest(), start, chunks, size, completed)
+
+    async def _finish(self, key: str, fingerprint: str, start, chunks, size: int, completed: bool):
+        try:
+            if completed and start is not None and start["status"] < 500 \
+                    and size <= settings.IDEMPOTENCY_MAX_RESPONSE_BYTES:
+                await self.store.save(key, StoredResponse(fingerprint, start["status"], list(start["headers"]), b"".join(chunks)))
+            else:
+                await self.store.release(key)
+        except Exception as e:
+            logger.error(f"Failed to store idempotent response: {e}")
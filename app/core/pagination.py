@@ -0,0 +1,59 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Tuple
+import uuid
+
+from fastapi import HTTPException, status
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if hasattr(value, "value"):  # Enums
+        return value.value
+    return value
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque keyset cursor for the sort key of the last row on a page"""
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid pagination cursor"
+    )
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor produced by encode_cursor; raises 400 if it was tampered with"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("wrong cursor size")
+        return values
+    except ValueError:
+        raise _invalid_cursor()
+
+def decode_text_cursor(cursor: str) -> str:
+    """Decode a single-string cursor, such as a unique code the page is ordered by"""
+    value, = decode_cursor(cursor, 1)
+    if not isinstance(value, str):
+        raise _invalid_cursor()
+    return value
+
+def decode_created_at_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Decode a (created_at, id) cursor into typed values.
+
+    Cursors end up inside PostgREST filter strings, so anything that does not
+    parse as a timestamp and a UUID is rejected rather than passed through.
+    """
+    last_created_at, last_id = decode_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(last_created_at), uuid.UUID(last_id)
+    except (TypeError, ValueError, AttributeError):
+        raise _invalid_cursor()
@@ -0,0 +1,163 @@
+"""
+Move attendance data of past academic years out of the hot tables.
+Run from the backend directory: python -m app.jobs.archive [--before YYYY-MM-DD] [--dry-run]
+
+Rows move in chunks of ARCHIVE_CHUNK_SIZE, each chunk one short transaction
+(DELETE ... RETURNING feeding an INSERT into the archive table), so the job can
+be stopped at any point and simply run again to resume.
+
+This is the only way attendance leaves the live tables; the monthly partitions it
+empties can then be dropped with python -m app.jobs.partitions --drop-empty-before.
+"""
+import asyncio
+import logging
+import sys
+import time
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.core import database
+from app.core.config import settings
+from app.models.archive import ArchivedAttendanceRecord, ArchivedAttendanceSession
+
+logger = logging.getLogger(__name__)
+
+MAX_LOCK_RETRIES = 5
+
+def _columns(model) -> str:
+    return ", ".join(column.name for column in model.__table__.columns if column.name != "archived_at")
+
+RECORD_COLUMNS = _columns(ArchivedAttendanceRecord)
+SESSION_COLUMNS = _columns(ArchivedAttendanceSession)
+
+# SKIP LOCKED leaves rows a live request is touching for a later chunk
+MOVE_RECORDS_SQL = text(f"""
+WITH batch AS (
+    SELECT r.id, r.created_at
+    FROM attendance_records r
+    JOIN sessions s ON s.id = r.session_id
+    WHERE s.scheduled_start < :cutoff
+    LIMIT :chunk_size
+    FOR UPDATE OF r SKIP LOCKED
+), moved AS (
+    DELETE FROM attendance_records r
+    USING batch
+    WHERE r.id = batch.id AND r.created_at = batch.created_at
+    RETURNING {", ".join(f"r.{column}" for column in RECORD_COLUMNS.split(", "))}
+)
+INSERT INTO archived_attendance_records ({RECORD_COLUMNS})
+SELECT {RECORD_COLUMNS} FROM moved
+ON CONFLICT (id) DO NOTHING
+""")
+
+# A session is archived only once none of its records are left in the hot table
+MOVE_SESSIONS_SQL = text(f"""
+WITH batch AS (
+    SELECT a.id
+    FROM attendance_sessions a
+    JOIN sessions s ON s.id = a.session_id
+    WHERE s.scheduled_start < :cutoff
+      AND a.is_active IS NOT TRUE
+      AND NOT EXISTS (SELECT 1 FROM attendance_records r WHERE r.session_id = a.session_id)
+    LIMIT :chunk_size
+    FOR UPDATE OF a SKIP LOCKED
+), moved AS (
+    DELETE FROM attendance_sessions a
+    USING batch
+    WHERE a.id = batch.id
+    RETURNING {", ".join(f"a.{column}" for column in SESSION_COLUMNS.split(", "))}
+)
+INSERT INTO archived_attendance_sessions ({SESSION_COLUMNS})
+SELECT {SESSION_COLUMNS} FROM moved
+ON CONFLICT (id) DO NOTHING
+""")
+
+COUNT_SQL = {
+    "attendance_records": text("""
+        SELECT count(*) FROM attendance_records r JOIN sessions s ON s.id = r.session_id
+        WHERE s.scheduled_start < :cutoff
+    """),
+    "attendance_sessions": text("""
+        SELECT count(*) FROM attendance_sessions a JOIN sessions s ON s.id = a.session_id
+        WHERE s.scheduled_start < :cutoff AND a.is_active IS NOT TRUE
+    """),
+}
+
+def academic_year_start(today: date = None) -> date:
+    """First day of the academic year containing today"""
+    today = today or datetime.now(timezone.utc).date()
+    year = today.year if today.month >= settings.ACADEMIC_YEAR_START_MONTH else today.year - 1
+    return date(year, settings.ACADEMIC_YEAR_START_MONTH, 1)
+
+async def move_chunk(statement, cutoff: datetime) -> int:
+    """Move one chunk in its own transaction; returns rows moved"""
+    async with database.AsyncSessionLocal() as db:
+        await db.execute(text(f"SET LOCAL lock_timeout = '{settings.ARCHIVE_LOCK_TIMEOUT_MS}ms'"))
+        result = await db.execute(statement, {"cutoff": cutoff, "chunk_size": settings.ARCHIVE_CHUNK_SIZE})
+        await db.commit()
+        return result.rowcount
+
+async def move_all(table: str, statement, cutoff: datetime) -> int:
+    moved = 0
+    failures = 0
+    while True:
+        try:
+            count = await move_chunk(statement, cutoff)
+            failures = 0
+        except DBAPIError as e:
+            # Most likely a lock timeout: back off and try the chunk again
+            failures += 1
+            if failures > MAX_LOCK_RETRIES:
+                logger.error(f"Giving up archiving {table} after {failures} failed chunks: {e}")
+                break
+            logger.warning(f"Archive chunk of {table} failed ({e.__class__.__name__}), retrying")
+            await asyncio.sleep(settings.ARCHIVE_THROTTLE_MS / 1000 * 2 ** failures)
+            continue
+
+        moved += count
+        if count:
+            logger.info(f"Archived {moved} rows from {table}")
+        if count < settings.ARCHIVE_CHUNK_SIZE:
+            break
+        await asyncio.sleep(settings.ARCHIVE_THROTTLE_MS / 1000)
+    return moved
+
+async def run_archive_job(before: date = None, dry_run: bool = False) -> dict:
+    """Archive attendance data of sessions scheduled before the cutoff; returns rows per table"""
+    cutoff_day = before or academic_year_start()
+    cutoff = datetime(cutoff_day.year, cutoff_day.month, cutoff_day.day, tzinfo=timezone.utc)
+    logger.info(f"Archiving attendance data of sessions before {cutoff_day.isoformat()}")
+
+    if dry_run:
+        async with database.AsyncSessionLocal() as db:
+            return {
+                table: (await db.execute(statement, {"cutoff": cutoff})).scalar()
+                for table, statement in COUNT_SQL.items()
+            }
+
+    # Records first: sessions are only moved once their records are gone
+    return {
+        "attendance_records": await move_all("attendance_records", MOVE_RECORDS_SQL, cutoff),
+        "attendance_sessions": await move_all("attendance_sessions", MOVE_SESSIONS_SQL, cutoff),
+    }
+
+async def main(args):
+    if not database.create_database_engine():
+        return
+    try:
+        before = date.fromisoformat(args[args.index("--before") + 1]) if "--before" in args else None
+        dry_run = "--dry-run" in args
+        start = time.perf_counter()
+        counts = await run_archive_job(before, dry_run)
+        verb = "Would archive" if dry_run else "Archived"
+        for table, count in counts.items():
+            print(f"✅ {verb} {count} rows from {table}")
+        print(f"Finished in {time.perf_counter() - start:.1f}s")
+    finally:
+        await database.async_engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(sys.argv[1:]))
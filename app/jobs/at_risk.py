@@ -0,0 +1,197 @@
+"""
+Flag students who are below the attendance threshold or on an absence streak.
+Schedule nightly from the backend directory: python -m app.jobs.at_risk [--no-email]
+
+Every active course is evaluated with one set-based statement per chunk of
+courses; results are upserted into at_risk_students, which the dashboard reads.
+"""
+import asyncio
+import logging
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import select, update, text, bindparam, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+
+from app.core import database
+from app.core.config import settings
+from app.models.user import User
+from app.models.course import Course, CourseStatus
+from app.models.attendance import AtRiskStudent
+from app.services.email_service import send_at_risk_digest
+
+logger = logging.getLogger(__name__)
+
+# Positions number each course's completed sessions in time order, so a streak is the
+# course's session count minus the position of the last attended or excused session
+EVALUATE_SQL = text("""
+WITH completed AS (
+    SELECT id, course_id,
+           row_number() OVER (PARTITION BY course_id ORDER BY scheduled_start, id) AS position,
+           count(*) OVER (PARTITION BY course_id) AS total
+    FROM sessions
+    WHERE course_id = ANY(:course_ids) AND status = 'COMPLETED'
+),
+totals AS (
+    SELECT DISTINCT course_id, total FROM completed
+),
+student_stats AS (
+    SELECT c.course_id, r.student_id,
+           count(*) FILTER (WHERE r.status IN ('PRESENT', 'LATE')) AS attended,
+           count(*) FILTER (WHERE r.status = 'EXCUSED') AS excused,
+           max(c.position) FILTER (WHERE r.status IN ('PRESENT', 'LATE', 'EXCUSED')) AS last_seen
+    FROM attendance_records r
+    JOIN completed c ON c.id = r.session_id
+    GROUP BY c.course_id, r.student_id
+),
+evaluated AS (
+    SELECT e.course_id, e.student_id,
+           t.total - coalesce(s.excused, 0) AS counted,
+           CASE WHEN t.total - coalesce(s.excused, 0) > 0
+                THEN 100.0 * coalesce(s.attended, 0) / (t.total - coalesce(s.excused, 0))
+                ELSE 100.0
+           END AS percentage,
+           t.total - coalesce(s.last_seen, 0) AS streak
+    FROM course_enrollments_detailed e
+    JOIN totals t ON t.course_id = e.course_id AND t.total >= :min_sessions
+    LEFT JOIN student_stats s ON s.course_id = e.course_id AND s.student_id = e.student_id
+)
+INSERT INTO at_risk_students (
+    course_id, student_id, attendance_percentage, current_absence_streak, sessions_counted,
+    low_attendance, absence_streak, detected_at, evaluated_at
+)
+SELECT course_id, student_id, round(percentage, 1), streak, counted,
+       percentage < :threshold, streak >= :streak, :run_at, :run_at
+FROM evaluated
+WHERE percentage < :threshold OR streak >= :streak
+ON CONFLICT (course_id, student_id) DO UPDATE SET
+    attendance_percentage = excluded.attendance_percentage,
+    current_absence_streak = excluded.current_absence_streak,
+    sessions_counted = excluded.sessions_counted,
+    low_attendance = excluded.low_attendance,
+    absence_streak = excluded.absence_streak,
+    evaluated_at = excluded.evaluated_at
+""").bindparams(bindparam("course_ids", type_=ARRAY(UUID(as_uuid=True))))
+
+# Students in the chunk who were not flagged this run have recovered
+CLEAR_SQL = text("""
+DELETE FROM at_risk_students
+WHERE course_id = ANY(:course_ids) AND evaluated_at < :run_at
+""").bindparams(bindparam("course_ids", type_=ARRAY(UUID(as_uuid=True))))
+
+async def evaluate_courses(course_ids: List, run_at: datetime) -> int:
+    """Evaluate one chunk of courses in a single transaction; returns students flagged"""
+    params = {
+        "course_ids": course_ids,
+        "run_at": run_at,
+        "threshold": settings.AT_RISK_THRESHOLD_PERCENT,
+        "streak": settings.AT_RISK_ABSENCE_STREAK,
+        "min_sessions": settings.AT_RISK_MIN_SESSIONS
+    }
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(EVALUATE_SQL, params)
+        await db.execute(CLEAR_SQL, {"course_ids": course_ids, "run_at": run_at})
+        await db.commit()
+    return result.rowcount
+
+async def send_digests() -> int:
+    """Email each lecturer the students newly flagged in their courses; returns digests sent"""
+    if not settings.SMTP_HOST:
+        logger.warning("SMTP is not configured; at-risk digests stay pending until it is")
+        return 0
+
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(
+                Course.lecturer_id, Course.course_code, User.full_name, User.email,
+                AtRiskStudent.course_id, AtRiskStudent.student_id,
+                AtRiskStudent.attendance_percentage, AtRiskStudent.current_absence_streak
+            )
+            .join(Course, Course.id == AtRiskStudent.course_id)
+            .join(User, User.id == AtRiskStudent.student_id)
+            .where(AtRiskStudent.notified_at.is_(None))
+            .order_by(Course.lecturer_id, Course.course_code, AtRiskStudent.attendance_percentage)
+        )
+        by_lecturer = defaultdict(list)
+        for row in result.all():
+            by_lecturer[row.lecturer_id].append(row)
+        if not by_lecturer:
+            return 0
+
+        lecturers = await db.execute(
+            select(User.id, User.email, User.full_name).where(User.id.in_(list(by_lecturer)))
+        )
+
+        sent = 0
+        for lecturer_id, email, full_name in lecturers.all():
+            rows = by_lecturer[lecturer_id]
+            entries = [
+                {
+                    "course_code": row.course_code,
+                    "student_name": row.full_name,
+                    "student_email": row.email,
+                    "attendance_percentage": row.attendance_percentage,
+                    "current_absence_streak": row.current_absence_streak
+                }
+                for row in rows
+            ]
+            if not await send_at_risk_digest(email, full_name, entries):
+                continue
+
+            # Mark only what this digest contained, one statement per lecturer
+            await db.execute(
+                update(AtRiskStudent)
+                .where(
+                    AtRiskStudent.notified_at.is_(None),
+                    tuple_(AtRiskStudent.course_id, AtRiskStudent.student_id).in_(
+                        [(row.course_id, row.student_id) for row in rows]
+                    )
+                )
+                .values(notified_at=datetime.now(timezone.utc))
+            )
+            await db.commit()
+            sent += 1
+
+        return sent
+
+async def run_at_risk_job(send_email: bool = True) -> int:
+    """Evaluate every active course in chunks; returns the number of flagged students"""
+    run_at = datetime.now(timezone.utc)
+
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(select(Course.id).where(Course.status == CourseStatus.ACTIVE).order_by(Course.id))
+        course_ids = result.scalars().all()
+
+    flagged = 0
+    chunk_size = settings.AT_RISK_CHUNK_COURSES
+    for offset in range(0, len(course_ids), chunk_size):
+        chunk = course_ids[offset:offset + chunk_size]
+        try:
+            flagged += await evaluate_courses(chunk, run_at)
+        except Exception as e:
+            logger.error(f"At-risk evaluation failed for courses {offset}-{offset + len(chunk)}: {e}")
+
+    logger.info(f"At-risk job evaluated {len(course_ids)} courses: {flagged} students flagged")
+
+    if send_email:
+        sent = await send_digests()
+        logger.info(f"Sent {sent} at-risk digests")
+
+    return flagged
+
+async def main(send_email: bool):
+    if not database.create_database_engine():
+        return
+    try:
+        start = time.perf_counter()
+        flagged = await run_at_risk_job(send_email)
+        print(f"✅ {flagged} students at risk ({time.perf_counter() - start:.1f}s)")
+    finally:
+        await database.async_engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(send_email="--no-email" not in sys.argv[1:]))
@@ -0,0 +1,79 @@
+"""
+Close attendance sessions whose auto-close time has passed.
+Runs inside the API process (see app.main) or once from the backend directory:
+python -m app.jobs.auto_close
+"""
+import asyncio
+import logging
+
+from sqlalchemy import select, func, text
+
+from app.core import database
+from app.core.config import settings
+from app.models.session import Session
+from app.models.attendance import AttendanceSession
+from app.services.attendance_service import close_attendance_session
+from app.services.session_state import invalidate_session_state
+from app.services.event_bus import publish_session_event
+from app.services.analytics_service import course_matrices
+
+logger = logging.getLogger(__name__)
+
+async def close_expired_sessions() -> int:
+    """Close every expired session in its own transaction; returns how many were closed"""
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(AttendanceSession.session_id, Session.course_id)
+            .join(Session, Session.id == AttendanceSession.session_id)
+            .where(
+                AttendanceSession.is_active.is_(True),
+                AttendanceSession.auto_close_minutes.isnot(None),
+                AttendanceSession.started_at
+                + AttendanceSession.auto_close_minutes * text("interval '1 minute'") <= func.now()
+            )
+        )
+        expired = result.all()
+
+    closed = 0
+    for session_id, course_id in expired:
+        try:
+            async with database.AsyncSessionLocal() as db:
+                attendance_session = await close_attendance_session(db, session_id, course_id)
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to auto-close session {session_id}: {e}")
+            continue
+
+        # None means another worker closed it first
+        if attendance_session is None:
+            continue
+        closed += 1
+        invalidate_session_state(session_id)
+        course_matrices.bump(course_id)
+        await publish_session_event(session_id, {"type": "session_closed", "auto": True})
+
+    return closed
+
+async def run_auto_close_loop(interval_seconds: float = settings.AUTO_CLOSE_INTERVAL_SECONDS):
+    """Background task started with the application"""
+    while True:
+        try:
+            closed = await close_expired_sessions()
+            if closed:
+                logger.info(f"Auto-closed {closed} attendance sessions")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Auto-close pass failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+async def main():
+    if not database.create_database_engine():
+        return
+    try:
+        print(f"✅ Closed {await close_expired_sessions()} expired attendance sessions")
+    finally:
+        await database.async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""
+Monthly partition maintenance for attendance_records.
+Runs inside the API process (see app.main) or from the backend directory:
+python -m app.jobs.partitions                                  create upcoming partitions
+python -m app.jobs.partitions --drop-empty-before 2024-09-01   drop older months the archive job has emptied
+"""
+import asyncio
+import logging
+import sys
+from datetime import date
+
+from app.core import database
+from app.core.config import settings
+from app.services.partition_service import ensure_partitions, drop_empty_partitions_before
+
+logger = logging.getLogger(__name__)
+
+async def maintain_partitions():
+    async with database.async_engine.begin() as conn:
+        created = await ensure_partitions(conn)
+    if created:
+        logger.info(f"Created attendance partitions: {', '.join(created)}")
+    return created
+
+async def run_partition_maintenance_loop(interval_seconds: float = settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS):
+    """Background task started with the application; keeps future months ready for inserts"""
+    while True:
+        # Startup already ran one pass, so wait first
+        await asyncio.sleep(interval_seconds)
+        try:
+            await maintain_partitions()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Partition maintenance failed: {e}")
+
+async def main(args):
+    if not database.create_database_engine():
+        return
+    try:
+        if "--drop-empty-before" in args:
+            cutoff = date.fromisoformat(args[args.index("--drop-empty-before") + 1])
+            async with database.async_engine.begin() as conn:
+                dropped = await drop_empty_partitions_before(conn, cutoff)
+            print(f"✅ Dropped {len(dropped)} empty partitions: {', '.join(dropped) or 'none'}")
+        else:
+            created = await maintain_partitions()
+            print(f"✅ Created {len(created)} partitions: {', '.join(created) or 'none'}")
+    finally:
+        await database.async_engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(sys.argv[1:]))
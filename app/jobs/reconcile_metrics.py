@@ -0,0 +1,106 @@
+"""
+Recount metric_counters from the tables they summarize.
+Counters are maintained by the write paths; this corrects any drift (and seeds
+the table on first run). Schedule nightly from the backend directory:
+python -m app.jobs.reconcile_metrics
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, time as day_time, timedelta, timezone
+from typing import Dict, Tuple
+
+from sqlalchemy import text
+
+from app.core import database
+from app.core.config import settings
+from app.services.metrics_service import (
+    METRIC_USERS, METRIC_COURSES, METRIC_ACTIVE_SESSIONS, METRIC_CHECKINS, METRIC_ATTENDANCE
+)
+
+logger = logging.getLogger(__name__)
+
+# Enum columns hold member names ('STUDENT'); counter dimensions use the lowercase values
+RECOUNT_SQL = text(f"""
+INSERT INTO metric_counters (metric, dimension, shard, value)
+SELECT '{METRIC_USERS}', lower(role::text) || ':' || lower(coalesce(status::text, 'PENDING')), 0, count(*)
+FROM users GROUP BY 2
+UNION ALL
+SELECT '{METRIC_COURSES}', lower(coalesce(status::text, 'ACTIVE')), 0, count(*)
+FROM courses GROUP BY 2
+UNION ALL
+SELECT '{METRIC_ACTIVE_SESSIONS}', '', 0, count(*)
+FROM attendance_sessions WHERE is_active
+UNION ALL
+SELECT '{METRIC_CHECKINS}', to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD'), 0, count(*)
+FROM attendance_records
+WHERE created_at >= :since AND status IN ('PRESENT', 'LATE')
+GROUP BY 2
+UNION ALL
+SELECT '{METRIC_ATTENDANCE}', status, 0, total
+FROM (
+    SELECT coalesce(sum(present_count), 0) AS present, coalesce(sum(late_count), 0) AS late,
+           coalesce(sum(absent_count), 0) AS absent, coalesce(sum(excused_count), 0) AS excused
+    FROM attendance_rollups
+) totals
+CROSS JOIN LATERAL (VALUES ('present', present), ('late', late), ('absent', absent), ('excused', excused))
+    AS by_status(status, total)
+""")
+
+SNAPSHOT_SQL = text("""
+SELECT metric, dimension, sum(value) FROM metric_counters
+WHERE metric <> :checkins OR dimension >= :since_day
+GROUP BY metric, dimension
+""")
+
+async def reconcile_metrics() -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """Replace the counters with fresh counts in one transaction; returns {key: (was, now)} for drifted counters"""
+    today = datetime.now(timezone.utc).date()
+    # Yesterday too, so a run just after midnight still settles the day that ended
+    since = today - timedelta(days=1)
+    params = {
+        "since": datetime.combine(since, day_time.min, tzinfo=timezone.utc),
+        "since_day": since.isoformat(),
+        "checkins": METRIC_CHECKINS
+    }
+
+    async with database.AsyncSessionLocal() as db:
+        # Writers queue behind this lock, and any transaction that already counted
+        # something has committed before it is granted, so nothing is lost or counted twice
+        await db.execute(text("LOCK TABLE metric_counters IN EXCLUSIVE MODE"))
+
+        before = {(metric, dimension): int(value) for metric, dimension, value in (await db.execute(SNAPSHOT_SQL, params)).all()}
+
+        # Daily check-in counters of past days are kept as history until they age out
+        oldest_kept = (today - timedelta(days=settings.METRIC_CHECKIN_DAYS_KEPT)).isoformat()
+        await db.execute(
+            text("DELETE FROM metric_counters WHERE metric <> :checkins OR dimension >= :since_day OR dimension < :oldest"),
+            {**params, "oldest": oldest_kept}
+        )
+        await db.execute(RECOUNT_SQL, params)
+
+        after = {(metric, dimension): int(value) for metric, dimension, value in (await db.execute(SNAPSHOT_SQL, params)).all()}
+        await db.commit()
+
+    drift = {
+        key: (before.get(key, 0), after.get(key, 0))
+        for key in before.keys() | after.keys()
+        if before.get(key, 0) != after.get(key, 0)
+    }
+    for (metric, dimension), (was, now) in sorted(drift.items()):
+        logger.warning(f"Metric {metric}/{dimension or '-'} drifted: {was} -> {now}")
+    return drift
+
+async def main():
+    if not database.create_database_engine():
+        return
+    try:
+        start = time.perf_counter()
+        drift = await reconcile_metrics()
+        print(f"✅ Metric counters reconciled, {len(drift)} corrected ({time.perf_counter() - start:.1f}s)")
+    finally:
+        await database.async_engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+"""
+Rebuild attendance_rollups from attendance_records and archived_attendance_records.
+Rollups are maintained incrementally by every record write; this recounts them
+offline, fixes any drift and backfills courses that predate the rollup table.
+Run from the backend directory: python -m app.jobs.reconcile_rollups [course_id ...]
+"""
+import asyncio
+import logging
+import sys
+import time
+
+from sqlalchemy import select
+
+from app.core import database
+from app.models.course import Course
+from app.services.rollup_service import rebuild_course_rollups
+
+logger = logging.getLogger(__name__)
+
+async def reconcile_rollups(course_ids=None) -> int:
+    """Rebuild each course in its own short transaction; returns the number of rollup rows written"""
+    if not course_ids:
+        async with database.AsyncSessionLocal() as db:
+            course_ids = (await db.execute(select(Course.id).order_by(Course.id))).scalars().all()
+
+    total = 0
+    for course_id in course_ids:
+        try:
+            async with database.AsyncSessionLocal() as db:
+                rows = await rebuild_course_rollups(db, course_id)
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to rebuild rollups for course {course_id}: {e}")
+            continue
+        total += rows
+        logger.info(f"Rebuilt {rows} rollups for course {course_id}")
+
+    return total
+
+async def main(course_ids):
+    if not database.create_database_engine():
+        return
+    try:
+        start = time.perf_counter()
+        rows = await reconcile_rollups(course_ids)
+        print(f"✅ Rebuilt {rows} rollup rows in {time.perf_counter() - start:.1f}s")
+    finally:
+        await database.async_engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(sys.argv[1:]))
@@ -1,6 +1,7 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 import uvicorn
 
@@ -15,18 +16,40 @@ logger = logging.getLogger(__name__)
 from app.models.user import User
 from app.models.course import Course, CourseEnrollment
 from app.models.session import Session
-from app.models.attendance import AttendanceRecord, AttendanceSession
+from app.models.attendance import AttendanceRecord, AttendanceSession, AttendanceRollup, AtRiskStudent
+from app.models.archive import ArchivedAttendanceRecord, ArchivedAttendanceSession
+from app.models.metrics import MetricCounter
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     logger.info("🚀 Starting Student Attendance System API...")
     
+    from app.services.event_bus import event_bus
+    try:
+        await event_bus.start()
+    except Exception as e:
+        logger.error(f"⚠️ Realtime event bus unavailable: {e}")
+    
+    background_tasks = []
     try:
         # Initialize database
         from app.core.database import init_db
         await init_db()
         logger.info("✅ Database initialized successfully!")
+        
+        # Keep attendance_records partitions ready before any check-in lands
+        from app.jobs.partitions import maintain_partitions, run_partition_maintenance_loop
+        await maintain_partitions()
+        background_tasks.append(asyncio.create_task(run_partition_maintenance_loop()))
+        
+        # Course code autocomplete is served from memory
+        from app.services.course_catalog import course_prefix_index
+        await course_prefix_index.refresh()
+        
+        # Close attendance sessions once their auto-close time passes
+        from app.jobs.auto_close import run_auto_close_loop
+        background_tasks.append(asyncio.create_task(run_auto_close_loop()))
         logger.info("✅ Application started successfully with database!")
         
     except Exception as e:
@@ -35,6 +58,11 @@ async def lifespan(app: FastAPI):
     yield
     
     logger.info("🔄 Shutting down Student Attendance System API...")
+    for task in background_tasks:
+        task.cancel()
+    await event_bus.close()
+    await idempotency_store.close()
+    await version_store.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -44,6 +72,12 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Replay responses of retried mutating requests that carry an Idempotency-Key;
+# added before CORS so replays still pass through it
+from app.core.idempotency import IdempotencyMiddleware, idempotency_store
+from app.core.etag import version_store
+app.add_middleware(IdempotencyMiddleware, store=idempotency_store)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -54,10 +88,12 @@ app.add_middleware(
 )
 
 # Import and include routers
-from app.api.v1 import auth, courses
+from app.api.v1 import auth, courses, attendance, dashboard
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(courses.router, prefix="/api/v1/courses", tags=["Courses"])
+app.include_router(attendance.router, prefix="/api/v1/attendance", tags=["Attendance"])
+app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["Dashboard"])
 
 @app.get("/")
 async def root():
@@ -1,11 +1,15 @@
 from .user import User, UserRole, UserStatus
-from .course import Course, CourseEnrollment
+from .course import Course, CourseEnrollment, CourseWaitlist
 from .session import Session, SessionStatus
-from .attendance import AttendanceRecord, AttendanceStatus, CheckInMethod, AttendanceSession
+from .attendance import AttendanceRecord, AttendanceStatus, CheckInMethod, AttendanceSession, AttendanceRollup, AtRiskStudent
+from .archive import ArchivedAttendanceRecord, ArchivedAttendanceSession
+from .metrics import MetricCounter
 
 __all__ = [
     "User", "UserRole", "UserStatus",
-    "Course", "CourseEnrollment", 
+    "Course", "CourseEnrollment", "CourseWaitlist",
     "Session", "SessionStatus",
-    "AttendanceRecord", "AttendanceStatus", "CheckInMethod", "AttendanceSession"
+    "AttendanceRecord", "AttendanceStatus", "CheckInMethod", "AttendanceSession", "AttendanceRollup", "AtRiskStudent",
+    "ArchivedAttendanceRecord", "ArchivedAttendanceSession",
+    "MetricCounter"
 ]
@@ -0,0 +1,78 @@
+from sqlalchemy import Column, String, DateTime, Boolean, Text, Enum, Float, Integer, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.models.attendance import AttendanceStatus, CheckInMethod
+
+# Archive tables mirror the hot tables column for column (plus archived_at) and
+# are written only by app.jobs.archive; they carry no foreign keys so old
+# sessions, courses and users can be cleaned up independently.
+
+class ArchivedAttendanceRecord(Base):
+    __tablename__ = "archived_attendance_records"
+    __table_args__ = (
+        Index("ix_archived_attendance_records_session", "session_id", "created_at", "id"),
+        Index("ix_archived_attendance_records_student", "student_id", "created_at", "id"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    session_id = Column(UUID(as_uuid=True), nullable=False)
+    student_id = Column(UUID(as_uuid=True), nullable=False)
+    
+    # Attendance details
+    status = Column(Enum(AttendanceStatus))
+    check_in_method = Column(Enum(CheckInMethod))
+    check_in_time = Column(DateTime(timezone=True), nullable=True)
+    
+    # Verification
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    location_verified = Column(Boolean)
+    face_verified = Column(Boolean)
+    face_confidence = Column(Float, nullable=True)
+    
+    # Additional info
+    notes = Column(Text, nullable=True)
+    ip_address = Column(String(45), nullable=True)
+    user_agent = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<ArchivedAttendanceRecord {self.student_id} - {self.session_id}: {self.status}>"
+
+class ArchivedAttendanceSession(Base):
+    __tablename__ = "archived_attendance_sessions"
+    __table_args__ = (
+        Index("ix_archived_attendance_sessions_session", "session_id"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    session_id = Column(UUID(as_uuid=True), nullable=False)
+    
+    # Session control
+    is_active = Column(Boolean)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    ended_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Settings
+    auto_close_minutes = Column(Integer)
+    require_geofence = Column(Boolean)
+    require_face_recognition = Column(Boolean)
+    
+    # Statistics
+    total_students = Column(Integer)
+    present_count = Column(Integer)
+    absent_count = Column(Integer)
+    late_count = Column(Integer)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<ArchivedAttendanceSession {self.session_id}>"
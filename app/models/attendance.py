@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Text, Enum, Float, Integer
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Text, Enum, Float, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -20,6 +20,15 @@ class CheckInMethod(str, enum.Enum):
 
 class AttendanceRecord(Base):
     __tablename__ = "attendance_records"
+    __table_args__ = (
+        Index("ix_attendance_records_session_student", "session_id", "student_id"),
+        # Keyset pagination walks (created_at, id) newest first, optionally within one student or session
+        Index("ix_attendance_records_created_id", "created_at", "id"),
+        Index("ix_attendance_records_student_created_id", "student_id", "created_at", "id"),
+        Index("ix_attendance_records_session_created_id", "session_id", "created_at", "id"),
+        # Monthly range partitions are created by app.services.partition_service
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
@@ -33,8 +42,8 @@ class AttendanceRecord(Base):
     check_in_time = Column(DateTime(timezone=True), nullable=True)
     
     # Location verification
-    latitude = Column(String(50), nullable=True)
-    longitude = Column(String(50), nullable=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
     location_verified = Column(Boolean, default=False)
     
     # Face recognition verification
@@ -46,8 +55,8 @@ class AttendanceRecord(Base):
     ip_address = Column(String(45), nullable=True)
     user_agent = Column(Text, nullable=True)
     
-    # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Timestamps (created_at is the partition key, so it is part of the primary key)
+    created_at = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
@@ -88,3 +97,59 @@ class AttendanceSession(Base):
     
     def __repr__(self):
         return f"<AttendanceSession {self.session_id}: {'Active' if self.is_active else 'Inactive'}>"
+
+class AttendanceRollup(Base):
+    """Per-student attendance totals for a course, maintained alongside every record write"""
+    __tablename__ = "attendance_rollups"
+    __table_args__ = (
+        Index("ix_attendance_rollups_student", "student_id"),
+    )
+    
+    course_id = Column(UUID(as_uuid=True), ForeignKey('courses.id'), primary_key=True)
+    student_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), primary_key=True)
+    
+    # Counts of closed-out records by status
+    present_count = Column(Integer, nullable=False, default=0)
+    late_count = Column(Integer, nullable=False, default=0)
+    absent_count = Column(Integer, nullable=False, default=0)
+    excused_count = Column(Integer, nullable=False, default=0)
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    @property
+    def total_sessions(self) -> int:
+        return self.present_count + self.late_count + self.absent_count + self.excused_count
+    
+    @property
+    def attendance_percentage(self) -> float:
+        """Present and late both count as attended; excused sessions are left out"""
+        counted = self.total_sessions - self.excused_count
+        if counted <= 0:
+            return 0.0
+        return round(100.0 * (self.present_count + self.late_count) / counted, 1)
+    
+    def __repr__(self):
+        return f"<AttendanceRollup {self.student_id} - {self.course_id}>"
+
+class AtRiskStudent(Base):
+    """Students flagged by the nightly at-risk job, one row per course while they stay at risk"""
+    __tablename__ = "at_risk_students"
+    
+    course_id = Column(UUID(as_uuid=True), ForeignKey('courses.id'), primary_key=True)
+    student_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), primary_key=True)
+    
+    # Why the student was flagged
+    attendance_percentage = Column(Float, nullable=False)
+    current_absence_streak = Column(Integer, nullable=False, default=0)
+    sessions_counted = Column(Integer, nullable=False, default=0)
+    low_attendance = Column(Boolean, nullable=False, default=False)
+    absence_streak = Column(Boolean, nullable=False, default=False)
+    
+    # Timestamps
+    detected_at = Column(DateTime(timezone=True), server_default=func.now())
+    evaluated_at = Column(DateTime(timezone=True), server_default=func.now())
+    notified_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<AtRiskStudent {self.student_id} - {self.course_id}>"
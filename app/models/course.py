@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Text, DateTime, Boolean, Integer, ForeignKey, Table, Enum
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, DateTime, Boolean, Integer, Float, ForeignKey, Table, Enum, Index, UniqueConstraint, CheckConstraint, Computed
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.core.database import Base
 import uuid
@@ -11,6 +11,13 @@ class CourseStatus(enum.Enum):
     INACTIVE = "inactive"
     ARCHIVED = "archived"
 
+# Catalog search document: code, name and description, weighted in that order
+COURSE_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('simple', course_code), 'A') || "
+    "setweight(to_tsvector('english', course_name), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
 # Association table for course enrollments
 course_enrollments = Table(
     'course_enrollments',
@@ -22,12 +29,26 @@ course_enrollments = Table(
 
 class Course(Base):
     __tablename__ = "courses"
+    __table_args__ = (
+        # Course listing filters, each ending in the course_code sort key
+        Index("ix_courses_lecturer_code", "lecturer_id", "course_code"),
+        Index("ix_courses_status_code", "status", "course_code"),
+        Index("ix_courses_semester_code", "semester", "course_code"),
+        Index("ix_courses_year_semester_code", "academic_year", "semester", "course_code"),
+        CheckConstraint("seats_taken >= 0", name="ck_courses_seats_taken"),
+        # Catalog search: full text over the search document, trigrams for typos and partial codes
+        Index("ix_courses_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_courses_name_trgm", "course_name", postgresql_using="gin", postgresql_ops={"course_name": "gin_trgm_ops"}),
+        Index("ix_courses_code_trgm", "course_code", postgresql_using="gin", postgresql_ops={"course_code": "gin_trgm_ops"}),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     course_code = Column(String(20), unique=True, nullable=False)
     course_name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     credits = Column(Integer, default=3)
+    # Maintained by PostgreSQL; deferred so loading a course does not fetch it
+    search_vector = deferred(Column(TSVECTOR, Computed(COURSE_SEARCH_DOCUMENT, persisted=True)))
     
     # Lecturer
     lecturer_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
@@ -37,11 +58,14 @@ class Course(Base):
     semester = Column(String(50), nullable=True)
     academic_year = Column(String(20), nullable=True)
     max_students = Column(Integer, nullable=True)
+    # Enrollments holding a seat, claimed with a conditional UPDATE so max_students is never exceeded
+    seats_taken = Column(Integer, nullable=False, default=0, server_default="0")
+    waitlist_enabled = Column(Boolean, nullable=False, default=False, server_default="false")
     
     # Geofencing
     geofence_enabled = Column(Boolean, default=False)
-    geofence_latitude = Column(String(50), nullable=True)
-    geofence_longitude = Column(String(50), nullable=True)
+    geofence_latitude = Column(Float, nullable=True)
+    geofence_longitude = Column(Float, nullable=True)
     geofence_radius = Column(Integer, default=100)  # meters
     
     # Timestamps
@@ -58,6 +82,11 @@ class Course(Base):
 
 class CourseEnrollment(Base):
     __tablename__ = "course_enrollments_detailed"
+    __table_args__ = (
+        Index("ix_course_enrollments_student_course", "student_id", "course_id"),
+        # One enrollment per student and course; bulk enrollment skips existing pairs against it
+        UniqueConstraint("course_id", "student_id", name="uq_course_enrollments_course_student"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     course_id = Column(UUID(as_uuid=True), ForeignKey('courses.id'), nullable=False)
@@ -70,3 +99,19 @@ class CourseEnrollment(Base):
     
     def __repr__(self):
         return f"<CourseEnrollment {self.student_id} -> {self.course_id}>"
+
+class CourseWaitlist(Base):
+    __tablename__ = "course_waitlist"
+    __table_args__ = (
+        UniqueConstraint("course_id", "student_id", name="uq_course_waitlist_course_student"),
+        # Queue order within a course
+        Index("ix_course_waitlist_course_created", "course_id", "created_at", "id"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    course_id = Column(UUID(as_uuid=True), ForeignKey('courses.id'), nullable=False)
+    student_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<CourseWaitlist {self.student_id} -> {self.course_id}>"
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, DateTime, SmallInteger, BigInteger
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class MetricCounter(Base):
+    """One shard of a maintained count, e.g. ("users", "student:active", 3).
+
+    Writers add to a random shard so concurrent transactions rarely wait on the
+    same row; readers sum the shards. app.jobs.reconcile_metrics recounts them.
+    """
+    __tablename__ = "metric_counters"
+    
+    metric = Column(String(50), primary_key=True)
+    dimension = Column(String(50), primary_key=True, default="")
+    shard = Column(SmallInteger, primary_key=True, default=0)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<MetricCounter {self.metric}/{self.dimension}[{self.shard}]: {self.value}>"
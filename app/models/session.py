@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Integer, Text, Enum
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Integer, Float, Text, Enum
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -41,8 +41,8 @@ class Session(Base):
     require_face_recognition = Column(Boolean, default=True)
     
     # Location (can override course location)
-    latitude = Column(String(50), nullable=True)
-    longitude = Column(String(50), nullable=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
     location_name = Column(String(255), nullable=True)
     
     # Timestamps
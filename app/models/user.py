@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Enum, Text, Integer
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Text, Integer, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from app.core.database import Base
 import uuid
@@ -40,7 +41,9 @@ class User(Base):
     specialization = Column(String(100), nullable=True)
     
     # Face recognition data
-    face_encoding = Column(Text, nullable=True)
+    # Binary float32 embedding (see app.services.face_service.encode_embedding).
+    # Deferred so loading a User for authentication never pulls it along.
+    face_encoding = deferred(Column(LargeBinary, nullable=True))
     face_images = Column(Text, nullable=True)  # JSON array of image URLs
     
     # Email verification
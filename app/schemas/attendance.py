@@ -0,0 +1,246 @@
+from pydantic import BaseModel, validator
+from typing import Optional, List
+from datetime import datetime
+from app.models.attendance import AttendanceStatus, CheckInMethod
+import uuid
+
+# Check-in Schema
+class CheckInRequest(BaseModel):
+    session_id: Optional[uuid.UUID] = None  # Optional when a QR token is supplied
+    qr_token: Optional[str] = None
+    student_id: Optional[uuid.UUID] = None  # Lecturers/admins checking a student in manually
+    check_in_method: CheckInMethod = CheckInMethod.GEOLOCATION
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    face_encoding: Optional[List[float]] = None  # Embedding of the live capture
+    notes: Optional[str] = None
+
+    @validator('latitude')
+    def validate_latitude(cls, v):
+        if v is not None and not -90 <= v <= 90:
+            raise ValueError('Latitude must be between -90 and 90')
+        return v
+
+    @validator('longitude')
+    def validate_longitude(cls, v):
+        if v is not None and not -180 <= v <= 180:
+            raise ValueError('Longitude must be between -180 and 180')
+        return v
+
+# Attendance Record Response Schema
+class AttendanceRecordResponse(BaseModel):
+    id: uuid.UUID
+    session_id: uuid.UUID
+    student_id: uuid.UUID
+    status: AttendanceStatus
+    check_in_method: CheckInMethod
+    check_in_time: Optional[datetime] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    location_verified: bool
+    face_verified: bool
+    face_confidence: Optional[float] = None
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Attendance Session Schemas
+class AttendanceSessionStart(BaseModel):
+    auto_close_minutes: int = 15
+    require_geofence: Optional[bool] = None  # Defaults to the session setting
+    require_face_recognition: Optional[bool] = None
+
+class AttendanceSessionResponse(BaseModel):
+    id: uuid.UUID
+    session_id: uuid.UUID
+    is_active: bool
+    started_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    auto_close_minutes: int
+    require_geofence: bool
+    require_face_recognition: bool
+    total_students: int
+    present_count: int
+    absent_count: int
+    late_count: int
+
+    class Config:
+        from_attributes = True
+
+# Bulk Marking Schemas
+class BulkMarkEntry(BaseModel):
+    student_id: uuid.UUID
+    status: AttendanceStatus
+    notes: Optional[str] = None
+
+class BulkMarkRequest(BaseModel):
+    records: List[BulkMarkEntry]
+
+    @validator('records')
+    def validate_records(cls, v):
+        if not v:
+            raise ValueError('At least one record is required')
+        if len({entry.student_id for entry in v}) != len(v):
+            raise ValueError('Each student can only be marked once per request')
+        return v
+
+class BulkMarkResponse(BaseModel):
+    created: int
+    updated: int
+
+# Offline Sync Schemas
+class OfflineCheckInEvent(BaseModel):
+    event_id: str  # Generated by the device, echoed back in the result
+    session_id: uuid.UUID
+    student_id: Optional[uuid.UUID] = None  # Lecturer kiosks syncing students' check-ins
+    occurred_at: datetime
+    check_in_method: CheckInMethod = CheckInMethod.QR_CODE
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    notes: Optional[str] = None
+    qr_token: Optional[str] = None  # Code scanned from the lecturer screen; required for students
+    signature: str  # Hex HMAC-SHA256 of the signed fields with the device key
+
+    @validator('event_id')
+    def validate_event_id(cls, v):
+        if not 1 <= len(v) <= 64:
+            raise ValueError('event_id must be 1-64 characters')
+        return v
+
+    @validator('latitude')
+    def validate_latitude(cls, v):
+        if v is not None and not -90 <= v <= 90:
+            raise ValueError('Latitude must be between -90 and 90')
+        return v
+
+    @validator('longitude')
+    def validate_longitude(cls, v):
+        if v is not None and not -180 <= v <= 180:
+            raise ValueError('Longitude must be between -180 and 180')
+        return v
+
+class OfflineSyncResult(BaseModel):
+    line: int
+    event_id: Optional[str] = None
+    session_id: Optional[uuid.UUID] = None
+    outcome: str  # "accepted", "duplicate" or "rejected"
+    attendance_status: Optional[AttendanceStatus] = None
+    detail: Optional[str] = None
+
+class OfflineSyncResponse(BaseModel):
+    accepted: int
+    duplicates: int
+    rejected: int
+    results: List[OfflineSyncResult]
+
+class OfflineKeyResponse(BaseModel):
+    key: str  # base64url, kept on the device
+    algorithm: str = "HMAC-SHA256"
+    signed_fields: List[str]
+
+# Attendance Summary Schemas
+class AttendanceRollupResponse(BaseModel):
+    course_id: uuid.UUID
+    student_id: uuid.UUID
+    present_count: int
+    late_count: int
+    absent_count: int
+    excused_count: int
+    total_sessions: int
+    attendance_percentage: float
+
+    class Config:
+        from_attributes = True
+
+# Course Analytics Schemas
+class StudentAnalytics(BaseModel):
+    student_id: uuid.UUID
+    attendance_percentage: float
+    sessions_attended: int
+    sessions_absent: int
+    current_absence_streak: int
+    longest_absence_streak: int
+    at_risk: bool
+
+class SessionTrend(BaseModel):
+    session_id: uuid.UUID
+    scheduled_start: datetime
+    attendance_rate: float
+    change: float
+
+class CourseAnalyticsResponse(BaseModel):
+    course_id: uuid.UUID
+    total_students: int
+    total_sessions: int
+    average_attendance: float
+    at_risk_count: int
+    students: List[StudentAnalytics]
+    sessions: List[SessionTrend]
+
+class AtRiskStudentResponse(BaseModel):
+    course_id: uuid.UUID
+    student_id: uuid.UUID
+    attendance_percentage: float
+    current_absence_streak: int
+    sessions_counted: int
+    low_attendance: bool
+    absence_streak: bool
+    detected_at: Optional[datetime] = None
+    evaluated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Archive Schemas
+class ArchivedAttendanceRecordResponse(BaseModel):
+    id: uuid.UUID
+    session_id: uuid.UUID
+    student_id: uuid.UUID
+    status: AttendanceStatus
+    check_in_method: CheckInMethod
+    check_in_time: Optional[datetime] = None
+    location_verified: Optional[bool] = None
+    face_verified: Optional[bool] = None
+    notes: Optional[str] = None
+    created_at: datetime
+    archived_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ArchivedAttendancePage(BaseModel):
+    items: List[ArchivedAttendanceRecordResponse]
+    next_cursor: Optional[str] = None
+
+# Kiosk Identification Schemas
+class IdentifyRequest(BaseModel):
+    face_encoding: List[float]
+
+class IdentifyResponse(BaseModel):
+    matched: bool
+    student_id: Optional[uuid.UUID] = None
+    confidence: float = 0.0
+    distance: Optional[float] = None
+
+# QR Check-in Schemas
+class QRCodeResponse(BaseModel):
+    token: str
+    expires_in: int
+    rotation_seconds: int
+
+# Live Roster Schemas
+class RosterChange(BaseModel):
+    student_id: uuid.UUID
+    status: AttendanceStatus
+
+class RosterSyncResponse(BaseModel):
+    version: int
+    full: bool
+    changes: List[RosterChange] = []
+    # Full snapshot only: roster order plus base64 little-endian bitsets over it
+    roster: Optional[List[uuid.UUID]] = None
+    present: Optional[str] = None
+    late: Optional[str] = None
+    excused: Optional[str] = None
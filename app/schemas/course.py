@@ -12,11 +12,12 @@ class CourseBase(BaseModel):
     semester: Optional[str] = None
     academic_year: Optional[str] = None
     max_students: Optional[int] = None
+    waitlist_enabled: bool = False
     
     # Geofencing
     geofence_enabled: bool = False
-    geofence_latitude: Optional[str] = None
-    geofence_longitude: Optional[str] = None
+    geofence_latitude: Optional[float] = None
+    geofence_longitude: Optional[float] = None
     geofence_radius: int = 100
 
 # Course Creation Schema
@@ -35,9 +36,10 @@ class CourseUpdate(BaseModel):
     semester: Optional[str] = None
     academic_year: Optional[str] = None
     max_students: Optional[int] = None
+    waitlist_enabled: Optional[bool] = None
     geofence_enabled: Optional[bool] = None
-    geofence_latitude: Optional[str] = None
-    geofence_longitude: Optional[str] = None
+    geofence_latitude: Optional[float] = None
+    geofence_longitude: Optional[float] = None
     geofence_radius: Optional[int] = None
 
 # Course Response Schema
@@ -45,12 +47,22 @@ class CourseResponse(CourseBase):
     id: uuid.UUID
     lecturer_id: uuid.UUID
     status: str
+    seats_taken: int = 0
     created_at: datetime
     updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class CoursePage(BaseModel):
+    items: List[CourseResponse]
+    next_cursor: Optional[str] = None
+
+class CourseSuggestionResponse(BaseModel):
+    id: uuid.UUID
+    course_code: str
+    course_name: str
+
 # Enrollment Schemas
 class EnrollmentCreate(BaseModel):
     course_id: uuid.UUID
@@ -63,3 +75,24 @@ class EnrollmentResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class WaitlistResponse(BaseModel):
+    course_id: uuid.UUID
+    status: str  # "waitlisted", or "enrolled" when a seat was free
+    position: Optional[int] = None
+
+class BulkEnrollmentRowError(BaseModel):
+    line: int
+    course_code: str
+    student: str
+    error: str
+
+class BulkEnrollmentResponse(BaseModel):
+    total_rows: int
+    enrolled: int
+    already_enrolled: int
+    failed: int
+    errors: List[BulkEnrollmentRowError]
+    errors_truncated: bool = False
+    elapsed_seconds: float
+    rows_per_second: float
@@ -0,0 +1,257 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import uuid
+
+import numpy as np
+from sqlalchemy import select, func, case
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.course import CourseEnrollment
+from app.models.session import Session, SessionStatus
+from app.models.attendance import AttendanceRecord, AttendanceStatus
+
+logger = logging.getLogger(__name__)
+
+# Cell codes of the student x session matrix; a completed session without a record counts as absent
+CODE_ABSENT = 0
+CODE_PRESENT = 1
+CODE_LATE = 2
+CODE_EXCUSED = 3
+
+STATUS_CODES = {
+    AttendanceStatus.PRESENT: CODE_PRESENT,
+    AttendanceStatus.LATE: CODE_LATE,
+    AttendanceStatus.ABSENT: CODE_ABSENT,
+    AttendanceStatus.EXCUSED: CODE_EXCUSED,
+}
+
+# Set bits per byte value, for popcounts over packed rows
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def _popcount_rows(packed: np.ndarray) -> np.ndarray:
+    return _POPCOUNT[packed].sum(axis=1, dtype=np.int32)
+
+def _trailing_true(mask: np.ndarray) -> np.ndarray:
+    """Length of the run of True at the end of each row"""
+    if mask.shape[1] == 0:
+        return np.zeros(mask.shape[0], dtype=np.int32)
+    reversed_false = ~mask[:, ::-1]
+    first_false = np.argmax(reversed_false, axis=1)
+    return np.where(reversed_false.any(axis=1), first_false, mask.shape[1]).astype(np.int32)
+
+def _longest_true_run(mask: np.ndarray) -> np.ndarray:
+    """Longest run of True in each row, without a Python loop over rows"""
+    rows, columns = mask.shape
+    if columns == 0:
+        return np.zeros(rows, dtype=np.int32)
+    # Running count that resets at every False: position minus the index of the last False
+    positions = np.arange(1, columns + 1, dtype=np.int32)
+    last_false = np.maximum.accumulate(np.where(mask, 0, positions), axis=1)
+    return (positions - last_false).max(axis=1).astype(np.int32)
+
+class CourseMatrix:
+    """Student x session status codes for the completed sessions of one course.
+
+    Codes are kept one byte per cell; the attended and absent planes are also
+    bit-packed along the session axis so per-student totals are byte popcounts.
+    """
+
+    def __init__(
+        self,
+        course_id,
+        version: int,
+        student_ids: List[uuid.UUID],
+        sessions: List[Tuple[uuid.UUID, object]],
+        codes: np.ndarray
+    ):
+        self.course_id = course_id
+        self.version = version
+        self.student_ids = student_ids
+        self.session_ids = [session_id for session_id, _ in sessions]
+        self.session_starts = [scheduled_start for _, scheduled_start in sessions]
+        self.codes = codes
+
+        attended = (codes == CODE_PRESENT) | (codes == CODE_LATE)
+        absent = codes == CODE_ABSENT
+        self.attended_bits = np.packbits(attended, axis=1)
+        self.absent_bits = np.packbits(absent, axis=1)
+        self.excused_counts = (codes == CODE_EXCUSED).sum(axis=1, dtype=np.int32)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.codes.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.attended_bits.nbytes + self.absent_bits.nbytes + self.excused_counts.nbytes
+
+    def attended_counts(self) -> np.ndarray:
+        return _popcount_rows(self.attended_bits)
+
+    def absent_counts(self) -> np.ndarray:
+        return _popcount_rows(self.absent_bits)
+
+    def percentages(self) -> np.ndarray:
+        """Attended share of each student's non-excused sessions, in percent.
+
+        A student excused from every session has missed nothing and scores 100,
+        as in the nightly at-risk job.
+        """
+        counted = self.codes.shape[1] - self.excused_counts
+        attended = self.attended_counts()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(counted > 0, 100.0 * attended / counted, 100.0)
+
+    def current_absence_streaks(self) -> np.ndarray:
+        """Consecutive absences up to the latest session; excused sessions break a streak"""
+        return _trailing_true(self.codes == CODE_ABSENT)
+
+    def longest_absence_streaks(self) -> np.ndarray:
+        return _longest_true_run(self.codes == CODE_ABSENT)
+
+    def at_risk(self, threshold_percent: float, streak: int) -> np.ndarray:
+        """Students below the attendance threshold or on an absence streak"""
+        if self.codes.shape[1] == 0:
+            return np.zeros(self.codes.shape[0], dtype=bool)
+        return (self.percentages() < threshold_percent) | (self.current_absence_streaks() >= streak)
+
+    def session_rates(self) -> np.ndarray:
+        """Share of enrolled students who attended each session, in percent"""
+        if self.codes.shape[0] == 0:
+            return np.zeros(self.codes.shape[1])
+        attended = (self.codes == CODE_PRESENT) | (self.codes == CODE_LATE)
+        return 100.0 * attended.mean(axis=0)
+
+    def session_trend(self) -> np.ndarray:
+        """Change in attendance rate from the previous session (0 for the first)"""
+        rates = self.session_rates()
+        return np.diff(rates, prepend=rates[:1]) if rates.size else rates
+
+def build_course_matrix(
+    course_id,
+    version: int,
+    student_ids: Sequence[uuid.UUID],
+    sessions: Sequence[Tuple[uuid.UUID, object]],
+    cells: Sequence[Tuple[int, int, int]]
+) -> CourseMatrix:
+    """Scatter (student row, session column, code) triples into the code matrix"""
+    student_ids = list(student_ids)
+    sessions = list(sessions)
+    codes = np.zeros((len(student_ids), len(sessions)), dtype=np.uint8)
+
+    if len(cells):
+        rows, columns, values = np.array(cells, dtype=np.int64).T
+        codes[rows, columns] = values
+
+    return CourseMatrix(course_id, version, student_ids, sessions, codes)
+
+class CourseMatrixCache:
+    """Course matrices tagged with the course version they were built from.
+
+    Write paths call bump() after committing; a matrix built from an older
+    version is rebuilt on next use. Bumps are per process, so the TTL bounds
+    how stale another worker's copy can get.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._matrices = TTLCache(maxsize, ttl_seconds)
+        self._versions: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def version(self, course_id) -> int:
+        return self._versions.get(str(course_id), 0)
+
+    def bump(self, course_id):
+        key = str(course_id)
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    async def _build(self, db: AsyncSession, course_id, version: int) -> CourseMatrix:
+        # Let the database translate IDs into matrix positions so Python only scatters integers.
+        # Everything comes from one statement, so the students, sessions and cells share a
+        # snapshot: an enrollment or close-out committed mid-build cannot shift the positions
+        student_rows = (
+            select(
+                CourseEnrollment.student_id,
+                (func.row_number().over(order_by=CourseEnrollment.student_id) - 1).label("position")
+            )
+            .where(CourseEnrollment.course_id == course_id)
+            .cte("student_rows")
+        )
+        session_columns = (
+            select(
+                Session.id,
+                Session.scheduled_start,
+                (func.row_number().over(order_by=(Session.scheduled_start, Session.id)) - 1).label("position")
+            )
+            .where(Session.course_id == course_id, Session.status == SessionStatus.COMPLETED)
+            .cte("session_columns")
+        )
+        code = case(
+            *[(AttendanceRecord.status == record_status, value) for record_status, value in STATUS_CODES.items()],
+            else_=CODE_ABSENT
+        )
+        # The three cell arrays come from one aggregation pass, so their elements line up
+        cells = (
+            select(
+                func.array_agg(student_rows.c.position).label("rows"),
+                func.array_agg(session_columns.c.position).label("columns"),
+                func.array_agg(code).label("codes")
+            )
+            .select_from(AttendanceRecord)
+            .join(student_rows, student_rows.c.student_id == AttendanceRecord.student_id)
+            .join(session_columns, session_columns.c.id == AttendanceRecord.session_id)
+            .subquery()
+        )
+
+        def ordered(column, position):
+            return select(func.array_agg(aggregate_order_by(column, position))).scalar_subquery()
+
+        result = await db.execute(
+            select(
+                ordered(student_rows.c.student_id, student_rows.c.position),
+                ordered(session_columns.c.id, session_columns.c.position),
+                ordered(session_columns.c.scheduled_start, session_columns.c.position),
+                cells.c.rows,
+                cells.c.columns,
+                cells.c.codes
+            )
+        )
+        student_ids, session_ids, session_starts, rows, columns, codes = result.one()
+
+        return build_course_matrix(
+            course_id,
+            version,
+            student_ids or [],
+            list(zip(session_ids or [], session_starts or [])),
+            np.array([rows or [], columns or [], codes or []], dtype=np.int64).T
+        )
+
+    async def get(self, db: AsyncSession, course_id) -> CourseMatrix:
+        key = str(course_id)
+        matrix: Optional[CourseMatrix] = self._matrices.get(key)
+        if matrix is not None and matrix.version == self.version(course_id):
+            return matrix
+
+        # One rebuild per course at a time; waiters reuse its result
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            matrix = self._matrices.get(key)
+            version = self.version(course_id)
+            if matrix is not None and matrix.version == version:
+                return matrix
+
+            start = time.perf_counter()
+            matrix = await self._build(db, course_id, version)
+            self._matrices.set(key, matrix)
+            logger.info(
+                f"Built attendance matrix for course {course_id}: "
+                f"{matrix.shape[0]}x{matrix.shape[1]} in {(time.perf_counter() - start) * 1000:.1f} ms"
+            )
+            return matrix
+
+course_matrices = CourseMatrixCache(settings.ANALYTICS_CACHE_SIZE, settings.ANALYTICS_CACHE_TTL_SECONDS)
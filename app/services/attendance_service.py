@@ -0,0 +1,274 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import uuid
+
+from sqlalchemy import select, update, insert, func, literal, and_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.course import CourseEnrollment
+from app.models.session import Session, SessionStatus
+from app.models.attendance import AttendanceRecord, AttendanceSession, AttendanceStatus, CheckInMethod
+from app.services.rollup_service import apply_rollup_changes
+from app.services.partition_service import records_created_since
+from app.services.metrics_service import record_active_sessions
+
+logger = logging.getLogger(__name__)
+
+def _checkin_lock_key(session_id, student_id) -> int:
+    """Signed 64-bit advisory lock key for one student's record in one session"""
+    return ((uuid.UUID(str(session_id)).int ^ uuid.UUID(str(student_id)).int) >> 64) - (1 << 63)
+
+async def lock_student_records(db: AsyncSession, session_id, student_ids: Iterable):
+    """Hold off other writers of these students' records for the session until commit.
+
+    Taken before checking whether a record exists: FOR UPDATE cannot lock a row
+    that is not there yet, and created_at in the partitioned table's key rules
+    out a unique index on (session_id, student_id).
+    """
+    keys = sorted({_checkin_lock_key(session_id, student_id) for student_id in student_ids})
+    if not keys:
+        return
+    # Always in key order, so concurrent batches cannot deadlock
+    await db.execute(
+        text(
+            "SELECT pg_advisory_xact_lock(key) "
+            "FROM (SELECT unnest(CAST(:keys AS bigint[])) AS key ORDER BY key) AS keys"
+        ),
+        {"keys": keys}
+    )
+
+async def close_attendance_session(db: AsyncSession, session_id, course_id) -> Optional[AttendanceSession]:
+    """Close attendance and record every enrolled student without a record as absent.
+
+    Returns None if attendance was not open (e.g. another worker closed it first).
+    The caller commits.
+    """
+    now = datetime.now(timezone.utc)
+
+    # Claim the close first so concurrent closers (endpoint and auto-close) do it once
+    result = await db.execute(
+        update(AttendanceSession)
+        .where(AttendanceSession.session_id == session_id, AttendanceSession.is_active.is_(True))
+        .values(is_active=False, ended_at=now)
+        .returning(AttendanceSession.id, AttendanceSession.started_at)
+    )
+    claimed = result.one_or_none()
+    if claimed is None:
+        return None
+    attendance_session_id, started_at = claimed
+    await record_active_sessions(db, -1)
+
+    # One INSERT ... SELECT for all absentees
+    absentees = (
+        select(
+            func.gen_random_uuid(),
+            literal(session_id),
+            CourseEnrollment.student_id,
+            # Typed literals, so the enums bind as the member names the columns store
+            literal(AttendanceStatus.ABSENT, AttendanceRecord.status.type),
+            literal(CheckInMethod.MANUAL, AttendanceRecord.check_in_method.type)
+        )
+        .select_from(CourseEnrollment)
+        .outerjoin(AttendanceRecord, and_(
+            AttendanceRecord.session_id == session_id,
+            AttendanceRecord.student_id == CourseEnrollment.student_id,
+            records_created_since(started_at)
+        ))
+        .where(CourseEnrollment.course_id == course_id, AttendanceRecord.id.is_(None))
+    )
+    result = await db.execute(
+        AttendanceRecord.__table__.insert()
+        .from_select(["id", "session_id", "student_id", "status", "check_in_method"], absentees)
+        .returning(AttendanceRecord.student_id)
+    )
+    absent_ids = result.scalars().all()
+
+    await apply_rollup_changes(
+        db, course_id, [(student_id, None, AttendanceStatus.ABSENT) for student_id in absent_ids]
+    )
+
+    await db.execute(
+        update(Session)
+        .where(Session.id == session_id)
+        .values(status=SessionStatus.COMPLETED, actual_end=func.coalesce(Session.actual_end, now))
+    )
+
+    result = await db.execute(
+        update(AttendanceSession)
+        .where(AttendanceSession.id == attendance_session_id)
+        .values(absent_count=AttendanceSession.absent_count + len(absent_ids))
+        .returning(AttendanceSession)
+    )
+    attendance_session = result.scalar_one()
+
+    logger.info(f"Attendance closed for session {session_id}: {len(absent_ids)} marked absent")
+
+    return attendance_session
+
+# Session counters kept per status; excused students are not counted separately
+SESSION_STATUS_COUNTERS = {
+    AttendanceStatus.PRESENT: "present_count",
+    AttendanceStatus.LATE: "late_count",
+    AttendanceStatus.ABSENT: "absent_count",
+}
+
+async def bulk_mark_attendance(
+    db: AsyncSession,
+    session_id,
+    course_id,
+    attendance_session_id,
+    started_at: Optional[datetime],
+    marks: List[Tuple[object, AttendanceStatus, Optional[str]]]
+) -> Tuple[int, int]:
+    """Set many students' status for a session at once; returns (created, updated).
+
+    Raises ValueError if any student is not enrolled in the course. The caller commits.
+    """
+    student_ids = [student_id for student_id, _, _ in marks]
+
+    result = await db.execute(
+        select(CourseEnrollment.student_id).where(
+            CourseEnrollment.course_id == course_id,
+            CourseEnrollment.student_id.in_(student_ids)
+        )
+    )
+    enrolled = set(result.scalars().all())
+    not_enrolled = [str(student_id) for student_id in student_ids if student_id not in enrolled]
+    if not_enrolled:
+        raise ValueError(f"Students not enrolled in this course: {', '.join(not_enrolled)}")
+
+    # Lock the students' records, existing or not, so a concurrent check-in or mark cannot interleave
+    await lock_student_records(db, session_id, student_ids)
+    result = await db.execute(
+        select(AttendanceRecord.student_id, AttendanceRecord.id, AttendanceRecord.created_at, AttendanceRecord.status)
+        .where(
+            AttendanceRecord.session_id == session_id,
+            AttendanceRecord.student_id.in_(student_ids),
+            records_created_since(started_at)
+        )
+        .order_by(AttendanceRecord.id)
+        .with_for_update()
+    )
+    existing = {
+        student_id: (record_id, created_at, record_status)
+        for student_id, record_id, created_at, record_status in result.all()
+    }
+
+    now = datetime.now(timezone.utc)
+    new_rows, updated_rows, changes = [], [], []
+    for student_id, mark_status, notes in marks:
+        record_id, created_at, previous = existing.get(student_id, (None, None, None))
+        if record_id is None:
+            new_rows.append({
+                "session_id": session_id,
+                "student_id": student_id,
+                "status": mark_status,
+                "check_in_method": CheckInMethod.MANUAL,
+                "check_in_time": now if mark_status in (AttendanceStatus.PRESENT, AttendanceStatus.LATE) else None,
+                "notes": notes
+            })
+        elif previous != mark_status:
+            # The primary key includes the partition key
+            row = {"id": record_id, "created_at": created_at, "status": mark_status, "updated_at": now}
+            if notes is not None:
+                row["notes"] = notes
+            updated_rows.append(row)
+        else:
+            continue
+        changes.append((student_id, previous, mark_status))
+
+    if not changes:
+        return 0, 0
+
+    if new_rows:
+        await db.execute(insert(AttendanceRecord), new_rows)
+    if updated_rows:
+        # Bulk UPDATE by primary key, one executemany per distinct set of columns
+        await db.execute(update(AttendanceRecord), updated_rows)
+
+    await apply_session_counter_changes(db, attendance_session_id, changes)
+    await apply_rollup_changes(db, course_id, changes)
+
+    return len(new_rows), len(updated_rows)
+
+async def apply_session_counter_changes(db: AsyncSession, attendance_session_id, changes):
+    """Move the session's per-status counters by a list of (student_id, previous, new) changes"""
+    counter_deltas = dict.fromkeys(SESSION_STATUS_COUNTERS.values(), 0)
+    for _, previous, current in changes:
+        if previous in SESSION_STATUS_COUNTERS:
+            counter_deltas[SESSION_STATUS_COUNTERS[previous]] -= 1
+        if current in SESSION_STATUS_COUNTERS:
+            counter_deltas[SESSION_STATUS_COUNTERS[current]] += 1
+    if any(counter_deltas.values()):
+        await db.execute(
+            update(AttendanceSession)
+            .where(AttendanceSession.id == attendance_session_id)
+            .values({
+                getattr(AttendanceSession, column): getattr(AttendanceSession, column) + delta
+                for column, delta in counter_deltas.items() if delta
+            })
+        )
+
+async def apply_offline_checkins(
+    db: AsyncSession,
+    session_id,
+    course_id,
+    attendance_session_id,
+    started_at: Optional[datetime],
+    checkins: List[dict],
+    upgrade_absent: bool = True
+) -> Dict[object, str]:
+    """Write one session's synced check-ins in a single batch; returns "created",
+    "updated" or "duplicate" per student.
+
+    Each check-in is a dict of AttendanceRecord columns including student_id and
+    status. With upgrade_absent, a student already recorded as absent (e.g. by
+    the close-out) is upgraded; any other existing record wins. The caller commits.
+    """
+    student_ids = [checkin["student_id"] for checkin in checkins]
+    await lock_student_records(db, session_id, student_ids)
+
+    result = await db.execute(
+        select(AttendanceRecord.student_id, AttendanceRecord.id, AttendanceRecord.created_at, AttendanceRecord.status)
+        .where(
+            AttendanceRecord.session_id == session_id,
+            AttendanceRecord.student_id.in_(student_ids),
+            records_created_since(started_at)
+        )
+        .order_by(AttendanceRecord.id)
+        .with_for_update()
+    )
+    existing = {
+        student_id: (record_id, created_at, record_status)
+        for student_id, record_id, created_at, record_status in result.all()
+    }
+
+    now = datetime.now(timezone.utc)
+    outcomes = {}
+    new_rows, updated_rows, changes = [], [], []
+    for checkin in checkins:
+        student_id = checkin["student_id"]
+        record_id, created_at, previous = existing.get(student_id, (None, None, None))
+        if record_id is None:
+            new_rows.append({**checkin, "session_id": session_id})
+            outcomes[student_id] = "created"
+        elif previous == AttendanceStatus.ABSENT and upgrade_absent:
+            row = {key: value for key, value in checkin.items() if key != "student_id"}
+            updated_rows.append({**row, "id": record_id, "created_at": created_at, "updated_at": now})
+            outcomes[student_id] = "updated"
+        else:
+            outcomes[student_id] = "duplicate"
+            continue
+        changes.append((student_id, previous, checkin["status"]))
+
+    if new_rows:
+        await db.execute(insert(AttendanceRecord), new_rows)
+    if updated_rows:
+        await db.execute(update(AttendanceRecord), updated_rows)
+
+    if changes:
+        await apply_session_counter_changes(db, attendance_session_id, changes)
+        await apply_rollup_changes(db, course_id, changes)
+
+    return outcomes
@@ -0,0 +1,130 @@
+import asyncio
+import bisect
+import logging
+import time
+from typing import Dict, List, NamedTuple, Optional
+import uuid
+
+from sqlalchemy import select, func, case, or_, literal_column
+
+from app.core import database
+from app.core.config import settings
+from app.models.course import Course, CourseStatus
+
+logger = logging.getLogger(__name__)
+
+# Must match the configuration the search document indexes names and descriptions with;
+# a literal, since a bound string would not resolve to regconfig
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+class CourseSuggestion(NamedTuple):
+    course_code: str
+    id: uuid.UUID
+    course_name: str
+
+class CoursePrefixIndex:
+    """Active course codes in a sorted array; the codes sharing a prefix are one slice of it.
+
+    Each worker keeps its own copy. Courses created or updated through this
+    worker are applied immediately, changes made by other workers on the next
+    reload, which runs in the background once the copy is older than the
+    refresh interval.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._codes: List[str] = []
+        self._entries: List[CourseSuggestion] = []
+        self._code_by_id: Dict[uuid.UUID, str] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._refreshing: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def search(self, prefix: str, limit: int) -> List[CourseSuggestion]:
+        prefix = prefix.strip().upper()
+        start = bisect.bisect_left(self._codes, prefix)
+        matches = []
+        for index in range(start, min(start + limit, len(self._codes))):
+            if not self._codes[index].startswith(prefix):
+                break
+            matches.append(self._entries[index])
+        return matches
+
+    def put(self, course_id: uuid.UUID, course_code: str, course_name: str, active: bool = True):
+        """Add or update one course; inactive courses are removed"""
+        self.discard(course_id)
+        if not active:
+            return
+        index = bisect.bisect_left(self._codes, course_code)
+        self._codes.insert(index, course_code)
+        self._entries.insert(index, CourseSuggestion(course_code, course_id, course_name))
+        self._code_by_id[course_id] = course_code
+
+    def discard(self, course_id: uuid.UUID):
+        code = self._code_by_id.pop(course_id, None)
+        if code is None:
+            return
+        # Course codes are unique, so the code's position is the course's
+        index = bisect.bisect_left(self._codes, code)
+        del self._codes[index]
+        del self._entries[index]
+
+    async def refresh(self):
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Course.course_code, Course.id, Course.course_name).where(Course.status == CourseStatus.ACTIVE)
+            )
+            # Sorted here rather than by the database, whose collation may order codes differently
+            entries = sorted(CourseSuggestion(*row) for row in result.all())
+
+        self._entries = entries
+        self._codes = [entry.course_code for entry in entries]
+        self._code_by_id = {entry.id: entry.course_code for entry in entries}
+        self._loaded_at = time.monotonic()
+        logger.info(f"Course prefix index loaded: {len(entries)} active courses")
+
+    async def _refresh_in_background(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Course prefix index refresh failed: {e}")
+
+    async def suggest(self, prefix: str, limit: int) -> List[CourseSuggestion]:
+        """Active courses whose code starts with prefix, loading the index on first use"""
+        if self._loaded_at is None:
+            async with self._lock:
+                if self._loaded_at is None:
+                    await self.refresh()
+        elif time.monotonic() - self._loaded_at > self.refresh_seconds:
+            # Answer from the current copy while a newer one loads
+            if self._refreshing is None or self._refreshing.done():
+                self._refreshing = asyncio.create_task(self._refresh_in_background())
+        return self.search(prefix, limit)
+
+course_prefix_index = CoursePrefixIndex(settings.CATALOG_PREFIX_REFRESH_SECONDS)
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def search_clauses(query_text: str):
+    """(filter, rank) for a catalog search.
+
+    A course matches on its full-text document, a trigram-similar name or a
+    code starting with the text; each is served by one of the courses indexes.
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query_text)
+    code_prefix = Course.course_code.like(_escape_like(query_text.upper()) + "%", escape="\\")
+    condition = or_(
+        Course.search_vector.op("@@")(tsquery),
+        Course.course_name.op("%")(query_text),
+        code_prefix
+    )
+    rank = (
+        case((code_prefix, 1.0), else_=0.0)
+        + func.ts_rank(Course.search_vector, tsquery)
+        + func.similarity(Course.course_name, query_text)
+    )
+    return condition, rank
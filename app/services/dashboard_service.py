@@ -0,0 +1,171 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable
+import uuid
+
+from sqlalchemy import select, func, true, distinct
+
+from app.core import database
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import UserRole
+from app.models.course import Course, CourseStatus, CourseEnrollment
+from app.models.session import Session, SessionStatus
+from app.models.attendance import AttendanceSession, AttendanceRollup, AtRiskStudent, AttendanceStatus
+from app.services.metrics_service import (
+    METRIC_USERS, METRIC_COURSES, METRIC_ACTIVE_SESSIONS, METRIC_CHECKINS, METRIC_ATTENDANCE,
+    checkin_dimension, read_counters
+)
+
+logger = logging.getLogger(__name__)
+
+def _joined(*subqueries):
+    """Select every column of several one-row aggregates as one row, in one statement"""
+    source = subqueries[0]
+    for subquery in subqueries[1:]:
+        source = source.join(subquery, true())
+    return select(*[column for subquery in subqueries for column in subquery.c]).select_from(source)
+
+def admin_stats(counters) -> dict:
+    """Campus-wide stats from the maintained counters, without touching the tables they count"""
+    users = counters[METRIC_USERS]
+    courses = counters[METRIC_COURSES]
+    attendance = counters[METRIC_ATTENDANCE]
+
+    def users_with_role(role: UserRole) -> int:
+        return sum(value for dimension, value in users.items() if dimension.startswith(f"{role.value}:"))
+
+    attended = attendance.get(AttendanceStatus.PRESENT.value, 0) + attendance.get(AttendanceStatus.LATE.value, 0)
+    counted = attended + attendance.get(AttendanceStatus.ABSENT.value, 0)
+    return {
+        "total_users": sum(users.values()),
+        "total_students": users_with_role(UserRole.STUDENT),
+        "total_lecturers": users_with_role(UserRole.LECTURER),
+        "total_courses": sum(courses.values()),
+        "active_courses": courses.get(CourseStatus.ACTIVE.value, 0),
+        "active_sessions": counters[METRIC_ACTIVE_SESSIONS].get("", 0),
+        "total_checkins_today": counters[METRIC_CHECKINS].get(checkin_dimension(), 0),
+        "average_attendance": round(100.0 * attended / counted, 1) if counted else 0.0
+    }
+
+def lecturer_stats_query(lecturer_id):
+    courses = select(
+        func.count().label("total_courses"),
+        func.count().filter(Course.status == CourseStatus.ACTIVE).label("active_courses")
+    ).where(Course.lecturer_id == lecturer_id).subquery()
+    sessions = (
+        select(
+            func.count().label("total_sessions"),
+            func.count().filter(Session.status == SessionStatus.COMPLETED).label("completed_sessions"),
+            func.count().filter(Session.status == SessionStatus.SCHEDULED).label("upcoming_sessions"),
+            func.count().filter(AttendanceSession.is_active.is_(True)).label("active_sessions")
+        )
+        .select_from(Session)
+        .join(Course, Course.id == Session.course_id)
+        .outerjoin(AttendanceSession, AttendanceSession.session_id == Session.id)
+        .where(Course.lecturer_id == lecturer_id)
+        .subquery()
+    )
+    students = (
+        select(func.count(distinct(CourseEnrollment.student_id)).label("total_students"))
+        .join(Course, Course.id == CourseEnrollment.course_id)
+        .where(Course.lecturer_id == lecturer_id)
+        .subquery()
+    )
+    at_risk = (
+        select(func.count().label("at_risk_students"))
+        .select_from(AtRiskStudent)
+        .join(Course, Course.id == AtRiskStudent.course_id)
+        .where(Course.lecturer_id == lecturer_id)
+        .subquery()
+    )
+    return _joined(courses, sessions, students, at_risk)
+
+def student_stats_query(student_id):
+    enrollments = (
+        select(func.count().label("enrolled_courses"))
+        .select_from(CourseEnrollment)
+        .where(CourseEnrollment.student_id == student_id)
+        .subquery()
+    )
+    # Totals come from the per-course rollups instead of counting attendance_records
+    rollups = select(
+        func.coalesce(func.sum(AttendanceRollup.present_count), 0).label("present_count"),
+        func.coalesce(func.sum(AttendanceRollup.late_count), 0).label("late_count"),
+        func.coalesce(func.sum(AttendanceRollup.absent_count), 0).label("absent_count"),
+        func.coalesce(func.sum(AttendanceRollup.excused_count), 0).label("excused_count")
+    ).where(AttendanceRollup.student_id == student_id).subquery()
+    at_risk = (
+        select(func.count().label("at_risk_courses"))
+        .select_from(AtRiskStudent)
+        .where(AtRiskStudent.student_id == student_id)
+        .subquery()
+    )
+    return _joined(enrollments, rollups, at_risk)
+
+def _student_summary(stats: dict) -> dict:
+    attended = stats["present_count"] + stats["late_count"]
+    counted = attended + stats["absent_count"]
+    stats["attendance_records"] = counted + stats["excused_count"]
+    stats["attendance_percentage"] = round(100.0 * attended / counted, 1) if counted else 0.0
+    return stats
+
+async def compute_dashboard_stats(role: UserRole, user_id) -> dict:
+    """Run the role's query in its own database session"""
+    if role == UserRole.ADMIN:
+        async with database.AsyncSessionLocal() as db:
+            return admin_stats(await read_counters(
+                db, METRIC_USERS, METRIC_COURSES, METRIC_ACTIVE_SESSIONS, METRIC_CHECKINS, METRIC_ATTENDANCE
+            ))
+
+    query = lecturer_stats_query(user_id) if role == UserRole.LECTURER else student_stats_query(user_id)
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(query)
+        stats = {key: int(value) for key, value in result.one()._mapping.items()}
+
+    return _student_summary(stats) if role == UserRole.STUDENT else stats
+
+class DashboardStatsCache:
+    """Stats per (role, scope) with a short TTL.
+
+    Concurrent misses for the same key share one in-flight query, so an
+    expiring entry under load costs a single database round trip.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._stats = TTLCache(maxsize, ttl_seconds)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable[dict]]) -> dict:
+        stats = self._stats.get(key)
+        if stats is not None:
+            return stats
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, compute))
+            self._inflight[key] = task
+        # A waiter that goes away must not cancel the query others are waiting on
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, compute: Callable[[], Awaitable[dict]]) -> dict:
+        try:
+            stats = await compute()
+            self._stats.set(key, stats)
+            return stats
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        self._stats.clear()
+
+dashboard_cache = DashboardStatsCache(settings.DASHBOARD_CACHE_SIZE, settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+async def get_dashboard_stats(role: UserRole, user_id) -> dict:
+    """Dashboard counts for a user; admins share one cache entry, everyone else has their own"""
+    scope = "all" if role == UserRole.ADMIN else str(user_id)
+    if role != UserRole.ADMIN:
+        user_id = uuid.UUID(str(user_id))
+    stats = await dashboard_cache.get((role.value, scope), lambda: compute_dashboard_stats(role, user_id))
+    # Callers get their own copy so the cached entry cannot be modified
+    return dict(stats)
@@ -1,11 +1,43 @@
+import asyncio
 import logging
-from typing import Optional
+from typing import List, Optional
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
+def _deliver(email: str, subject: str, body: str):
+    """Send one plain-text message through the configured SMTP server (blocking)"""
+    message = MIMEMultipart()
+    message["From"] = settings.SMTP_USER or f"no-reply@{settings.SMTP_HOST}"
+    message["To"] = email
+    message["Subject"] = subject
+    message.attach(MIMEText(body, "plain", "utf-8"))
+
+    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT or 587, timeout=30) as server:
+        server.ehlo()
+        if server.has_extn("starttls"):
+            server.starttls()
+            server.ehlo()
+        if settings.SMTP_USER and settings.SMTP_PASSWORD:
+            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        server.send_message(message)
+
+async def send_email(email: str, subject: str, body: str) -> bool:
+    """Send a message over SMTP; False if it was not delivered (or SMTP is not configured)"""
+    if not settings.SMTP_HOST:
+        logger.warning(f"SMTP is not configured; not sending \"{subject}\" to {email}")
+        return False
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, _deliver, email, subject, body)
+        return True
+    except (smtplib.SMTPException, OSError) as e:
+        logger.error(f"Failed to send \"{subject}\" to {email}: {e}")
+        return False
+
 async def send_verification_email(email: str, full_name: str, verification_code: str):
     """Send email verification code"""
     try:
@@ -52,3 +84,29 @@ async def send_welcome_email(email: str, full_name: str, role: str):
     except Exception as e:
         logger.error(f"Failed to send welcome email to {email}: {e}")
         return False
+
+async def send_at_risk_digest(email: str, full_name: str, students: List[dict]):
+    """Send a lecturer the students newly flagged as at risk in their courses.
+
+    Returns False when the digest was not delivered, so the students stay
+    pending and are included in the next run.
+    """
+    try:
+        lines = [
+            f"Hello {full_name},",
+            "",
+            "These students were flagged as at risk in your courses:",
+            ""
+        ]
+        for student in students:
+            lines.append(
+                f"- {student['course_code']}: {student['student_name']} ({student['student_email']}) - "
+                f"{student['attendance_percentage']:.1f}% attendance, "
+                f"{student['current_absence_streak']} consecutive absences"
+            )
+        
+        logger.info(f"⚠️ At-Risk Digest for {email}: {len(students)} students")
+        return await send_email(email, f"{settings.PROJECT_NAME}: students at risk", "\n".join(lines))
+    except Exception as e:
+        logger.error(f"Failed to send at-risk digest to {email}: {e}")
+        return False
@@ -0,0 +1,262 @@
+import csv
+import logging
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import uuid
+
+from sqlalchemy import select, func, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.course import CourseWaitlist
+
+logger = logging.getLogger(__name__)
+
+# Header names accepted for the student column; each value may be a student ID or an email
+STUDENT_COLUMNS = ("student_id", "email", "student")
+
+STAGING_TABLE = "bulk_enrollment_rows"
+
+CREATE_STAGING_SQL = text(f"""
+CREATE TEMP TABLE {STAGING_TABLE} (line integer, course_code text, student text) ON COMMIT DROP
+""")
+
+# Every staged row resolved against courses and users in one pass; enum columns hold member names
+RESOLVE_SQL = text(f"""
+CREATE TEMP TABLE bulk_enrollment_resolved ON COMMIT DROP AS
+SELECT r.line, r.course_code, r.student, c.id AS course_id, coalesce(by_id.id, by_email.id) AS student_id,
+       CASE
+           WHEN c.id IS NULL THEN 'Unknown course code'
+           WHEN coalesce(c.status::text, 'ACTIVE') <> 'ACTIVE' THEN 'Course is not active for enrollment'
+           WHEN by_id.id IS NULL AND by_email.id IS NULL THEN 'Unknown student'
+           WHEN coalesce(by_id.role, by_email.role)::text <> 'STUDENT' THEN 'User is not a student'
+       END AS error
+FROM {STAGING_TABLE} r
+LEFT JOIN courses c ON c.course_code = r.course_code
+LEFT JOIN users by_id ON by_id.student_id = r.student
+LEFT JOIN users by_email ON by_email.email = r.student
+""")
+
+SUMMARY_SQL = text("""
+SELECT count(*) FILTER (WHERE error IS NULL), count(*) FILTER (WHERE error IS NOT NULL)
+FROM bulk_enrollment_resolved
+""")
+
+ERRORS_SQL = text("""
+SELECT line, course_code, student, error FROM bulk_enrollment_resolved
+WHERE error IS NOT NULL ORDER BY line LIMIT :limit
+""")
+
+# Both enrollment tables in one statement; pairs that already exist (or repeat in the file) are skipped.
+# Registrar uploads take their seats even beyond max_students
+INSERT_SQL = text("""
+WITH valid AS (
+    SELECT DISTINCT course_id, student_id FROM bulk_enrollment_resolved WHERE error IS NULL
+),
+detailed AS (
+    INSERT INTO course_enrollments_detailed (id, course_id, student_id)
+    SELECT gen_random_uuid(), course_id, student_id FROM valid
+    ON CONFLICT (course_id, student_id) DO NOTHING
+    RETURNING course_id, student_id
+),
+association AS (
+    INSERT INTO course_enrollments (course_id, student_id)
+    SELECT course_id, student_id FROM valid
+    ON CONFLICT DO NOTHING
+),
+seats AS (
+    UPDATE courses SET seats_taken = courses.seats_taken + added.count, updated_at = now()
+    FROM (SELECT course_id, count(*) AS count FROM detailed GROUP BY course_id) added
+    WHERE courses.id = added.course_id
+)
+SELECT course_id, array_agg(student_id) FROM detailed GROUP BY course_id
+""")
+
+# Seat changes touch updated_at, which course listing ETags are derived from.
+# The WHERE clause is re-checked against the latest committed row when a concurrent
+# claim holds the lock, so a course can never hand out more than max_students seats
+CLAIM_SEAT_SQL = text("""
+UPDATE courses SET seats_taken = seats_taken + 1, updated_at = now()
+WHERE id = :course_id AND status = 'ACTIVE' AND (max_students IS NULL OR seats_taken < max_students)
+RETURNING seats_taken
+""")
+
+RELEASE_SEAT_SQL = text("""
+UPDATE courses SET seats_taken = seats_taken - 1, updated_at = now() WHERE id = :course_id AND seats_taken > 0
+""")
+
+# Takes the longest-waiting student off the queue and enrolls them; (student_id, enrolled) or no row
+ENROLL_NEXT_WAITING_SQL = text("""
+WITH next AS (
+    DELETE FROM course_waitlist
+    WHERE id = (
+        SELECT id FROM course_waitlist WHERE course_id = :course_id
+        ORDER BY created_at, id LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING course_id, student_id
+),
+enrolled AS (
+    INSERT INTO course_enrollments_detailed (id, course_id, student_id)
+    SELECT gen_random_uuid(), course_id, student_id FROM next
+    ON CONFLICT (course_id, student_id) DO NOTHING
+    RETURNING student_id
+)
+SELECT next.student_id, enrolled.student_id IS NOT NULL FROM next LEFT JOIN enrolled ON true
+""")
+
+class BulkEnrollmentError(ValueError):
+    """Raised when an upload cannot be processed at all, as opposed to individual bad rows"""
+
+def _row_error(line: int, course_code: str, student: str, error: str) -> dict:
+    return {"line": line, "course_code": course_code, "student": student, "error": error}
+
+def read_enrollment_rows(lines: Iterable[str], errors: List[dict]) -> Iterator[Tuple[int, str, str]]:
+    """Yield (line, course code, student) for each usable CSV row.
+
+    The first row is the header: course_code plus student_id, email or student.
+    Rows that cannot be used are appended to errors instead.
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        raise BulkEnrollmentError("CSV file is empty")
+
+    columns = [name.strip().lower() for name in header]
+    student_column = next((name for name in STUDENT_COLUMNS if name in columns), None)
+    if "course_code" not in columns or student_column is None:
+        raise BulkEnrollmentError("CSV header must contain course_code and student_id or email")
+    course_index = columns.index("course_code")
+    student_index = columns.index(student_column)
+
+    rows = 0
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        rows += 1
+        if rows > settings.BULK_ENROLLMENT_MAX_ROWS:
+            raise BulkEnrollmentError(f"At most {settings.BULK_ENROLLMENT_MAX_ROWS} rows can be enrolled per upload")
+
+        line = reader.line_num
+        if len(row) <= max(course_index, student_index):
+            errors.append(_row_error(line, "", "", "Missing column"))
+            continue
+        # Course codes are stored upper case
+        course_code = row[course_index].strip().upper()
+        student = row[student_index].strip()
+        if not course_code or not student:
+            errors.append(_row_error(line, course_code, student, "Missing course code or student"))
+            continue
+        yield line, course_code, student
+
+async def bulk_enroll(db: AsyncSession, lines: Iterable[str]) -> Tuple[dict, Dict[str, List[uuid.UUID]]]:
+    """Enroll the students listed in a CSV in one transaction.
+
+    Rows are streamed into a temporary table with COPY, resolved with one
+    set-based join and inserted into both enrollment tables. Returns the
+    report and {course_id: IDs of the students newly enrolled}.
+    """
+    start = time.perf_counter()
+    errors: List[dict] = []
+
+    # Executing through the session first opens the transaction the COPY then joins
+    await db.execute(CREATE_STAGING_SQL)
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        STAGING_TABLE,
+        records=read_enrollment_rows(lines, errors),
+        columns=["line", "course_code", "student"]
+    )
+
+    # Rows rejected while reading never reach the staging table
+    unreadable = len(errors)
+
+    await db.execute(RESOLVE_SQL)
+    valid, unresolved = (await db.execute(SUMMARY_SQL)).one()
+    result = await db.execute(ERRORS_SQL, {"limit": settings.BULK_ENROLLMENT_MAX_ERRORS})
+    errors.extend(_row_error(*row) for row in result.all())
+
+    result = await db.execute(INSERT_SQL)
+    enrolled_by_course = {str(course_id): list(student_ids) for course_id, student_ids in result.all()}
+    await db.commit()
+
+    enrolled = sum(len(student_ids) for student_ids in enrolled_by_course.values())
+    failed = unreadable + unresolved
+    total_rows = valid + failed
+    elapsed = time.perf_counter() - start
+    errors.sort(key=lambda error: error["line"])
+
+    report = {
+        "total_rows": total_rows,
+        "enrolled": enrolled,
+        "already_enrolled": valid - enrolled,
+        "failed": failed,
+        "errors": errors[:settings.BULK_ENROLLMENT_MAX_ERRORS],
+        "errors_truncated": failed > settings.BULK_ENROLLMENT_MAX_ERRORS,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(total_rows / elapsed, 1) if elapsed > 0 else float(total_rows)
+    }
+    logger.info(
+        f"Bulk enrollment: {total_rows} rows, {enrolled} enrolled, {failed} failed "
+        f"in {elapsed:.2f}s ({report['rows_per_second']} rows/s)"
+    )
+    return report, enrolled_by_course
+
+async def claim_seat(db: AsyncSession, course_id) -> bool:
+    """Take a seat in an active course, inside the caller's transaction; False when none is free.
+
+    Only the course row is locked, and only until the caller commits or rolls back
+    (which gives the seat back).
+    """
+    result = await db.execute(CLAIM_SEAT_SQL, {"course_id": course_id})
+    return result.scalar_one_or_none() is not None
+
+async def release_seat(db: AsyncSession, course_id):
+    await db.execute(RELEASE_SEAT_SQL, {"course_id": course_id})
+
+async def fill_from_waitlist(db: AsyncSession, course_id) -> List[uuid.UUID]:
+    """Enroll waiting students, longest-waiting first, while the course has free seats"""
+    promoted = []
+    while await claim_seat(db, course_id):
+        # Entries of students who meanwhile enrolled themselves are dropped without using the seat
+        row = (await db.execute(ENROLL_NEXT_WAITING_SQL, {"course_id": course_id})).one_or_none()
+        while row is not None and not row[1]:
+            row = (await db.execute(ENROLL_NEXT_WAITING_SQL, {"course_id": course_id})).one_or_none()
+        if row is None:
+            await release_seat(db, course_id)
+            break
+        promoted.append(row[0])
+    return promoted
+
+async def waitlist_position(db: AsyncSession, course_id, student_id) -> Optional[int]:
+    entry = (
+        select(CourseWaitlist.created_at, CourseWaitlist.id)
+        .where(CourseWaitlist.course_id == course_id, CourseWaitlist.student_id == student_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(func.count())
+        .select_from(CourseWaitlist)
+        .join(entry, tuple_(CourseWaitlist.created_at, CourseWaitlist.id) <= tuple_(entry.c.created_at, entry.c.id))
+        .where(CourseWaitlist.course_id == course_id)
+    )
+    position = result.scalar_one()
+    return position or None
+
+async def join_waitlist(db: AsyncSession, course_id, student_id) -> Tuple[Optional[int], List[uuid.UUID]]:
+    """Queue a student for a seat in the caller's transaction.
+
+    Returns their position (None once enrolled) and every student a free seat
+    was handed to, which includes them if the course was not actually full.
+    """
+    await db.execute(
+        insert(CourseWaitlist)
+        .values(course_id=course_id, student_id=student_id)
+        .on_conflict_do_nothing(constraint="uq_course_waitlist_course_student")
+    )
+    promoted = await fill_from_waitlist(db, course_id)
+    if student_id in promoted:
+        return None, promoted
+    return await waitlist_position(db, course_id, student_id), promoted
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def session_channel(session_id) -> str:
+    """Pub/sub channel carrying the live events of one attendance session"""
+    return f"attendance:session:{session_id}"
+
+class Subscription:
+    """A subscriber's bounded mailbox; a full mailbox is dropped and replaced by a resync marker"""
+
+    RESYNC = json.dumps({"type": "resync"})
+
+    def __init__(self, bus: "InMemoryEventBus", channel: str, maxsize: int):
+        self.bus = bus
+        self.channel = channel
+        self.dropped = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, payload: str):
+        """Called by the bus; never blocks the publisher"""
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # The consumer is too slow: discard its backlog and tell it to refetch state
+            self.dropped += self._queue.qsize()
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(self.RESYNC)
+
+    async def get(self) -> str:
+        return await self._queue.get()
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        return await self.get()
+
+class InMemoryEventBus:
+    """Fan-out within a single worker process.
+
+    Messages are serialized to JSON once at publish time and the same text is
+    handed to every subscriber.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        self._subscriptions.clear()
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel, self.queue_size)
+        self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscriptions.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscriptions[subscription.channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self._subscriptions.get(channel, ()))
+
+    def _dispatch(self, channel: str, payload: str):
+        for subscription in tuple(self._subscriptions.get(channel, ())):
+            subscription.deliver(payload)
+
+    async def publish(self, channel: str, message: dict):
+        self._dispatch(channel, json.dumps(message, default=str))
+
+class RedisEventBus(InMemoryEventBus):
+    """Fan-out across gunicorn workers through Redis pub/sub.
+
+    Every worker runs one pattern subscription and dispatches to its local
+    subscribers, so a publish reaches each socket exactly once.
+    """
+
+    PATTERN = "attendance:*"
+
+    def __init__(self, redis_url: str, queue_size: int):
+        super().__init__(queue_size)
+        self.redis_url = redis_url
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(self.redis_url)
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.psubscribe(self.PATTERN)
+        self._listener = asyncio.create_task(self._listen(pubsub))
+        logger.info("✅ Realtime event bus connected to Redis")
+
+    async def _listen(self, pubsub):
+        while True:
+            try:
+                async for raw in pubsub.listen():
+                    if raw.get("type") != "pmessage":
+                        continue
+                    channel = raw["channel"].decode() if isinstance(raw["channel"], bytes) else raw["channel"]
+                    data = raw["data"].decode() if isinstance(raw["data"], bytes) else raw["data"]
+                    self._dispatch(channel, data)
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except Exception as e:
+                logger.error(f"Realtime event bus listener error: {e}")
+                await asyncio.sleep(1)
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        if self._redis:
+            await self._redis.close()
+        await super().close()
+
+    async def publish(self, channel: str, message: dict):
+        payload = json.dumps(message, default=str)
+        try:
+            await self._redis.publish(channel, payload)
+        except Exception as e:
+            # Still reach the sockets on this worker if Redis is briefly unavailable
+            logger.error(f"Failed to publish realtime event: {e}")
+            self._dispatch(channel, payload)
+
+def create_event_bus():
+    if settings.REALTIME_BACKEND == "redis":
+        return RedisEventBus(settings.REDIS_URL, settings.REALTIME_QUEUE_SIZE)
+    return InMemoryEventBus(settings.REALTIME_QUEUE_SIZE)
+
+event_bus = create_event_bus()
+
+async def publish_session_event(session_id, message: dict):
+    """Publish an event to a session channel without letting failures reach the caller"""
+    try:
+        await event_bus.publish(session_channel(session_id), message)
+    except Exception as e:
+        logger.error(f"Failed to publish event for session {session_id}: {e}")
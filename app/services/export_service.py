@@ -0,0 +1,211 @@
+import csv
+import io
+import logging
+import re
+import zipfile
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, Iterable, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from sqlalchemy import select
+
+from app.core import database
+from app.core.config import settings
+from app.models.user import User
+from app.models.course import Course
+from app.models.session import Session
+from app.models.attendance import AttendanceRecord
+
+logger = logging.getLogger(__name__)
+
+EXPORT_HEADERS = (
+    "Course Code", "Course Name", "Session", "Scheduled Start",
+    "Student ID", "Student Name", "Email", "Status", "Check-in Method",
+    "Check-in Time", "Location Verified", "Face Verified", "Face Confidence"
+)
+
+def build_export_query(course_id, date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """Flat row per attendance record; only the exported columns are selected"""
+    query = (
+        select(
+            Course.course_code,
+            Course.course_name,
+            Session.session_name,
+            Session.scheduled_start,
+            User.student_id,
+            User.full_name,
+            User.email,
+            AttendanceRecord.status,
+            AttendanceRecord.check_in_method,
+            AttendanceRecord.check_in_time,
+            AttendanceRecord.location_verified,
+            AttendanceRecord.face_verified,
+            AttendanceRecord.face_confidence
+        )
+        .join(Session, Session.id == AttendanceRecord.session_id)
+        .join(Course, Course.id == Session.course_id)
+        .join(User, User.id == AttendanceRecord.student_id)
+        .where(Session.course_id == course_id)
+        .order_by(Session.scheduled_start, User.full_name, AttendanceRecord.id)
+    )
+    # Records are written after their session starts, so the same bound on created_at
+    # lets the planner skip attendance_records partitions before date_from
+    if date_from:
+        query = query.where(
+            Session.scheduled_start >= date_from,
+            AttendanceRecord.created_at >= date_from - timedelta(days=1)
+        )
+    if date_to:
+        query = query.where(Session.scheduled_start < date_to + timedelta(days=1))
+    return query
+
+async def stream_rows(query) -> AsyncIterator[Sequence[tuple]]:
+    """Yield partitions of rows from a server-side cursor in their own database session"""
+    async with database.AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=settings.EXPORT_CHUNK_ROWS))
+        async for partition in result.partitions():
+            yield partition
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if hasattr(value, "value"):  # Enums
+        return str(value.value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+async def csv_chunks(partitions: AsyncIterator[Sequence[tuple]]) -> AsyncIterator[bytes]:
+    """Encode each partition of rows as one CSV chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADERS)
+
+    async for partition in partitions:
+        writer.writerows([_cell_text(value) for value in row] for row in partition)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+class _ChunkSink:
+    """Write-only, unseekable file for zipfile; the caller drains what was written so far.
+
+    Without tell()/seek() zipfile writes local headers with data descriptors, so
+    nothing already sent ever has to be patched.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+# Characters XML 1.0 does not allow, even escaped
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+_COLUMN_LETTERS = [_column_letter(i) for i in range(len(EXPORT_HEADERS))]
+
+def _xlsx_row(row_number: int, values: Iterable) -> str:
+    cells = []
+    for letter, value in zip(_COLUMN_LETTERS, values):
+        if value is None:
+            continue
+        ref = f"{letter}{row_number}"
+        if isinstance(value, bool):
+            cells.append(f'<c r="{ref}" t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, (int, float)):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            text = escape(_INVALID_XML_CHARS.sub("", _cell_text(value)))
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t>{text}</t></is></c>')
+    return f'<row r="{row_number}">{"".join(cells)}</row>'
+
+_XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Attendance" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+async def xlsx_chunks(partitions: AsyncIterator[Sequence[tuple]]) -> AsyncIterator[bytes]:
+    """Write a single-sheet workbook row by row, yielding compressed bytes as they are produced"""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            workbook.writestr(name, content)
+
+        # Sheet size is unknown up front, so always allow ZIP64 sizes
+        with workbook.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(1, EXPORT_HEADERS).encode("utf-8"))
+            row_number = 1
+            async for partition in partitions:
+                lines = []
+                for row in partition:
+                    row_number += 1
+                    lines.append(_xlsx_row(row_number, row))
+                sheet.write("".join(lines).encode("utf-8"))
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+            sheet.write(b"</sheetData></worksheet>")
+
+    yield sink.drain()
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", csv_chunks),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", xlsx_chunks),
+}
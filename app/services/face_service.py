@@ -0,0 +1,168 @@
+import asyncio
+import json
+import logging
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class FaceMatchResult:
+    """Outcome of comparing a live embedding with an enrolled one"""
+
+    __slots__ = ("verified", "distance", "confidence")
+
+    def __init__(self, verified: bool, distance: float, confidence: float):
+        self.verified = verified
+        self.distance = distance
+        self.confidence = confidence
+
+    def __repr__(self):
+        return f"<FaceMatchResult verified={self.verified} confidence={self.confidence:.3f}>"
+
+# Binary embedding layout: 8-byte header followed by little-endian float32 values.
+# The header size keeps the payload 4-byte aligned for np.frombuffer.
+EMBEDDING_MAGIC = b"FE"
+EMBEDDING_VERSION = 1
+EMBEDDING_DTYPE_FLOAT32 = 1
+EMBEDDING_HEADER = struct.Struct("<2sBBI")  # magic, version, dtype, dimension
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+def encode_embedding(vector) -> bytes:
+    """Serialize an embedding to the versioned binary column format"""
+    array = np.ascontiguousarray(vector, dtype=EMBEDDING_DTYPE)
+    if array.ndim != 1 or array.size == 0:
+        raise ValueError("Face encoding must be a non-empty flat vector")
+    header = EMBEDDING_HEADER.pack(EMBEDDING_MAGIC, EMBEDDING_VERSION, EMBEDDING_DTYPE_FLOAT32, array.size)
+    return header + array.tobytes()
+
+def decode_embedding(data) -> np.ndarray:
+    """View a binary embedding as a read-only float32 array without copying"""
+    if len(data) < EMBEDDING_HEADER.size:
+        raise ValueError("Face encoding is truncated")
+
+    magic, version, dtype, dimension = EMBEDDING_HEADER.unpack_from(data)
+    if magic != EMBEDDING_MAGIC or version != EMBEDDING_VERSION or dtype != EMBEDDING_DTYPE_FLOAT32:
+        raise ValueError("Unsupported face encoding format")
+    if len(data) != EMBEDDING_HEADER.size + dimension * EMBEDDING_DTYPE.itemsize:
+        raise ValueError("Face encoding length does not match its header")
+
+    return np.frombuffer(data, dtype=EMBEDDING_DTYPE, count=dimension, offset=EMBEDDING_HEADER.size)
+
+def parse_face_encoding(encoding) -> Optional[np.ndarray]:
+    """Load a stored or submitted embedding as a float32 vector"""
+    if encoding is None:
+        return None
+
+    if isinstance(encoding, (bytes, bytearray, memoryview)):
+        vector = decode_embedding(encoding)
+    elif isinstance(encoding, np.ndarray):
+        vector = encoding.astype(np.float32, copy=False)
+    elif isinstance(encoding, (list, tuple)):
+        vector = np.asarray(encoding, dtype=np.float32)
+    else:
+        text = encoding.strip()
+        if not text:
+            return None
+        if text.startswith("["):
+            vector = np.asarray(json.loads(text), dtype=np.float32)
+        else:
+            vector = np.array(text.replace(",", " ").split(), dtype=np.float32)
+
+    if vector.ndim != 1 or vector.size == 0:
+        raise ValueError("Face encoding must be a non-empty flat vector")
+    return vector
+
+def face_distances(probes: np.ndarray, enrolled: np.ndarray) -> np.ndarray:
+    """Row-wise Euclidean distance between two (n, d) float32 matrices"""
+    diff = probes - enrolled
+    return np.sqrt(np.einsum("ij,ij->i", diff, diff))
+
+def distances_to_confidence(distances: np.ndarray, tolerance: float) -> np.ndarray:
+    """Map distances to [0, 1]; a distance equal to the tolerance scores 0.5"""
+    return np.clip(1.0 - distances / (2.0 * tolerance), 0.0, 1.0)
+
+def _match_batch(
+    probes: Sequence[np.ndarray],
+    enrolled: Sequence[np.ndarray],
+    tolerance: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Compare a whole batch in one matrix operation (runs in the executor)"""
+    distances = face_distances(np.stack(probes), np.stack(enrolled))
+    return distances, distances_to_confidence(distances, tolerance)
+
+class FaceVerificationBatcher:
+    """Coalesces concurrent verifications for one session into a single matrix operation"""
+
+    def __init__(self, window_seconds: float, max_batch: int, tolerance: float):
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.tolerance = tolerance
+        self._pending: Dict[Tuple[str, int], List[Tuple[np.ndarray, np.ndarray, asyncio.Future]]] = {}
+
+    async def verify(self, session_id, probe: np.ndarray, enrolled: np.ndarray) -> FaceMatchResult:
+        """Queue a comparison and wait for its batch to be evaluated"""
+        if probe.shape != enrolled.shape:
+            raise ValueError("Face encoding does not match the enrolled encoding size")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        # Batches are keyed by dimension too, so 128-d and 512-d models never share a matrix
+        key = (str(session_id), probe.shape[0])
+        batch = self._pending.setdefault(key, [])
+        batch.append((probe, enrolled, future))
+
+        if len(batch) >= self.max_batch:
+            self._flush(key)
+        elif len(batch) == 1:
+            loop.call_later(self.window_seconds, self._flush, key)
+
+        return await future
+
+    def _flush(self, key):
+        batch = self._pending.pop(key, None)
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            distances, confidences = await loop.run_in_executor(
+                None,
+                _match_batch,
+                [probe for probe, _, _ in batch],
+                [enrolled for _, enrolled, _ in batch],
+                self.tolerance
+            )
+        except Exception as e:
+            logger.error(f"Face verification batch failed: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), distance, confidence in zip(batch, distances, confidences):
+            if not future.done():
+                future.set_result(FaceMatchResult(
+                    verified=bool(distance <= self.tolerance),
+                    distance=float(distance),
+                    confidence=float(confidence)
+                ))
+
+face_batcher = FaceVerificationBatcher(
+    window_seconds=settings.FACE_BATCH_WINDOW_MS / 1000,
+    max_batch=settings.FACE_BATCH_MAX_SIZE,
+    tolerance=settings.FACE_MATCH_TOLERANCE
+)
+
+async def verify_face(session_id, probe_encoding, enrolled_encoding) -> Optional[FaceMatchResult]:
+    """Verify a live embedding against a student's enrolled one; None if either is missing"""
+    probe = parse_face_encoding(probe_encoding)
+    enrolled = parse_face_encoding(enrolled_encoding)
+    if probe is None or enrolled is None:
+        return None
+    return await face_batcher.verify(session_id, probe, enrolled)
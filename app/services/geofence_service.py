@@ -0,0 +1,189 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.course import Course
+from app.models.session import Session
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_METERS = 6371008.8
+
+# Below this radius the equirectangular projection is accurate to well under a meter
+EQUIRECTANGULAR_MAX_RADIUS_METERS = 10000
+
+class Geofence:
+    """A circular fence with its trigonometry and bounding box computed once"""
+
+    __slots__ = (
+        "course_id", "latitude", "longitude", "radius",
+        "_lat_rad", "_lon_rad", "_cos_lat", "_radius_sq",
+        "_lat_span", "_lon_span", "_use_haversine"
+    )
+
+    def __init__(self, latitude: float, longitude: float, radius: float, course_id: Optional[uuid.UUID] = None):
+        self.course_id = course_id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.radius = radius
+
+        self._lat_rad = math.radians(latitude)
+        self._lon_rad = math.radians(longitude)
+        self._cos_lat = math.cos(self._lat_rad)
+        self._radius_sq = radius * radius
+
+        # Bounding box half-widths in degrees, used to reject far-away points cheaply
+        self._lat_span = math.degrees(radius / EARTH_RADIUS_METERS)
+        if self._cos_lat > 1e-9:
+            self._lon_span = min(180.0, math.degrees(radius / (EARTH_RADIUS_METERS * self._cos_lat)))
+        else:
+            self._lon_span = 180.0
+        self._use_haversine = radius > EQUIRECTANGULAR_MAX_RADIUS_METERS
+
+    def distance_to(self, latitude: float, longitude: float) -> float:
+        """Distance in meters from the fence center"""
+        lat_rad = math.radians(latitude)
+        dlat = lat_rad - self._lat_rad
+        dlon = math.radians(_wrap_longitude(longitude - self.longitude))
+
+        if self._use_haversine:
+            a = math.sin(dlat / 2) ** 2 + self._cos_lat * math.cos(lat_rad) * math.sin(dlon / 2) ** 2
+            return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
+
+        x = dlon * self._cos_lat
+        return EARTH_RADIUS_METERS * math.sqrt(x * x + dlat * dlat)
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        """Check whether a point lies inside the fence"""
+        if abs(latitude - self.latitude) > self._lat_span:
+            return False
+        dlon_deg = _wrap_longitude(longitude - self.longitude)
+        if abs(dlon_deg) > self._lon_span:
+            return False
+
+        if self._use_haversine:
+            return self.distance_to(latitude, longitude) <= self.radius
+
+        # Compare squared distances so the common path avoids the square root
+        dlat = math.radians(latitude) - self._lat_rad
+        x = math.radians(dlon_deg) * self._cos_lat
+        return (x * x + dlat * dlat) * EARTH_RADIUS_METERS * EARTH_RADIUS_METERS <= self._radius_sq
+
+    def __repr__(self):
+        return f"<Geofence ({self.latitude}, {self.longitude}) r={self.radius}m>"
+
+def _wrap_longitude(delta: float) -> float:
+    """Normalize a longitude difference into [-180, 180)"""
+    if -180.0 <= delta < 180.0:
+        return delta
+    return (delta + 180.0) % 360.0 - 180.0
+
+class GeofenceCache:
+    """LRU cache of pre-parsed fences keyed by session ID"""
+
+    # Stored for sessions that have no fence so they are not looked up again
+    _NO_FENCE = object()
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+
+    def get(self, session_id) -> Tuple[bool, Optional[Geofence]]:
+        """Return (hit, fence) for a session"""
+        key = str(session_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, None if value is self._NO_FENCE else value
+
+    def put(self, session_id, fence: Optional[Geofence]):
+        key = str(session_id)
+        self._entries[key] = (
+            time.monotonic() + self.ttl_seconds,
+            self._NO_FENCE if fence is None else fence
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, session_id):
+        self._entries.pop(str(session_id), None)
+
+    def invalidate_course(self, course_id):
+        """Drop the fences of every cached session belonging to a course"""
+        stale = [
+            key for key, (_, value) in self._entries.items()
+            if value is not self._NO_FENCE and value.course_id == course_id
+        ]
+        for key in stale:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+geofence_cache = GeofenceCache(settings.GEOFENCE_CACHE_SIZE, settings.GEOFENCE_CACHE_TTL_SECONDS)
+
+def build_geofence(
+    session_latitude: Optional[float],
+    session_longitude: Optional[float],
+    course_id: Optional[uuid.UUID],
+    geofence_enabled: Optional[bool],
+    course_latitude: Optional[float],
+    course_longitude: Optional[float],
+    radius: Optional[int]
+) -> Optional[Geofence]:
+    """Build the effective fence for a session; session coordinates override the course"""
+    if session_latitude is not None and session_longitude is not None:
+        latitude, longitude = session_latitude, session_longitude
+    elif geofence_enabled and course_latitude is not None and course_longitude is not None:
+        latitude, longitude = course_latitude, course_longitude
+    else:
+        return None
+
+    return Geofence(latitude, longitude, radius or 100, course_id=course_id)
+
+async def get_session_geofence(db: AsyncSession, session_id) -> Optional[Geofence]:
+    """Get the fence for a session, loading and parsing it only on a cache miss"""
+    hit, fence = geofence_cache.get(session_id)
+    if hit:
+        return fence
+
+    result = await db.execute(
+        select(
+            Session.latitude, Session.longitude, Session.course_id,
+            Course.geofence_enabled, Course.geofence_latitude,
+            Course.geofence_longitude, Course.geofence_radius
+        )
+        .join(Course, Course.id == Session.course_id)
+        .where(Session.id == session_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+
+    fence = build_geofence(*row)
+    geofence_cache.put(session_id, fence)
+    return fence
+
+def verify_location(fence: Optional[Geofence], latitude: Optional[float], longitude: Optional[float]) -> bool:
+    """Check a reported position against a fence; missing data never verifies"""
+    if fence is None or latitude is None or longitude is None:
+        return False
+    if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0):
+        return False
+    return fence.contains(latitude, longitude)
@@ -0,0 +1,110 @@
+import logging
+import random
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.user import UserRole, UserStatus
+from app.models.course import CourseStatus
+from app.models.attendance import AttendanceStatus
+from app.models.metrics import MetricCounter
+
+logger = logging.getLogger(__name__)
+
+# Metric names and what their dimension holds
+METRIC_USERS = "users"                      # "<role>:<status>"
+METRIC_COURSES = "courses"                  # course status
+METRIC_ACTIVE_SESSIONS = "active_sessions"  # always ""
+METRIC_CHECKINS = "checkins"                # UTC date of the check-in, YYYY-MM-DD
+METRIC_ATTENDANCE = "attendance"            # attendance record status
+
+ATTENDED_STATUSES = (AttendanceStatus.PRESENT, AttendanceStatus.LATE)
+
+CounterDeltas = Dict[Tuple[str, str], int]
+
+def user_dimension(role: UserRole, user_status: Optional[UserStatus]) -> str:
+    return f"{role.value}:{(user_status or UserStatus.PENDING).value}"
+
+def checkin_dimension(day: date = None) -> str:
+    return (day or datetime.now(timezone.utc).date()).isoformat()
+
+async def increment_counters(db: AsyncSession, deltas: CounterDeltas):
+    """Add deltas to the counters in one upsert, inside the caller's transaction"""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    # One shard per transaction, rows in a stable order so concurrent writers cannot deadlock
+    shard = random.randrange(settings.METRIC_COUNTER_SHARDS)
+    rows = [
+        {"metric": metric, "dimension": dimension, "shard": shard, "value": delta}
+        for (metric, dimension), delta in sorted(deltas.items())
+    ]
+    statement = insert(MetricCounter).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[MetricCounter.metric, MetricCounter.dimension, MetricCounter.shard],
+        set_={"value": MetricCounter.value + statement.excluded.value, "updated_at": func.now()}
+    )
+    await db.execute(statement)
+
+async def record_user_change(
+    db: AsyncSession,
+    role: UserRole,
+    previous: Optional[UserStatus],
+    current: Optional[UserStatus]
+):
+    """Count a new user (previous None) or a status change"""
+    deltas: CounterDeltas = defaultdict(int)
+    if previous is not None:
+        deltas[(METRIC_USERS, user_dimension(role, previous))] -= 1
+    if current is not None:
+        deltas[(METRIC_USERS, user_dimension(role, current))] += 1
+    await increment_counters(db, deltas)
+
+async def record_course_change(db: AsyncSession, previous: Optional[CourseStatus], current: Optional[CourseStatus]):
+    deltas: CounterDeltas = defaultdict(int)
+    if previous is not None:
+        deltas[(METRIC_COURSES, previous.value)] -= 1
+    if current is not None:
+        deltas[(METRIC_COURSES, current.value)] += 1
+    await increment_counters(db, deltas)
+
+async def record_active_sessions(db: AsyncSession, delta: int):
+    await increment_counters(db, {(METRIC_ACTIVE_SESSIONS, ""): delta})
+
+async def record_attendance_changes(db: AsyncSession, changes: Iterable[Tuple[object, Optional[AttendanceStatus], AttendanceStatus]]):
+    """Count record status changes and today's check-ins.
+
+    A change into PRESENT or LATE is a check-in for today; a correction out of
+    them takes it back.
+    """
+    deltas: CounterDeltas = defaultdict(int)
+    today = checkin_dimension()
+    for _, previous, current in changes:
+        if previous == current:
+            continue
+        if previous is not None:
+            deltas[(METRIC_ATTENDANCE, previous.value)] -= 1
+        deltas[(METRIC_ATTENDANCE, current.value)] += 1
+        attended_before = previous in ATTENDED_STATUSES
+        attended_now = current in ATTENDED_STATUSES
+        if attended_now != attended_before:
+            deltas[(METRIC_CHECKINS, today)] += 1 if attended_now else -1
+    await increment_counters(db, deltas)
+
+async def read_counters(db: AsyncSession, *metrics: str) -> Dict[str, Dict[str, int]]:
+    """Sum the shards of the given metrics; returns {metric: {dimension: value}}"""
+    result = await db.execute(
+        select(MetricCounter.metric, MetricCounter.dimension, func.sum(MetricCounter.value))
+        .where(MetricCounter.metric.in_(metrics))
+        .group_by(MetricCounter.metric, MetricCounter.dimension)
+    )
+    counters: Dict[str, Dict[str, int]] = {metric: {} for metric in metrics}
+    for metric, dimension, value in result.all():
+        counters[metric][dimension] = int(value)
+    return counters
@@ -0,0 +1,84 @@
+import base64
+import hashlib
+import hmac
+import json
+from typing import AsyncIterator, Optional, Tuple
+import uuid
+
+from app.core.config import settings
+
+# Devices sign queued check-ins with a per-user key derived from this one, so the
+# server can verify events without storing device secrets
+_OFFLINE_KEY = hmac.new(settings.SECRET_KEY.encode(), b"attendease-offline-checkin", hashlib.sha256).digest()
+
+# Fields covered by an event signature, in order
+SIGNED_FIELDS = (
+    "event_id", "session_id", "student_id", "occurred_at", "check_in_method", "latitude", "longitude", "qr_token"
+)
+
+class OfflineEventError(ValueError):
+    """Raised when a queued check-in event is malformed or its signature does not match"""
+
+def device_key(user_id: uuid.UUID) -> bytes:
+    """Signing key handed to the user's devices while they are online"""
+    return hmac.new(_OFFLINE_KEY, user_id.bytes, hashlib.sha256).digest()
+
+def encode_device_key(user_id: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(device_key(user_id)).rstrip(b"=").decode()
+
+def signing_message(event: dict) -> bytes:
+    """Canonical text of an event: the signed fields exactly as sent, joined by newlines"""
+    values = []
+    for field in SIGNED_FIELDS:
+        value = event.get(field)
+        values.append("" if value is None else str(value))
+    return "\n".join(values).encode("utf-8")
+
+def verify_event_signature(event: dict, user_id: uuid.UUID):
+    signature = event.get("signature")
+    if not isinstance(signature, str):
+        raise OfflineEventError("Event is not signed")
+    expected = hmac.new(device_key(user_id), signing_message(event), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(signature.lower(), expected):
+        raise OfflineEventError("Invalid event signature")
+
+def _parse_line(line: bytes) -> Tuple[Optional[dict], Optional[str]]:
+    if len(line) > settings.OFFLINE_SYNC_MAX_LINE_BYTES:
+        return None, "Event is too large"
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None, "Malformed JSON"
+    if not isinstance(event, dict):
+        return None, "Event must be a JSON object"
+    return event, None
+
+async def read_event_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Parse a JSON lines body as it arrives; yields (line number, event, error) per non-blank line"""
+    buffer = b""
+    oversized = False  # Discarding the rest of a line that is already too long
+    index = 0
+
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if oversized:
+                oversized = False
+                continue
+            line = line.strip()
+            if line:
+                index += 1
+                yield (index, *_parse_line(line))
+
+        if not oversized and len(buffer) > settings.OFFLINE_SYNC_MAX_LINE_BYTES:
+            index += 1
+            yield index, None, "Event is too large"
+            oversized = True
+        if oversized:
+            buffer = b""
+
+    line = buffer.strip()
+    if line and not oversized:
+        index += 1
+        yield (index, *_parse_line(line))
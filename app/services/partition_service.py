@@ -0,0 +1,165 @@
+import logging
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text, true
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.models.attendance import AttendanceRecord
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "attendance_records"
+# Catches rows no monthly partition covers yet, so inserts never fail for lack of one
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{PARENT_TABLE}_p(\d{{4}})(\d{{2}})$")
+
+# created_at is set by the database clock; allow for drift against the app clock
+RECORD_CLOCK_MARGIN = timedelta(days=1)
+
+def records_created_since(started_at: Optional[datetime]):
+    """Lower bound on a session's record timestamps so the planner can skip older partitions.
+
+    Records of a session are only written once attendance has been opened, so
+    this never excludes a real match.
+    """
+    if started_at is None:
+        return true()
+    return AttendanceRecord.created_at >= started_at - RECORD_CLOCK_MARGIN
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def month_bounds(month: date) -> Tuple[datetime, datetime]:
+    """UTC range of one calendar month, as partition bounds use"""
+    end = add_months(month, 1)
+    return (
+        datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+        datetime(end.year, end.month, 1, tzinfo=timezone.utc)
+    )
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month.year:04d}{month.month:02d}"
+
+def partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    result = await conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+        {"table": PARENT_TABLE}
+    )
+    return result.first() is not None
+
+async def ensure_default_partition(conn: AsyncConnection) -> bool:
+    """Create the DEFAULT partition; returns False if it existed"""
+    exists = await conn.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION})
+    if exists.scalar() is not None:
+        return False
+
+    await conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+    logger.info(f"Created partition {DEFAULT_PARTITION}")
+    return True
+
+async def create_month_partition(conn: AsyncConnection, month: date) -> bool:
+    """Create the partition holding one calendar month (UTC); returns False if it existed.
+
+    Rows of that month already in the DEFAULT partition (written while maintenance
+    was not running) are moved into the new partition, which is then attached.
+    """
+    name = partition_name(month)
+    exists = await conn.execute(text("SELECT to_regclass(:name)"), {"name": name})
+    if exists.scalar() is not None:
+        return False
+
+    start, end = month_bounds(month)
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+    stray = None
+    if (await conn.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION})).scalar() is not None:
+        stray = (await conn.execute(
+            text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end LIMIT 1"),
+            {"start": start, "end": end}
+        )).first()
+
+    if stray is None:
+        await conn.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} FOR VALUES {bounds}"))
+        logger.info(f"Created partition {name}")
+        return True
+
+    # A new partition cannot overlap rows still in the DEFAULT partition
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    result = await conn.execute(text(
+        f"WITH moved AS ("
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end RETURNING *"
+        f") INSERT INTO {name} SELECT * FROM moved"
+    ), {"start": start, "end": end})
+    await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    logger.warning(f"Created partition {name} with {result.rowcount} rows moved from {DEFAULT_PARTITION}")
+    return True
+
+async def ensure_partitions(
+    conn: AsyncConnection, months_ahead: int = None, since: date = None, until: date = None
+) -> List[str]:
+    """Make sure monthly partitions exist from `since` (default: this month) through
+    months_ahead, or through `until` if that is later, plus the DEFAULT partition"""
+    if not await is_partitioned(conn):
+        return []
+
+    created = []
+    if await ensure_default_partition(conn):
+        created.append(DEFAULT_PARTITION)
+
+    months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(datetime.now(timezone.utc).date())
+    month = month_start(since) if since else current
+    last = add_months(current, months_ahead)
+    if until and month_start(until) > last:
+        last = month_start(until)
+
+    while month <= last:
+        if await create_month_partition(conn, month):
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+async def list_partitions(conn: AsyncConnection) -> List[Tuple[str, date]]:
+    """Attached monthly partitions, oldest first"""
+    result = await conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+    """), {"table": PARENT_TABLE})
+    partitions = [(name, partition_month(name)) for name in result.scalars().all()]
+    return sorted((item for item in partitions if item[1] is not None), key=lambda item: item[1])
+
+async def drop_empty_partitions_before(conn: AsyncConnection, cutoff: date) -> List[str]:
+    """Drop monthly partitions that end on or before cutoff and hold no rows.
+
+    Old attendance leaves the live table through the archive job
+    (app.jobs.archive), which keeps it readable and counted in rollups; this
+    only retires the partitions it has emptied. A partition still holding rows
+    is kept.
+    """
+    dropped = []
+    for name, month in await list_partitions(conn):
+        if add_months(month, 1) > cutoff:
+            break
+        # Block writers while checking, so a row cannot arrive between the check and the drop
+        await conn.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+        if (await conn.execute(text(f"SELECT 1 FROM {name} LIMIT 1"))).first() is not None:
+            logger.warning(f"Kept partition {name}: it still has rows, run the archive job first")
+            continue
+        await conn.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+        logger.info(f"Dropped empty partition {name}")
+    return dropped
@@ -0,0 +1,60 @@
+import base64
+import hashlib
+import hmac
+import struct
+import time
+from typing import Optional, Tuple
+import uuid
+
+from app.core.config import settings
+
+# Token layout: 16-byte session UUID, 8-byte time slot, truncated HMAC-SHA256
+_PAYLOAD = struct.Struct(">16sQ")
+_MAC_BYTES = 16
+_TOKEN_BYTES = _PAYLOAD.size + _MAC_BYTES
+
+# A dedicated key so QR signatures can never be confused with JWT signatures
+_QR_KEY = hmac.new(settings.SECRET_KEY.encode(), b"attendease-qr-checkin", hashlib.sha256).digest()
+
+class QRTokenError(ValueError):
+    """Raised when a QR check-in token is malformed, forged or expired"""
+
+def current_slot(now: Optional[float] = None) -> int:
+    return int((time.time() if now is None else now) // settings.QR_ROTATION_SECONDS)
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(_QR_KEY, payload, hashlib.sha256).digest()[:_MAC_BYTES]
+
+def issue_qr_token(session_id: uuid.UUID, now: Optional[float] = None) -> Tuple[str, int]:
+    """Create the token shown on the lecturer screen; returns (token, seconds until rotation)"""
+    now = time.time() if now is None else now
+    slot = current_slot(now)
+    payload = _PAYLOAD.pack(session_id.bytes, slot)
+    token = base64.urlsafe_b64encode(payload + _sign(payload)).rstrip(b"=").decode()
+    expires_in = int((slot + 1) * settings.QR_ROTATION_SECONDS - now) or settings.QR_ROTATION_SECONDS
+    return token, expires_in
+
+def verify_qr_token(token: str, now: Optional[float] = None, skew_slots: Optional[int] = None) -> uuid.UUID:
+    """Check a scanned token without touching the database; returns its session ID.
+
+    `now` is when it was scanned (default: the current time) and skew_slots how
+    many neighbouring slots still count (default: QR_CLOCK_SKEW_SLOTS).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, TypeError):
+        raise QRTokenError("Malformed QR code")
+
+    if len(raw) != _TOKEN_BYTES:
+        raise QRTokenError("Malformed QR code")
+
+    payload, mac = raw[:_PAYLOAD.size], raw[_PAYLOAD.size:]
+    if not hmac.compare_digest(mac, _sign(payload)):
+        raise QRTokenError("Invalid QR code")
+
+    session_bytes, slot = _PAYLOAD.unpack(payload)
+    skew_slots = settings.QR_CLOCK_SKEW_SLOTS if skew_slots is None else skew_slots
+    if abs(current_slot(now) - slot) > skew_slots:
+        raise QRTokenError("QR code has expired")
+
+    return uuid.UUID(bytes=session_bytes)
@@ -0,0 +1,111 @@
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+import uuid
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.attendance import AttendanceRollup, AttendanceStatus
+from app.services.metrics_service import record_attendance_changes
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLUMNS = {
+    AttendanceStatus.PRESENT: "present_count",
+    AttendanceStatus.LATE: "late_count",
+    AttendanceStatus.ABSENT: "absent_count",
+    AttendanceStatus.EXCUSED: "excused_count",
+}
+
+# (student_id, previous status or None for a new record, new status)
+RollupChange = Tuple[object, Optional[AttendanceStatus], AttendanceStatus]
+
+def _course_lock_key(course_id) -> int:
+    """Signed 64-bit advisory lock key for a course"""
+    return (uuid.UUID(str(course_id)).int >> 64) - (1 << 63)
+
+def _collect_deltas(changes: Iterable[RollupChange]) -> Dict[object, Dict[str, int]]:
+    deltas: Dict[object, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(ROLLUP_COLUMNS.values(), 0))
+    for student_id, previous, current in changes:
+        if previous == current:
+            continue
+        if previous is not None:
+            deltas[student_id][ROLLUP_COLUMNS[previous]] -= 1
+        deltas[student_id][ROLLUP_COLUMNS[current]] += 1
+    return deltas
+
+async def apply_rollup_changes(db: AsyncSession, course_id, changes: Iterable[RollupChange]):
+    """Add record status changes to the course rollups in one upsert.
+
+    Runs inside the caller's transaction so the rollups commit (or roll back)
+    together with the attendance records they count. Every record write goes
+    through here, so the campus-wide attendance counters are kept here too.
+    """
+    changes = list(changes)
+    deltas = _collect_deltas(changes)
+    if not deltas:
+        return
+
+    # Writers share the course lock; only a rebuild of the same course takes it exclusively
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock_shared(:key)"),
+        {"key": _course_lock_key(course_id)}
+    )
+
+    # Lock rows in a stable order so concurrent bulk writes cannot deadlock
+    rows = [
+        {"course_id": course_id, "student_id": student_id, **counts}
+        for student_id, counts in sorted(deltas.items(), key=lambda item: str(item[0]))
+    ]
+    statement = insert(AttendanceRollup).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[AttendanceRollup.course_id, AttendanceRollup.student_id],
+        set_={
+            column: getattr(AttendanceRollup, column) + getattr(statement.excluded, column)
+            for column in ROLLUP_COLUMNS.values()
+        } | {"updated_at": func.now()}
+    )
+    await db.execute(statement)
+
+    await record_attendance_changes(db, changes)
+
+async def get_student_rollups(db: AsyncSession, student_id):
+    result = await db.execute(select(AttendanceRollup).where(AttendanceRollup.student_id == student_id))
+    return result.scalars().all()
+
+async def get_course_rollups(db: AsyncSession, course_id):
+    result = await db.execute(select(AttendanceRollup).where(AttendanceRollup.course_id == course_id))
+    return result.scalars().all()
+
+REBUILD_SQL = """
+INSERT INTO attendance_rollups (
+    course_id, student_id, present_count, late_count, absent_count, excused_count, updated_at
+)
+SELECT s.course_id, r.student_id,
+       COUNT(*) FILTER (WHERE r.status = 'PRESENT'),
+       COUNT(*) FILTER (WHERE r.status = 'LATE'),
+       COUNT(*) FILTER (WHERE r.status = 'ABSENT'),
+       COUNT(*) FILTER (WHERE r.status = 'EXCUSED'),
+       now()
+FROM (
+    SELECT session_id, student_id, status FROM attendance_records
+    UNION ALL
+    SELECT session_id, student_id, status FROM archived_attendance_records
+) r
+JOIN sessions s ON s.id = r.session_id
+WHERE s.course_id = :course_id
+GROUP BY s.course_id, r.student_id
+"""
+
+async def rebuild_course_rollups(db: AsyncSession, course_id) -> int:
+    """Recount one course's rollups from live and archived records; the caller commits"""
+    # Wait for in-flight writers and hold new ones off until the rebuild commits
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(:key)"),
+        {"key": _course_lock_key(course_id)}
+    )
+    await db.execute(delete(AttendanceRollup).where(AttendanceRollup.course_id == course_id))
+    result = await db.execute(text(REBUILD_SQL), {"course_id": course_id})
+    return result.rowcount
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+import uuid
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.user import User
+from app.models.course import CourseEnrollment
+from app.services.face_service import decode_embedding, distances_to_confidence
+
+logger = logging.getLogger(__name__)
+
+class IVFIndex:
+    """Inverted-file approximate nearest-neighbor index over a roster matrix"""
+
+    def __init__(self, matrix: np.ndarray, nlist: int, iterations: int = 8, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        nlist = max(1, min(nlist, matrix.shape[0]))
+        centroids = matrix[rng.choice(matrix.shape[0], nlist, replace=False)].copy()
+
+        # A few rounds of k-means are enough for a coarse quantizer
+        for _ in range(iterations):
+            assignments = self._nearest(matrix, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, matrix)
+            counts = np.bincount(assignments, minlength=nlist)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        assignments = self._nearest(matrix, centroids)
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(nlist + 1))
+
+        self.centroids = centroids
+        self.centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+        self.order = order.astype(np.int32)
+        self.bounds = bounds
+
+    @staticmethod
+    def _nearest(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        scores = matrix @ centroids.T
+        scores -= 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+        return np.argmax(scores, axis=1)
+
+    def candidates(self, probe: np.ndarray, nprobe: int) -> np.ndarray:
+        """Row indices in the nprobe lists closest to the probe"""
+        scores = self.centroids @ probe - 0.5 * self.centroid_norms
+        nprobe = min(nprobe, len(scores))
+        lists = np.argpartition(-scores, nprobe - 1)[:nprobe]
+        return np.concatenate([self.order[self.bounds[i]:self.bounds[i + 1]] for i in lists])
+
+    @property
+    def nbytes(self) -> int:
+        return self.centroids.nbytes + self.centroid_norms.nbytes + self.order.nbytes + self.bounds.nbytes
+
+class RosterIndex:
+    """Contiguous embedding matrix of every enrolled student with a registered face"""
+
+    def __init__(self, course_id, student_ids: List[uuid.UUID], matrix: np.ndarray):
+        self.course_id = course_id
+        self.student_ids = student_ids
+        self.matrix = matrix
+        self.row_norms = np.einsum("ij,ij->i", matrix, matrix)
+        self.ann: Optional[IVFIndex] = None
+        if len(student_ids) >= settings.ROSTER_ANN_MIN_SIZE:
+            self.ann = IVFIndex(matrix, nlist=int(np.sqrt(len(student_ids))))
+
+    @property
+    def dimension(self) -> int:
+        return self.matrix.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + self.row_norms.nbytes + (self.ann.nbytes if self.ann else 0)
+
+    def identify(self, probe: np.ndarray) -> Optional[Tuple[uuid.UUID, float]]:
+        """Return (student_id, distance) of the closest enrolled embedding"""
+        if not self.student_ids:
+            return None
+        if probe.shape != (self.dimension,):
+            raise ValueError("Face encoding does not match the roster encoding size")
+
+        if self.ann is not None:
+            rows = self.ann.candidates(probe, settings.ROSTER_ANN_NPROBE)
+            if rows.size == 0:
+                return None
+            squared = self.row_norms[rows] - 2.0 * (self.matrix[rows] @ probe)
+            best = int(np.argmin(squared))
+            row = int(rows[best])
+        else:
+            # ||e||^2 - 2 e.p is enough to rank; ||p||^2 is added back for the best row only
+            squared = self.row_norms - 2.0 * (self.matrix @ probe)
+            row = best = int(np.argmin(squared))
+
+        distance = float(np.sqrt(max(0.0, squared[best] + float(probe @ probe))))
+        return self.student_ids[row], distance
+
+def build_roster_index(course_id, rows: List[Tuple[uuid.UUID, bytes]]) -> RosterIndex:
+    """Decode stored embeddings into one contiguous matrix (runs in the executor)"""
+    vectors: List[Tuple[uuid.UUID, np.ndarray]] = []
+    for student_id, data in rows:
+        try:
+            vectors.append((student_id, decode_embedding(data)))
+        except ValueError as e:
+            logger.warning(f"Skipping unreadable face encoding for {student_id}: {e}")
+
+    if not vectors:
+        return RosterIndex(course_id, [], np.empty((0, 0), dtype=np.float32))
+
+    # Rosters should share one model; keep the most common dimension if they don't
+    dimensions = np.bincount([vector.shape[0] for _, vector in vectors])
+    dimension = int(np.argmax(dimensions))
+    vectors = [(student_id, vector) for student_id, vector in vectors if vector.shape[0] == dimension]
+
+    matrix = np.empty((len(vectors), dimension), dtype=np.float32)
+    for i, (_, vector) in enumerate(vectors):
+        matrix[i] = vector
+    return RosterIndex(course_id, [student_id for student_id, _ in vectors], matrix)
+
+class RosterEmbeddingCache:
+    """Per-course roster matrices under a memory budget, evicted least recently used first"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, RosterIndex]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        # Bumped by every invalidation, so a load that raced one is not cached
+        self._generations: Counter = Counter()
+
+    def get(self, course_id) -> Optional[RosterIndex]:
+        key = str(course_id)
+        roster = self._entries.get(key)
+        if roster is not None:
+            self._entries.move_to_end(key)
+        return roster
+
+    def put(self, roster: RosterIndex):
+        key = str(roster.course_id)
+        self._discard(key)
+        if roster.nbytes > self.max_bytes:
+            logger.warning(f"Roster for course {key} ({roster.nbytes} bytes) exceeds the cache budget")
+            return
+
+        self._entries[key] = roster
+        self.total_bytes += roster.nbytes
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.total_bytes -= evicted.nbytes
+            logger.info(f"Evicted roster for course {evicted.course_id} from embedding cache")
+
+    def _discard(self, key: str):
+        roster = self._entries.pop(key, None)
+        if roster is not None:
+            self.total_bytes -= roster.nbytes
+
+    def invalidate(self, course_id):
+        """Drop a course roster, including one still being loaded from before the change"""
+        key = str(course_id)
+        self._generations[key] += 1
+        self._discard(key)
+        # Later requests start a fresh load instead of joining the stale one
+        self._loading.pop(key, None)
+
+    async def load(self, db: AsyncSession, course_id) -> RosterIndex:
+        """Get a course roster, building it once even if many requests miss together"""
+        roster = self.get(course_id)
+        if roster is not None:
+            return roster
+
+        key = str(course_id)
+        pending = self._loading.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        generation = self._generations[key]
+        try:
+            result = await db.execute(
+                select(User.id, User.face_encoding)
+                .join(CourseEnrollment, CourseEnrollment.student_id == User.id)
+                .where(
+                    CourseEnrollment.course_id == course_id,
+                    User.face_encoding.isnot(None)
+                )
+            )
+            rows = result.all()
+            roster = await asyncio.get_running_loop().run_in_executor(
+                None, build_roster_index, course_id, rows
+            )
+            # Requests already waiting still get this roster, but it is only kept
+            # if the course was not invalidated while it loaded
+            if self._generations[key] == generation:
+                self.put(roster)
+            future.set_result(roster)
+            logger.info(f"Warmed roster embeddings for course {course_id}: {len(roster.student_ids)} students")
+            return roster
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        finally:
+            if self._loading.get(key) is future:
+                del self._loading[key]
+
+roster_cache = RosterEmbeddingCache(settings.ROSTER_CACHE_MAX_MB * 1024 * 1024)
+
+async def warm_course_roster(course_id):
+    """Background task: load a course roster with its own database session"""
+    from app.core import database
+
+    if not database.AsyncSessionLocal:
+        return
+    try:
+        async with database.AsyncSessionLocal() as db:
+            await roster_cache.load(db, course_id)
+    except Exception as e:
+        logger.error(f"Failed to warm roster for course {course_id}: {e}")
+
+async def identify_student(db: AsyncSession, course_id, probe: np.ndarray) -> Optional[Tuple[uuid.UUID, float, float]]:
+    """Find the enrolled student closest to a probe; returns (student_id, distance, confidence)"""
+    roster = await roster_cache.load(db, course_id)
+    match = await asyncio.get_running_loop().run_in_executor(None, roster.identify, probe)
+    if match is None:
+        return None
+
+    student_id, distance = match
+    confidence = float(distances_to_confidence(np.float32(distance), settings.FACE_MATCH_TOLERANCE))
+    return student_id, distance, confidence
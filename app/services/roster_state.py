@@ -0,0 +1,166 @@
+import asyncio
+import base64
+import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import uuid
+
+from sqlalchemy import select, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.course import CourseEnrollment
+from app.models.attendance import AttendanceRecord, AttendanceStatus
+
+logger = logging.getLogger(__name__)
+
+def _to_version(timestamp: datetime) -> int:
+    """Versions are change timestamps in microseconds, so every worker agrees on them"""
+    return int(timestamp.timestamp() * 1_000_000)
+
+def _encode_bits(bits: int, size: int) -> str:
+    return base64.b64encode(bits.to_bytes((size + 7) // 8, "little")).decode()
+
+class SessionRosterState:
+    """Present/late/excused bitsets over a session roster plus a bounded change log.
+
+    Bit i of each set refers to ``student_ids[i]``; a student with no bit set
+    is absent. The roster is sorted by student ID so positions are identical
+    in every worker.
+    """
+
+    def __init__(self, session_id, student_ids: List[uuid.UUID], changelog_size: int):
+        self.session_id = session_id
+        self.student_ids = sorted(student_ids, key=str)
+        self.positions: Dict[uuid.UUID, int] = {sid: i for i, sid in enumerate(self.student_ids)}
+        self.present = 0
+        self.late = 0
+        self.excused = 0
+        self.version = 0
+        self.floor_version = 0  # Deltas can be served for any since_version >= floor
+        self.synced_at: Optional[datetime] = None
+        self.lock = asyncio.Lock()
+        self._changes = deque(maxlen=changelog_size)
+
+    def status_at(self, position: int) -> str:
+        bit = 1 << position
+        if self.present & bit:
+            return AttendanceStatus.PRESENT.value
+        if self.late & bit:
+            return AttendanceStatus.LATE.value
+        if self.excused & bit:
+            return AttendanceStatus.EXCUSED.value
+        return AttendanceStatus.ABSENT.value
+
+    def apply(self, student_id, status: AttendanceStatus, version: int) -> bool:
+        """Record a student's status; returns False if the student is not on the roster"""
+        position = self.positions.get(student_id)
+        if position is None:
+            return False
+        if self.status_at(position) == status.value:
+            self.version = max(self.version, version)
+            return True
+
+        bit = 1 << position
+        self.present &= ~bit
+        self.late &= ~bit
+        self.excused &= ~bit
+        if status == AttendanceStatus.PRESENT:
+            self.present |= bit
+        elif status == AttendanceStatus.LATE:
+            self.late |= bit
+        elif status == AttendanceStatus.EXCUSED:
+            self.excused |= bit
+
+        if len(self._changes) == self._changes.maxlen:
+            self.floor_version = self._changes[0][0]
+        self._changes.append((version, position))
+        self.version = max(self.version, version)
+        return True
+
+    def delta(self, since_version: int) -> Optional[List[dict]]:
+        """Students whose status changed after since_version, or None if the log no longer covers it"""
+        if since_version < self.floor_version:
+            return None
+
+        # Re-send a small overlap: commits can land slightly out of timestamp order
+        cutoff = since_version - settings.ROSTER_SYNC_OVERLAP_SECONDS * 1_000_000
+        positions = sorted({position for version, position in self._changes if version > cutoff})
+        return [
+            {"student_id": str(self.student_ids[position]), "status": self.status_at(position)}
+            for position in positions
+        ]
+
+    def snapshot(self) -> dict:
+        size = len(self.student_ids)
+        return {
+            "version": self.version,
+            "full": True,
+            "roster": [str(student_id) for student_id in self.student_ids],
+            "present": _encode_bits(self.present, size),
+            "late": _encode_bits(self.late, size),
+            "excused": _encode_bits(self.excused, size)
+        }
+
+class RosterStateManager:
+    """Keeps roster states for recently viewed sessions and catches them up from the database"""
+
+    def __init__(self, maxsize: int, ttl_seconds: float, changelog_size: int):
+        self.changelog_size = changelog_size
+        self._states = TTLCache(maxsize, ttl_seconds)
+
+    def invalidate(self, session_id):
+        self._states.pop(str(session_id))
+
+    async def _build(self, db: AsyncSession, session_id, course_id) -> SessionRosterState:
+        result = await db.execute(
+            select(CourseEnrollment.student_id).where(CourseEnrollment.course_id == course_id)
+        )
+        state = SessionRosterState(session_id, [row[0] for row in result.all()], self.changelog_size)
+        self._states.set(str(session_id), state)
+        return state
+
+    async def get(self, db: AsyncSession, session_id, course_id, rebuilt: bool = False) -> SessionRosterState:
+        """Return an up-to-date roster state, reading only records changed since the last sync"""
+        state = self._states.get(str(session_id))
+        if state is None:
+            state = await self._build(db, session_id, course_id)
+
+        async with state.lock:
+            query = select(
+                AttendanceRecord.student_id,
+                AttendanceRecord.status,
+                func.coalesce(AttendanceRecord.updated_at, AttendanceRecord.created_at)
+            ).where(AttendanceRecord.session_id == session_id)
+
+            now = datetime.now(timezone.utc)
+            if state.synced_at is not None:
+                watermark = state.synced_at - timedelta(seconds=settings.ROSTER_SYNC_OVERLAP_SECONDS)
+                query = query.where(or_(
+                    AttendanceRecord.created_at > watermark,
+                    AttendanceRecord.updated_at > watermark
+                ))
+
+            result = await db.execute(query)
+            rows = sorted(result.all(), key=lambda row: row[2])
+            for student_id, record_status, changed_at in rows:
+                if state.apply(student_id, record_status, _to_version(changed_at)):
+                    continue
+                if rebuilt:
+                    logger.warning(f"Record for unenrolled student {student_id} in session {session_id}")
+                    continue
+                # Someone enrolled mid-session: rebuild so every worker keeps the same positions
+                logger.info(f"Roster of session {session_id} changed, rebuilding state")
+                self.invalidate(session_id)
+                return await self.get(db, session_id, course_id, rebuilt=True)
+            state.synced_at = now
+
+        return state
+
+roster_states = RosterStateManager(
+    maxsize=settings.ROSTER_STATE_CACHE_SIZE,
+    ttl_seconds=settings.ROSTER_STATE_TTL_SECONDS,
+    changelog_size=settings.ROSTER_CHANGELOG_SIZE
+)
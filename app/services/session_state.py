@@ -0,0 +1,152 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.course import Course
+from app.models.session import Session
+from app.models.attendance import AttendanceSession
+
+logger = logging.getLogger(__name__)
+
+class SessionState:
+    """Snapshot of an open attendance session, everything check-in needs to know"""
+
+    __slots__ = (
+        "session_id", "attendance_session_id", "course_id", "lecturer_id",
+        "started_at", "window_minutes", "auto_close_minutes",
+        "require_geofence", "require_face_recognition"
+    )
+
+    def __init__(
+        self,
+        session_id: uuid.UUID,
+        attendance_session_id: uuid.UUID,
+        course_id: uuid.UUID,
+        lecturer_id: uuid.UUID,
+        started_at: Optional[datetime],
+        window_minutes: Optional[int],
+        auto_close_minutes: Optional[int],
+        require_geofence: bool,
+        require_face_recognition: bool
+    ):
+        self.session_id = session_id
+        self.attendance_session_id = attendance_session_id
+        self.course_id = course_id
+        self.lecturer_id = lecturer_id
+        self.started_at = started_at
+        self.window_minutes = window_minutes or 15
+        self.auto_close_minutes = auto_close_minutes
+        self.require_geofence = bool(require_geofence)
+        self.require_face_recognition = bool(require_face_recognition)
+
+    def __repr__(self):
+        return f"<SessionState {self.session_id} course={self.course_id}>"
+
+# Only open sessions are cached; closing a session removes its entry
+session_state_cache = TTLCache(settings.SESSION_STATE_CACHE_SIZE, settings.SESSION_STATE_TTL_SECONDS)
+
+async def get_session_state(db: AsyncSession, session_id) -> Optional[SessionState]:
+    """Get the state of an open attendance session, or None if attendance is not open"""
+    key = str(session_id)
+    state = session_state_cache.get(key)
+    if state is not None:
+        return state
+
+    result = await db.execute(
+        select(
+            AttendanceSession.id, Session.course_id, Course.lecturer_id,
+            AttendanceSession.started_at, Session.attendance_window_minutes,
+            AttendanceSession.auto_close_minutes, AttendanceSession.require_geofence,
+            AttendanceSession.require_face_recognition
+        )
+        .join(Session, Session.id == AttendanceSession.session_id)
+        .join(Course, Course.id == Session.course_id)
+        .where(
+            AttendanceSession.session_id == session_id,
+            AttendanceSession.is_active.is_(True)
+        )
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+
+    state = SessionState(session_id, *row)
+    session_state_cache.set(key, state)
+    return state
+
+class SessionWindow:
+    """When attendance of a session was open; used to validate check-ins that arrive late"""
+
+    __slots__ = (
+        "session_id", "attendance_session_id", "course_id", "lecturer_id",
+        "started_at", "ended_at", "window_minutes", "require_geofence", "require_face_recognition"
+    )
+
+    def __init__(self, state: SessionState, ended_at: Optional[datetime] = None):
+        self.session_id = state.session_id
+        self.attendance_session_id = state.attendance_session_id
+        self.course_id = state.course_id
+        self.lecturer_id = state.lecturer_id
+        self.started_at = state.started_at
+        self.ended_at = ended_at
+        self.window_minutes = state.window_minutes
+        self.require_geofence = state.require_geofence
+        self.require_face_recognition = state.require_face_recognition
+
+    @property
+    def is_open(self) -> bool:
+        return self.ended_at is None
+
+# Closed sessions keep their window until attendance is reopened
+session_window_cache = TTLCache(settings.SESSION_STATE_CACHE_SIZE, settings.SESSION_WINDOW_TTL_SECONDS)
+
+async def get_session_windows(db: AsyncSession, session_ids: Iterable) -> Dict[uuid.UUID, SessionWindow]:
+    """Attendance windows of many sessions, open or closed, with one query for the uncached ones.
+
+    Sessions whose attendance was never opened are missing from the result.
+    """
+    windows = {}
+    missing = []
+    for session_id in session_ids:
+        state = session_state_cache.get(str(session_id))
+        window = SessionWindow(state) if state is not None else session_window_cache.get(str(session_id))
+        if window is not None:
+            windows[session_id] = window
+        else:
+            missing.append(session_id)
+
+    if not missing:
+        return windows
+
+    result = await db.execute(
+        select(
+            AttendanceSession.session_id, AttendanceSession.id, Session.course_id, Course.lecturer_id,
+            AttendanceSession.started_at, Session.attendance_window_minutes,
+            AttendanceSession.auto_close_minutes, AttendanceSession.require_geofence,
+            AttendanceSession.require_face_recognition, AttendanceSession.is_active, AttendanceSession.ended_at
+        )
+        .join(Session, Session.id == AttendanceSession.session_id)
+        .join(Course, Course.id == Session.course_id)
+        .where(AttendanceSession.session_id.in_(missing))
+    )
+    for session_id, *columns, is_active, ended_at in result.all():
+        state = SessionState(session_id, *columns)
+        if is_active:
+            session_state_cache.set(str(session_id), state)
+            windows[session_id] = SessionWindow(state)
+        else:
+            # A closed session without an end time still closed at some point; treat it as ending now
+            windows[session_id] = SessionWindow(state, ended_at or datetime.now(timezone.utc))
+            session_window_cache.set(str(session_id), windows[session_id])
+
+    return windows
+
+def invalidate_session_state(session_id):
+    session_state_cache.pop(str(session_id))
+    session_window_cache.pop(str(session_id))
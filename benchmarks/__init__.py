@@ -0,0 +1,3 @@
+"""
+Microbenchmarks for performance-sensitive code paths
+"""
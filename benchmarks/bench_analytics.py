@@ -0,0 +1,96 @@
+"""
+Course attendance matrix: build and query latency against a per-student Python loop.
+Run from the backend directory: python benchmarks/bench_analytics.py
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from common import setup_environment, timed, print_header
+
+setup_environment()
+
+from app.models.attendance import AttendanceStatus
+from app.services.analytics_service import build_course_matrix, STATUS_CODES, CODE_ABSENT, CODE_PRESENT, CODE_LATE, CODE_EXCUSED
+
+COURSE_SHAPES = ((50, 20), (500, 60), (2_000, 120))
+STATUSES = [AttendanceStatus.PRESENT, AttendanceStatus.LATE, AttendanceStatus.ABSENT, AttendanceStatus.EXCUSED]
+THRESHOLD = 75.0
+STREAK = 3
+
+def make_course(students, sessions, rng):
+    student_ids = [uuid.uuid4() for _ in range(students)]
+    start = datetime(2024, 9, 2, 9, 0, tzinfo=timezone.utc)
+    session_list = [(uuid.uuid4(), start + timedelta(days=2 * j)) for j in range(sessions)]
+    # Cells arrive as the (row, column, code) triples the database query returns.
+    # Each student has their own attendance habit; about 3% of cells have no record at all
+    habits = rng.uniform(0.5, 0.98, students)
+    cells = []
+    for i in range(students):
+        draws = rng.random(sessions)
+        for j in range(sessions):
+            if draws[j] > 0.97:
+                continue
+            if draws[j] < habits[i] * 0.9:
+                status = AttendanceStatus.PRESENT
+            elif draws[j] < habits[i]:
+                status = AttendanceStatus.LATE
+            elif draws[j] < habits[i] + 0.02:
+                status = AttendanceStatus.EXCUSED
+            else:
+                status = AttendanceStatus.ABSENT
+            cells.append((i, j, STATUS_CODES[status]))
+    return student_ids, session_list, cells
+
+def python_loop_analytics(codes):
+    """Reference implementation: one pass per student row"""
+    results = []
+    for row in codes.tolist():
+        attended = sum(1 for code in row if code in (CODE_PRESENT, CODE_LATE))
+        counted = sum(1 for code in row if code != CODE_EXCUSED)
+        current = longest = run = 0
+        for code in row:
+            run = run + 1 if code == CODE_ABSENT else 0
+            longest = max(longest, run)
+        current = run
+        percentage = 100.0 * attended / counted if counted else 100.0
+        results.append((percentage, current, longest, percentage < THRESHOLD or current >= STREAK))
+    return results
+
+def vectorized_analytics(matrix):
+    return (
+        matrix.percentages(),
+        matrix.current_absence_streaks(),
+        matrix.longest_absence_streaks(),
+        matrix.at_risk(THRESHOLD, STREAK)
+    )
+
+if __name__ == "__main__":
+    print_header("Course attendance matrix analytics")
+    rng = np.random.default_rng(7)
+    print(f"{'course':>12} {'KB':>6} {'build ms':>9} {'pct ms':>7} {'streak ms':>10} "
+          f"{'at-risk ms':>11} {'trend ms':>9} {'all ms':>7} {'loop ms':>8}")
+
+    for students, sessions in COURSE_SHAPES:
+        student_ids, session_list, cells = make_course(students, sessions, rng)
+        build, matrix = timed(build_course_matrix, "bench-course", 1, student_ids, session_list, cells)
+
+        percentages, _ = timed(matrix.percentages)
+        streaks, _ = timed(lambda: (matrix.current_absence_streaks(), matrix.longest_absence_streaks()))
+        at_risk, _ = timed(matrix.at_risk, THRESHOLD, STREAK)
+        trend, _ = timed(matrix.session_trend)
+        everything, (pct, current, longest, flagged) = timed(vectorized_analytics, matrix)
+        loop, expected = timed(python_loop_analytics, matrix.codes, repeat=3)
+
+        # The vectorized answers must match the reference loop exactly
+        assert np.allclose(pct, [row[0] for row in expected])
+        assert (current == [row[1] for row in expected]).all()
+        assert (longest == [row[2] for row in expected]).all()
+        assert (flagged == [row[3] for row in expected]).all()
+
+        print(
+            f"{students:>6}x{sessions:<5} {matrix.nbytes / 1024:>6.1f} {build * 1000:>9.2f} "
+            f"{percentages * 1000:>7.3f} {streaks * 1000:>10.3f} {at_risk * 1000:>11.3f} "
+            f"{trend * 1000:>9.3f} {everything * 1000:>7.3f} {loop * 1000:>8.2f}"
+        )
@@ -0,0 +1,79 @@
+"""
+Attendance export throughput and peak memory for the streaming CSV and XLSX encoders.
+Rows are generated in memory so no database is needed; the encoders see the same
+partitions a server-side cursor would produce.
+Run from the backend directory: python benchmarks/bench_export.py
+"""
+import asyncio
+import io
+import time
+import tracemalloc
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+from common import setup_environment, print_header
+
+setup_environment()
+
+from app.core.config import settings
+from app.models.attendance import AttendanceStatus, CheckInMethod
+from app.services.export_service import EXPORT_FORMATS
+
+ROW_COUNTS = (10_000, 100_000, 1_000_000)
+TRACED_ROWS = 100_000  # tracemalloc slows encoding ~10x, so peak memory is sampled at two sizes
+
+async def synthetic_partitions(total: int, chunk: int):
+    start = datetime(2024, 9, 2, 9, 0, tzinfo=timezone.utc)
+    statuses = list(AttendanceStatus)
+    for offset in range(0, total, chunk):
+        partition = []
+        for i in range(offset, min(offset + chunk, total)):
+            scheduled = start + timedelta(days=i // 400)
+            partition.append((
+                "CS101", "Introduction to Computing", f"Lecture {i // 400 + 1}", scheduled,
+                f"S{i % 400:05d}", f"Student {i % 400}", f"student{i % 400}@example.edu",
+                statuses[i % len(statuses)], CheckInMethod.GEOLOCATION,
+                scheduled + timedelta(minutes=i % 15), True, i % 3 == 0, 0.87 if i % 3 == 0 else None
+            ))
+        yield partition
+
+async def run_export(encode, total: int, keep: bool):
+    """Consume the stream like a client would; keep the bytes only when validating"""
+    size = 0
+    kept = io.BytesIO() if keep else None
+    async for chunk in encode(synthetic_partitions(total, settings.EXPORT_CHUNK_ROWS)):
+        size += len(chunk)
+        if kept is not None:
+            kept.write(chunk)
+    return size, kept
+
+def validate_xlsx(data: io.BytesIO, total: int):
+    with zipfile.ZipFile(data) as workbook:
+        assert workbook.testzip() is None
+        sheet = workbook.read("xl/worksheets/sheet1.xml")
+        assert f'<row r="{total + 1}">'.encode() in sheet
+
+async def main():
+    print_header("Streaming attendance export")
+    validate_xlsx((await run_export(EXPORT_FORMATS["xlsx"][1], 1_000, keep=True))[1], 1_000)
+    print("XLSX output opens as a valid workbook\n")
+
+    print(f"{'format':>6} {'rows':>10} {'seconds':>8} {'rows/s':>10} {'MB out':>8}")
+    for export_format, (_, encode) in EXPORT_FORMATS.items():
+        for total in ROW_COUNTS:
+            start = time.perf_counter()
+            size, _ = await run_export(encode, total, keep=False)
+            elapsed = time.perf_counter() - start
+            print(f"{export_format:>6} {total:>10,} {elapsed:>8.2f} {total / elapsed:>10,.0f} {size / 1e6:>8.1f}")
+
+    print(f"\n{'format':>6} {'rows':>10} {'peak MB':>8}")
+    for export_format, (_, encode) in EXPORT_FORMATS.items():
+        for total in (TRACED_ROWS // 10, TRACED_ROWS):
+            tracemalloc.start()
+            await run_export(encode, total, keep=False)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{export_format:>6} {total:>10,} {peak / 1e6:>8.2f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
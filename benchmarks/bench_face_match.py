@@ -0,0 +1,67 @@
+"""
+Face-match verification throughput on synthetic 128-d and 512-d embeddings.
+Run from the backend directory: python benchmarks/bench_face_match.py
+"""
+import asyncio
+import json
+import math
+import time
+
+import numpy as np
+
+from common import setup_environment, timed, print_header
+
+setup_environment()
+
+from app.services.face_service import (
+    FaceVerificationBatcher, face_distances, parse_face_encoding, encode_embedding
+)
+
+REQUESTS = 2048
+
+def naive_verify(pairs):
+    """Baseline: parse the stored text and loop over Python floats"""
+    results = []
+    for probe, enrolled_text in pairs:
+        enrolled = json.loads(enrolled_text)
+        results.append(math.sqrt(sum((a - b) ** 2 for a, b in zip(probe, enrolled))))
+    return results
+
+def vectorized_verify(probes, enrolled):
+    return face_distances(probes, enrolled)
+
+async def batched_verify(probes, enrolled, window_ms):
+    batcher = FaceVerificationBatcher(window_seconds=window_ms / 1000, max_batch=64, tolerance=0.6)
+    return await asyncio.gather(*(
+        batcher.verify("bench-session", probes[i], enrolled[i]) for i in range(len(probes))
+    ))
+
+if __name__ == "__main__":
+    print_header("Face-match verification")
+    rng = np.random.default_rng(7)
+
+    for dim in (128, 512):
+        enrolled = rng.standard_normal((REQUESTS, dim)).astype(np.float32)
+        enrolled /= np.linalg.norm(enrolled, axis=1, keepdims=True)
+        probes = enrolled + rng.normal(0, 0.02, enrolled.shape).astype(np.float32)
+
+        pairs = [(probes[i].tolist(), json.dumps(enrolled[i].tolist())) for i in range(REQUESTS)]
+        naive_time, _ = timed(naive_verify, pairs, repeat=3)
+        vector_time, _ = timed(vectorized_verify, probes, enrolled)
+
+        start = time.perf_counter()
+        results = asyncio.run(batched_verify(probes, enrolled, window_ms=2))
+        batched_time = time.perf_counter() - start
+
+        parse_time, _ = timed(lambda: [parse_face_encoding(text) for _, text in pairs], repeat=3)
+        blobs = [encode_embedding(vector) for vector in enrolled]
+        decode_time, _ = timed(lambda: [parse_face_encoding(blob) for blob in blobs], repeat=3)
+
+        print(f"\n🧠 {dim}-d embeddings ({REQUESTS:,} verifications)")
+        print(f"  naive python loop        : {REQUESTS / naive_time:>12,.0f} verifications/s")
+        print(f"  text parse to float32    : {REQUESTS / parse_time:>12,.0f} encodings/s")
+        print(f"  binary zero-copy decode  : {REQUESTS / decode_time:>12,.0f} encodings/s "
+              f"({len(blobs[0])} vs {len(pairs[0][1])} bytes)")
+        print(f"  vectorized matrix op     : {REQUESTS / vector_time:>12,.0f} verifications/s")
+        print(f"  batched via executor     : {REQUESTS / batched_time:>12,.0f} verifications/s "
+              f"({sum(r.verified for r in results):,} verified)")
@@ -0,0 +1,62 @@
+"""
+Geofence verification throughput.
+Run from the backend directory: python benchmarks/bench_geofence.py
+"""
+import math
+import random
+
+from common import setup_environment, timed, print_header
+
+setup_environment()
+
+from app.services.geofence_service import Geofence, verify_location
+
+POINTS = 200_000
+
+def naive_haversine_check(fence_row, points):
+    """Baseline: parse string columns and run haversine on every check"""
+    lat_s, lon_s, radius = fence_row
+    inside = 0
+    for lat, lon in points:
+        lat0, lon0 = float(lat_s), float(lon_s)
+        p1, p2 = math.radians(lat0), math.radians(lat)
+        dp, dl = p2 - p1, math.radians(lon - lon0)
+        a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+        if 2 * 6371008.8 * math.asin(math.sqrt(a)) <= radius:
+            inside += 1
+    return inside
+
+def cached_fence_check(fence, points):
+    inside = 0
+    for lat, lon in points:
+        if verify_location(fence, lat, lon):
+            inside += 1
+    return inside
+
+def make_points(center_lat, center_lon, spread_deg, count):
+    rng = random.Random(42)
+    return [
+        (center_lat + rng.uniform(-spread_deg, spread_deg), center_lon + rng.uniform(-spread_deg, spread_deg))
+        for _ in range(count)
+    ]
+
+if __name__ == "__main__":
+    print_header("Geofence verification")
+
+    center = (4.1537, 9.2920)  # Campus coordinates
+    fence = Geofence(center[0], center[1], 100)
+    fence_row = (str(center[0]), str(center[1]), 100)
+
+    # Mostly nearby check-ins, plus a workload where most points fall outside the box
+    for label, spread in (("near campus", 0.002), ("city-wide", 0.05)):
+        points = make_points(center[0], center[1], spread, POINTS)
+
+        naive_time, naive_inside = timed(naive_haversine_check, fence_row, points, repeat=3)
+        fast_time, fast_inside = timed(cached_fence_check, fence, points, repeat=3)
+
+        print(f"\n📍 {label} ({POINTS:,} points, {fast_inside:,} inside)")
+        print(f"  naive parse + haversine : {POINTS / naive_time:>12,.0f} checks/s")
+        print(f"  cached fence + bbox     : {POINTS / fast_time:>12,.0f} checks/s")
+        print(f"  speedup                 : {naive_time / fast_time:>12.2f}x")
+        if naive_inside != fast_inside:
+            print(f"  ⚠️ result mismatch: naive={naive_inside} fast={fast_inside}")
@@ -0,0 +1,142 @@
+"""
+attendance_records query latency: one table vs monthly range partitions on created_at.
+Needs a scratch PostgreSQL database in DATABASE_URL; data lives in its own schema.
+Run from the backend directory: python benchmarks/bench_partitioning.py [rows]
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import asyncpg
+
+from common import setup_environment, print_header
+
+setup_environment()
+
+from app.services.partition_service import add_months
+
+SCHEMA = "bench_partitioning"
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+MONTHS = 24
+STUDENTS = 20_000
+SESSIONS = 40_000
+FIRST_MONTH = add_months(date.today().replace(day=1), -MONTHS + 1)
+
+COLUMNS = """
+    id uuid NOT NULL,
+    session_id integer NOT NULL,
+    student_id integer NOT NULL,
+    status text,
+    created_at timestamptz NOT NULL
+"""
+
+def month_bound(month: date) -> str:
+    return f"{month.isoformat()} 00:00:00+00"
+
+def setup_statements():
+    statements = [
+        f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+        f"CREATE SCHEMA {SCHEMA}",
+        f"CREATE TABLE {SCHEMA}.plain ({COLUMNS}, PRIMARY KEY (id))",
+        f"CREATE TABLE {SCHEMA}.partitioned ({COLUMNS}, PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)",
+    ]
+    for i in range(MONTHS):
+        month = add_months(FIRST_MONTH, i)
+        statements.append(
+            f"CREATE TABLE {SCHEMA}.partitioned_p{month:%Y%m} PARTITION OF {SCHEMA}.partitioned "
+            f"FOR VALUES FROM ('{month_bound(month)}') TO ('{month_bound(add_months(month, 1))}')"
+        )
+    # Sessions are spread evenly over time, so a session's rows fall in one month
+    statements.append(f"""
+        INSERT INTO {SCHEMA}.plain
+        SELECT gen_random_uuid(), s, (n * 7919) % {STUDENTS},
+               (ARRAY['PRESENT', 'PRESENT', 'PRESENT', 'LATE', 'ABSENT'])[1 + n % 5],
+               '{month_bound(FIRST_MONTH)}'::timestamptz
+                   + (s::float / {SESSIONS}) * interval '{MONTHS * 30 - 1} days'
+                   + (n % 600) * interval '1 second'
+        FROM generate_series(1, {ROWS}) AS n, LATERAL (SELECT (n * {SESSIONS}::bigint / {ROWS})::int AS s) AS sess
+    """)
+    statements.append(f"INSERT INTO {SCHEMA}.partitioned SELECT * FROM {SCHEMA}.plain")
+    for table in ("plain", "partitioned"):
+        statements += [
+            f"CREATE INDEX ON {SCHEMA}.{table} (session_id, student_id)",
+            f"CREATE INDEX ON {SCHEMA}.{table} (student_id, created_at, id)",
+            f"CREATE INDEX ON {SCHEMA}.{table} (created_at, id)",
+            f"VACUUM ANALYZE {SCHEMA}.{table}",
+        ]
+    return statements
+
+def queries(table: str, recent: datetime, session_id: int, session_start: datetime):
+    return [
+        ("student, last 30 days",
+         f"SELECT * FROM {SCHEMA}.{table} WHERE student_id = $1 AND created_at >= $2 "
+         f"ORDER BY created_at DESC, id DESC LIMIT 50",
+         (42, recent)),
+        ("duplicate check",
+         f"SELECT id FROM {SCHEMA}.{table} WHERE session_id = $1 AND student_id = $2 AND created_at >= $3",
+         (session_id, 42, session_start)),
+        ("month status counts",
+         f"SELECT status, count(*) FROM {SCHEMA}.{table} WHERE created_at >= $1 AND created_at < $2 GROUP BY status",
+         (recent - timedelta(days=30), recent)),
+        ("keyset page, newest",
+         f"SELECT * FROM {SCHEMA}.{table} ORDER BY created_at DESC, id DESC LIMIT 50",
+         ()),
+    ]
+
+async def best_of(conn, sql, args, repeat: int = 5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await conn.fetch(sql, *args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+async def partitions_scanned(conn, sql, args) -> int:
+    plan = await conn.fetch(f"EXPLAIN (ANALYZE, COSTS OFF) {sql}", *args)
+    return sum(1 for row in plan if "partitioned_p" in row[0] and "Scan" in row[0])
+
+async def main():
+    print_header(f"attendance_records partitioning over {ROWS:,} rows, {MONTHS} months")
+    conn = await asyncpg.connect(os.environ["DATABASE_URL"])
+    try:
+        start = time.perf_counter()
+        for statement in setup_statements():
+            await conn.execute(statement)
+        print(f"Seeded in {time.perf_counter() - start:.0f}s\n")
+
+        recent = datetime.now(timezone.utc)
+        session_id = SESSIONS - 10
+        session_start = await conn.fetchval(
+            f"SELECT min(created_at) FROM {SCHEMA}.plain WHERE session_id = $1", session_id
+        )
+
+        print(f"{'query':<22} {'plain ms':>9} {'partitioned ms':>15} {'partitions':>11}")
+        for (label, plain_sql, args), (_, partitioned_sql, _) in zip(
+            queries("plain", recent, session_id, session_start),
+            queries("partitioned", recent, session_id, session_start)
+        ):
+            plain = await best_of(conn, plain_sql, args)
+            partitioned = await best_of(conn, partitioned_sql, args)
+            scanned = await partitions_scanned(conn, partitioned_sql, args)
+            print(f"{label:<22} {plain * 1000:>9.2f} {partitioned * 1000:>15.2f} {scanned:>8}/{MONTHS}")
+
+        # Retiring the oldest month: DETACH is metadata-only, DELETE rewrites the rows
+        oldest = f"{SCHEMA}.partitioned_p{FIRST_MONTH:%Y%m}"
+        start = time.perf_counter()
+        await conn.execute(f"ALTER TABLE {SCHEMA}.partitioned DETACH PARTITION {oldest}")
+        detach = time.perf_counter() - start
+        start = time.perf_counter()
+        deleted = await conn.execute(
+            f"DELETE FROM {SCHEMA}.plain WHERE created_at < $1",
+            datetime.combine(add_months(FIRST_MONTH, 1), datetime.min.time(), timezone.utc)
+        )
+        delete = time.perf_counter() - start
+        print(f"\nRetire oldest month: DETACH {detach * 1000:.1f} ms vs {deleted} in {delete * 1000:.0f} ms")
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
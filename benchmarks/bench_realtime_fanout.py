@@ -0,0 +1,74 @@
+"""
+Load test for the live attendance feed: 1,000 concurrent subscribers on one session.
+Run from the backend directory: python benchmarks/bench_realtime_fanout.py
+Set REALTIME_BACKEND=redis (and REDIS_URL) to exercise cross-worker fan-out.
+"""
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from common import setup_environment, print_header
+
+setup_environment()
+
+from app.services.event_bus import create_event_bus, session_channel
+
+SUBSCRIBERS = 1_000
+SLOW_SUBSCRIBERS = 50  # Simulated phones on bad Wi-Fi
+EVENTS = 500
+PUBLISH_INTERVAL = 0.002
+
+async def consume(subscription, slow, latencies, stats):
+    async for payload in subscription:
+        message = json.loads(payload)
+        if message["type"] == "resync":
+            stats["resyncs"] += 1
+            continue
+        latencies.append(time.perf_counter() - message["sent_at"])
+        stats["delivered"] += 1
+        if slow:
+            await asyncio.sleep(0.05)
+
+async def main():
+    bus = create_event_bus()
+    await bus.start()
+    channel = session_channel("bench-session")
+
+    latencies = []
+    stats = {"delivered": 0, "resyncs": 0}
+    subscriptions = [bus.subscribe(channel) for _ in range(SUBSCRIBERS)]
+    consumers = [
+        asyncio.create_task(consume(subscription, i < SLOW_SUBSCRIBERS, latencies, stats))
+        for i, subscription in enumerate(subscriptions)
+    ]
+
+    start = time.perf_counter()
+    for i in range(EVENTS):
+        await bus.publish(channel, {"type": "checkin", "seq": i, "sent_at": time.perf_counter()})
+        await asyncio.sleep(PUBLISH_INTERVAL)
+    publish_time = time.perf_counter() - start
+
+    await asyncio.sleep(1.0)
+    for consumer in consumers:
+        consumer.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+    for subscription in subscriptions:
+        subscription.close()
+    await bus.close()
+
+    fast_expected = (SUBSCRIBERS - SLOW_SUBSCRIBERS) * EVENTS
+    latencies_ms = np.array(latencies) * 1000
+    print(f"  backend               : {type(bus).__name__}")
+    print(f"  subscribers           : {SUBSCRIBERS:,} ({SLOW_SUBSCRIBERS} slow)")
+    print(f"  events published      : {EVENTS:,} in {publish_time:.2f}s")
+    print(f"  messages delivered    : {stats['delivered']:,} (fast consumers expect {fast_expected:,})")
+    print(f"  resync markers        : {stats['resyncs']:,}")
+    print(f"  max queued per socket : {bus.queue_size}")
+    print(f"  delivery latency p50  : {np.percentile(latencies_ms, 50):.2f} ms")
+    print(f"  delivery latency p99  : {np.percentile(latencies_ms, 99):.2f} ms")
+
+if __name__ == "__main__":
+    print_header("Realtime fan-out")
+    asyncio.run(main())
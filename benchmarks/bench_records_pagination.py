@@ -0,0 +1,113 @@
+"""
+Attendance record listing: full IN-list fetch vs OFFSET vs keyset pages.
+Needs a scratch PostgreSQL database in DATABASE_URL; data lives in its own schema.
+Run from the backend directory: python benchmarks/bench_records_pagination.py
+"""
+import asyncio
+import os
+import time
+
+import asyncpg
+
+from common import setup_environment, print_header
+
+setup_environment()
+
+SCHEMA = "bench_pagination"
+ROWS = 1_000_000
+SESSIONS = 5_000
+LECTURERS = 100
+PAGE_SIZE = 50
+DEEP_OFFSET = 200_000
+
+SETUP = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"""
+    CREATE TABLE {SCHEMA}.attendance_sessions AS
+    SELECT gen_random_uuid() AS id, (n % {LECTURERS}) AS lecturer_id
+    FROM generate_series(1, {SESSIONS}) AS n
+    """,
+    f"""
+    CREATE TABLE {SCHEMA}.attendance_records AS
+    SELECT gen_random_uuid() AS id,
+           s.id AS session_id,
+           gen_random_uuid() AS student_id,
+           'present'::text AS status,
+           now() - (n || ' seconds')::interval AS created_at
+    FROM generate_series(1, {ROWS}) AS n
+    JOIN (SELECT id, row_number() OVER () AS rn FROM {SCHEMA}.attendance_sessions) s
+      ON s.rn = n % {SESSIONS} + 1
+    """,
+    f"CREATE INDEX ON {SCHEMA}.attendance_sessions (lecturer_id)",
+    f"CREATE INDEX ON {SCHEMA}.attendance_records (session_id, created_at, id)",
+    f"CREATE INDEX ON {SCHEMA}.attendance_records (created_at, id)",
+    f"ANALYZE {SCHEMA}.attendance_sessions",
+    f"ANALYZE {SCHEMA}.attendance_records",
+]
+
+async def in_list_full_fetch(conn):
+    """The old path: fetch the lecturer's session IDs, then every record for them"""
+    session_ids = [row["id"] for row in await conn.fetch(
+        f"SELECT id FROM {SCHEMA}.attendance_sessions WHERE lecturer_id = 1"
+    )]
+    return await conn.fetch(
+        f"SELECT * FROM {SCHEMA}.attendance_records WHERE session_id = ANY($1) ORDER BY created_at DESC",
+        session_ids
+    )
+
+async def offset_page(conn):
+    return await conn.fetch(
+        f"SELECT * FROM {SCHEMA}.attendance_records ORDER BY created_at DESC, id DESC LIMIT $1 OFFSET $2",
+        PAGE_SIZE, DEEP_OFFSET
+    )
+
+async def keyset_page(conn, cursor):
+    return await conn.fetch(
+        f"""
+        SELECT r.* FROM {SCHEMA}.attendance_records r
+        JOIN {SCHEMA}.attendance_sessions s ON s.id = r.session_id
+        WHERE s.lecturer_id = 1 AND (r.created_at, r.id) < ($1, $2)
+        ORDER BY r.created_at DESC, r.id DESC
+        LIMIT $3
+        """,
+        cursor["created_at"], cursor["id"], PAGE_SIZE
+    )
+
+async def best_of(func, *args, repeat: int = 5):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+async def main():
+    print_header(f"Attendance record listing over {ROWS:,} rows")
+    conn = await asyncpg.connect(os.environ["DATABASE_URL"])
+    try:
+        start = time.perf_counter()
+        for statement in SETUP:
+            await conn.execute(statement)
+        print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+        # Start the keyset walk from the same depth as the OFFSET query
+        cursor = await conn.fetchrow(
+            f"SELECT created_at, id FROM {SCHEMA}.attendance_records ORDER BY created_at DESC, id DESC OFFSET $1 LIMIT 1",
+            DEEP_OFFSET // LECTURERS
+        )
+
+        for label, func, args in (
+            ("IN-list full fetch", in_list_full_fetch, ()),
+            (f"OFFSET {DEEP_OFFSET:,} page", offset_page, ()),
+            ("keyset page", keyset_page, (cursor,)),
+        ):
+            elapsed, rows = await best_of(func, conn, *args)
+            print(f"  {label:<24} {elapsed * 1000:>9.2f} ms  {len(rows):>7,} rows")
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""
+Kiosk 1:N identification latency as the course roster grows.
+Run from the backend directory: python benchmarks/bench_roster_identify.py
+"""
+import time
+import uuid
+
+import numpy as np
+
+from common import setup_environment, print_header
+
+setup_environment()
+
+from app.core.config import settings
+from app.services.roster_cache import RosterIndex
+
+ROSTER_SIZES = (50, 500, 2_000, 10_000, 50_000)
+DIMENSION = 128
+QUERIES = 200
+
+def make_roster(size, rng):
+    matrix = rng.standard_normal((size, DIMENSION)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix
+
+def measure(roster, probes, expected):
+    latencies = []
+    correct = 0
+    for probe, row in zip(probes, expected):
+        start = time.perf_counter()
+        student_id, _ = roster.identify(probe)
+        latencies.append(time.perf_counter() - start)
+        correct += student_id == roster.student_ids[row]
+    latencies = np.array(latencies) * 1000
+    return np.percentile(latencies, 50), np.percentile(latencies, 99), correct / len(probes)
+
+if __name__ == "__main__":
+    print_header("Roster identification latency")
+    rng = np.random.default_rng(11)
+    print(f"{'roster':>8} {'mode':>6} {'p50 ms':>8} {'p99 ms':>8} {'recall':>7} {'build s':>8}")
+
+    for size in ROSTER_SIZES:
+        matrix = make_roster(size, rng)
+        student_ids = [uuid.uuid4() for _ in range(size)]
+        expected = rng.integers(0, size, QUERIES)
+        probes = matrix[expected] + rng.normal(0, 0.03, (QUERIES, DIMENSION)).astype(np.float32)
+
+        for mode, min_size in (("exact", size + 1), ("ann", 0)):
+            settings.ROSTER_ANN_MIN_SIZE = min_size
+            start = time.perf_counter()
+            roster = RosterIndex("bench-course", student_ids, matrix)
+            build = time.perf_counter() - start
+            p50, p99, recall = measure(roster, probes, expected)
+            print(f"{size:>8,} {mode:>6} {p50:>8.3f} {p99:>8.3f} {recall:>7.1%} {build:>8.2f}")
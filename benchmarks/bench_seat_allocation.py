@@ -0,0 +1,138 @@
+"""
+Enrollment rush: simultaneous enroll requests against one course with few seats.
+Compares the conditional seat UPDATE used by the enroll endpoint with a
+read-then-write counter, and checks that nothing is overbooked.
+Needs a scratch PostgreSQL database in DATABASE_URL; data lives in its own schema.
+Run from the backend directory: python benchmarks/bench_seat_allocation.py [requests] [seats] [connections]
+"""
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+from common import setup_environment, print_header
+
+setup_environment()
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.models.course import CourseEnrollment
+from app.services.enrollment_service import claim_seat
+
+SCHEMA = "bench_seat_allocation"
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+SEATS = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+CONNECTIONS = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+# Just the columns seat allocation touches, under the production table names
+SETUP_STATEMENTS = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"""CREATE TABLE {SCHEMA}.courses (
+        id uuid PRIMARY KEY,
+        status text NOT NULL DEFAULT 'ACTIVE',
+        max_students integer,
+        seats_taken integer NOT NULL DEFAULT 0 CHECK (seats_taken >= 0),
+        updated_at timestamptz
+    )""",
+    f"""CREATE TABLE {SCHEMA}.course_enrollments_detailed (
+        id uuid PRIMARY KEY,
+        course_id uuid NOT NULL,
+        student_id uuid NOT NULL,
+        enrolled_at timestamptz DEFAULT now(),
+        UNIQUE (course_id, student_id)
+    )""",
+]
+
+async def read_then_write(db, course_id) -> bool:
+    """The naive counter: check the count, then store count + 1"""
+    row = (await db.execute(
+        text("SELECT seats_taken, max_students FROM courses WHERE id = :course_id"), {"course_id": course_id}
+    )).one()
+    if row.seats_taken >= row.max_students:
+        return False
+    await db.execute(
+        text("UPDATE courses SET seats_taken = :seats WHERE id = :course_id"),
+        {"seats": row.seats_taken + 1, "course_id": course_id}
+    )
+    return True
+
+async def rush(sessions, course_id, claim):
+    """Fire every request at once; returns (accepted, latencies)"""
+    async def enroll():
+        start = time.perf_counter()
+        async with sessions() as db:
+            if not await claim(db, course_id):
+                await db.rollback()
+                return False, time.perf_counter() - start
+            db.add(CourseEnrollment(course_id=course_id, student_id=uuid.uuid4()))
+            try:
+                await db.commit()
+            except IntegrityError:
+                await db.rollback()
+                return False, time.perf_counter() - start
+        return True, time.perf_counter() - start
+
+    results = await asyncio.gather(*[enroll() for _ in range(REQUESTS)])
+    return sum(1 for accepted, _ in results if accepted), sorted(latency for _, latency in results)
+
+async def run_scenario(engine, sessions, label: str, claim) -> bool:
+    course_id = uuid.uuid4()
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("INSERT INTO courses (id, max_students) VALUES (:id, :seats)"), {"id": course_id, "seats": SEATS}
+        )
+
+    start = time.perf_counter()
+    accepted, latencies = await rush(sessions, course_id, claim)
+    elapsed = time.perf_counter() - start
+
+    async with engine.connect() as conn:
+        seats_taken = (await conn.execute(
+            text("SELECT seats_taken FROM courses WHERE id = :id"), {"id": course_id}
+        )).scalar_one()
+        enrolled = (await conn.execute(
+            text("SELECT count(*) FROM course_enrollments_detailed WHERE course_id = :id"), {"id": course_id}
+        )).scalar_one()
+
+    correct = enrolled == seats_taken == min(SEATS, REQUESTS)
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(
+        f"{label:<20} {accepted:>8} {enrolled:>8} {seats_taken:>11} {REQUESTS / elapsed:>8.0f} "
+        f"{p50:>7.1f} {p99:>7.1f}  {'ok' if correct else 'OVERBOOKED' if enrolled > SEATS else 'DRIFTED'}"
+    )
+    return correct
+
+async def main():
+    print_header(f"Seat allocation: {REQUESTS} simultaneous requests, {SEATS} seats, {CONNECTIONS} connections")
+    engine = create_async_engine(
+        os.environ["DATABASE_URL"].replace("postgresql://", "postgresql+asyncpg://"),
+        pool_size=CONNECTIONS,
+        max_overflow=0,
+        pool_timeout=120,
+        connect_args={"statement_cache_size": 0, "server_settings": {"search_path": SCHEMA}}
+    )
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            for statement in SETUP_STATEMENTS:
+                await conn.execute(text(statement))
+
+        print(f"{'strategy':<20} {'accepted':>8} {'enrolled':>8} {'seats_taken':>11} {'req/s':>8} {'p50 ms':>7} {'p99 ms':>7}")
+        correct = await run_scenario(engine, sessions, "conditional UPDATE", claim_seat)
+        await run_scenario(engine, sessions, "read then write", read_then_write)
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+    if not correct:
+        sys.exit("❌ Conditional seat UPDATE overbooked the course")
+    print("\n✅ No overbooking with the conditional seat UPDATE")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,11 +5,16 @@ import os
 # Add the backend directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from sqlalchemy import text
+
 from app.core.database import engine, Base
 from app.models.user import User
-from app.models.course import Course, CourseEnrollment
+from app.models.course import Course, CourseEnrollment, CourseWaitlist
 from app.models.session import Session
-from app.models.attendance import AttendanceRecord, AttendanceSession
+from app.models.attendance import AttendanceRecord, AttendanceSession, AttendanceRollup, AtRiskStudent
+from app.models.archive import ArchivedAttendanceRecord, ArchivedAttendanceSession
+from app.models.metrics import MetricCounter
+from app.services.partition_service import ensure_partitions
 
 async def create_tables():
     """Create all database tables"""
@@ -21,10 +26,16 @@ async def create_tables():
             print("⚠️ Dropping existing tables...")
             await conn.run_sync(Base.metadata.drop_all)
             
+            # Trigram indexes of the course catalog need pg_trgm
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            
             # Create all tables
             print("✅ Creating new tables...")
             await conn.run_sync(Base.metadata.create_all)
             
+            # attendance_records is partitioned by month and needs partitions before inserts
+            await ensure_partitions(conn)
+            
         print("🎉 All tables created successfully!")
         
         # Print table information
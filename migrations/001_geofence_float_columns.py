@@ -0,0 +1,35 @@
+"""
+Convert the geofence and check-in coordinate columns from text to float storage.
+Run from the backend directory: python migrations/001_geofence_float_columns.py
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations.utils import run
+
+COLUMNS = [
+    ("courses", "geofence_latitude"),
+    ("courses", "geofence_longitude"),
+    ("sessions", "latitude"),
+    ("sessions", "longitude"),
+    ("attendance_records", "latitude"),
+    ("attendance_records", "longitude"),
+]
+
+# Blank or unparseable legacy values become NULL instead of failing the cast
+STATEMENTS = [
+    f"""
+    ALTER TABLE {table}
+    ALTER COLUMN {column} TYPE DOUBLE PRECISION
+    USING CASE
+        WHEN btrim({column}) ~ '^[-+]?[0-9]*\\.?[0-9]+([eE][-+]?[0-9]+)?$'
+        THEN btrim({column})::double precision
+    END
+    """
+    for table, column in COLUMNS
+]
+
+if __name__ == "__main__":
+    run("001_geofence_float_columns", STATEMENTS)
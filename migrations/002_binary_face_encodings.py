@@ -0,0 +1,66 @@
+"""
+Convert users.face_encoding from text to the binary float32 embedding format.
+Run from the backend directory: python migrations/002_binary_face_encodings.py
+
+If any stored encoding cannot be parsed, the migration stops and rolls back
+before the text column is dropped; fix or clear those users' encodings first.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from migrations.utils import run_function
+from app.services.face_service import encode_embedding, parse_face_encoding
+
+BATCH_SIZE = 500
+
+async def migrate(conn):
+    await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS face_encoding_bin BYTEA"))
+
+    converted = 0
+    unparseable = []
+    last_id = None
+    while True:
+        # Walk the table in primary-key order so each batch is a cheap index range
+        query = "SELECT id, face_encoding FROM users WHERE face_encoding IS NOT NULL"
+        params = {"limit": BATCH_SIZE}
+        if last_id is not None:
+            query += " AND id > :last_id"
+            params["last_id"] = last_id
+        rows = (await conn.execute(text(query + " ORDER BY id LIMIT :limit"), params)).all()
+        if not rows:
+            break
+
+        updates = []
+        for user_id, encoding in rows:
+            try:
+                vector = parse_face_encoding(encoding)
+            except ValueError:
+                vector = None
+            if vector is None:
+                unparseable.append(str(user_id))
+                continue
+            updates.append({"id": user_id, "data": encode_embedding(vector)})
+
+        if updates:
+            await conn.execute(
+                text("UPDATE users SET face_encoding_bin = :data WHERE id = :id"),
+                updates
+            )
+        converted += len(updates)
+        last_id = rows[-1][0]
+        print(f"  converted {converted} encodings ({len(unparseable)} unparseable)")
+
+    # Dropping the text column would destroy these faces for good
+    if unparseable:
+        shown = ", ".join(unparseable[:20]) + (" ..." if len(unparseable) > 20 else "")
+        raise RuntimeError(f"{len(unparseable)} face encodings could not be parsed (users {shown})")
+
+    await conn.execute(text("ALTER TABLE users DROP COLUMN face_encoding"))
+    await conn.execute(text("ALTER TABLE users RENAME COLUMN face_encoding_bin TO face_encoding"))
+
+if __name__ == "__main__":
+    run_function("002_binary_face_encodings", migrate)
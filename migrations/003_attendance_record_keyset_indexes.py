@@ -0,0 +1,40 @@
+"""
+Indexes for keyset pagination of attendance records.
+Run from the backend directory: python migrations/003_attendance_record_keyset_indexes.py
+
+Indexes are built CONCURRENTLY so check-ins keep writing while they build,
+which means this migration runs outside a transaction.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations.utils import run
+
+INDEXES = [
+    ("ix_attendance_records_created_id", "attendance_records", "created_at, id"),
+    ("ix_attendance_records_student_created_id", "attendance_records", "student_id, created_at, id"),
+    ("ix_attendance_records_session_created_id", "attendance_records", "session_id, created_at, id"),
+]
+
+STATEMENTS = [
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"
+    for name, table, columns in INDEXES
+] + [
+    # Lecturer filters join through the legacy attendance_sessions table where it exists
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'attendance_sessions' AND column_name = 'lecturer_id'
+        ) THEN
+            CREATE INDEX IF NOT EXISTS ix_attendance_sessions_lecturer ON attendance_sessions (lecturer_id);
+        END IF;
+    END $$
+    """
+]
+
+if __name__ == "__main__":
+    run("003_attendance_record_keyset_indexes", STATEMENTS, transactional=False)
@@ -0,0 +1,71 @@
+"""
+Convert attendance_records into a table range-partitioned by month on created_at.
+Run from the backend directory: python migrations/004_partition_attendance_records.py
+
+The old table is renamed, the partitioned table is created from the model, and
+rows are copied one month at a time. Stop check-in traffic while it runs.
+"""
+import sys
+import os
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from migrations.utils import run_function
+from app.models.attendance import AttendanceRecord
+from app.services.partition_service import (
+    is_partitioned, ensure_partitions, add_months, month_start
+)
+
+OLD_TABLE = "attendance_records_unpartitioned"
+
+def utc_midnight(day):
+    # Partition bounds are UTC, independent of the session time zone
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+async def migrate(conn):
+    if await is_partitioned(conn):
+        print("  attendance_records is already partitioned")
+        return
+
+    # Free the table, primary key and index names for the new table
+    await conn.execute(text(f"ALTER TABLE attendance_records RENAME TO {OLD_TABLE}"))
+    await conn.execute(text(
+        f"ALTER TABLE {OLD_TABLE} RENAME CONSTRAINT attendance_records_pkey TO {OLD_TABLE}_pkey"
+    ))
+    for index in AttendanceRecord.__table__.indexes:
+        await conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+    # created_at becomes part of the primary key, so it can no longer be NULL
+    await conn.execute(text(
+        f"UPDATE {OLD_TABLE} SET created_at = coalesce(check_in_time, now()) WHERE created_at IS NULL"
+    ))
+
+    await conn.run_sync(AttendanceRecord.__table__.create)
+
+    oldest, latest = (await conn.execute(text(f"SELECT min(created_at), max(created_at) FROM {OLD_TABLE}"))).one()
+    # Cover every month with rows, even ones past the usual months ahead
+    await ensure_partitions(
+        conn, since=oldest.date() if oldest else None, until=latest.date() if latest else None
+    )
+
+    columns = ", ".join(column.name for column in AttendanceRecord.__table__.columns)
+    if oldest:
+        month = month_start(oldest.date())
+        while month <= latest.date():
+            # One month per statement; the parent routes rows to their partitions
+            result = await conn.execute(text(
+                f"INSERT INTO attendance_records ({columns}) "
+                f"SELECT {columns} FROM {OLD_TABLE} "
+                f"WHERE created_at >= :start AND created_at < :end"
+            ), {"start": utc_midnight(month), "end": utc_midnight(add_months(month, 1))})
+            print(f"  {month:%Y-%m}: {result.rowcount} rows")
+            month = add_months(month, 1)
+
+    await conn.execute(text(f"DROP TABLE {OLD_TABLE}"))
+    await conn.execute(text("ANALYZE attendance_records"))
+
+if __name__ == "__main__":
+    run_function("004_partition_attendance_records", migrate)
@@ -0,0 +1,29 @@
+"""
+Indexes for the filtered, keyset-paginated course listing.
+Run from the backend directory: python migrations/005_course_listing_indexes.py
+
+Built CONCURRENTLY so courses stay writable, which means this migration runs
+outside a transaction.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations.utils import run
+
+INDEXES = [
+    ("ix_courses_lecturer_code", "courses", "lecturer_id, course_code"),
+    ("ix_courses_status_code", "courses", "status, course_code"),
+    ("ix_courses_semester_code", "courses", "semester, course_code"),
+    ("ix_courses_year_semester_code", "courses", "academic_year, semester, course_code"),
+    ("ix_course_enrollments_student_course", "course_enrollments_detailed", "student_id, course_id"),
+]
+
+STATEMENTS = [
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"
+    for name, table, columns in INDEXES
+]
+
+if __name__ == "__main__":
+    run("005_course_listing_indexes", STATEMENTS, transactional=False)
@@ -0,0 +1,43 @@
+"""
+One row per (course, student) in course_enrollments_detailed, enforced by a
+unique constraint that bulk enrollment's ON CONFLICT relies on.
+Run from the backend directory: python migrations/006_unique_course_enrollments.py
+
+Duplicate enrollments are removed first (the earliest is kept). The index is
+built CONCURRENTLY and then attached as the constraint, so this migration
+runs outside a transaction.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations.utils import run
+
+CONSTRAINT = "uq_course_enrollments_course_student"
+
+STATEMENTS = [
+    """
+    DELETE FROM course_enrollments_detailed later
+    USING course_enrollments_detailed earlier
+    WHERE later.course_id = earlier.course_id
+      AND later.student_id = earlier.student_id
+      AND (later.enrolled_at, later.id) > (earlier.enrolled_at, earlier.id)
+    """,
+    f"""
+    CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {CONSTRAINT}
+    ON course_enrollments_detailed (course_id, student_id)
+    """,
+    f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{CONSTRAINT}') THEN
+            ALTER TABLE course_enrollments_detailed
+                ADD CONSTRAINT {CONSTRAINT} UNIQUE USING INDEX {CONSTRAINT};
+        END IF;
+    END $$
+    """,
+]
+
+if __name__ == "__main__":
+    run("006_unique_course_enrollments", STATEMENTS, transactional=False)
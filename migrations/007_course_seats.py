@@ -0,0 +1,31 @@
+"""
+Seat counter and waitlist switch on courses.
+Run from the backend directory: python migrations/007_course_seats.py
+
+seats_taken is backfilled from course_enrollments_detailed; stop enrollment
+traffic while it runs. The course_waitlist table is created by create_tables.py.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations.utils import run
+
+STATEMENTS = [
+    """
+    ALTER TABLE courses
+        ADD COLUMN IF NOT EXISTS seats_taken integer NOT NULL DEFAULT 0,
+        ADD COLUMN IF NOT EXISTS waitlist_enabled boolean NOT NULL DEFAULT false
+    """,
+    """
+    UPDATE courses SET seats_taken = enrolled.count
+    FROM (SELECT course_id, count(*) AS count FROM course_enrollments_detailed GROUP BY course_id) enrolled
+    WHERE courses.id = enrolled.course_id
+    """,
+    "ALTER TABLE courses DROP CONSTRAINT IF EXISTS ck_courses_seats_taken",
+    "ALTER TABLE courses ADD CONSTRAINT ck_courses_seats_taken CHECK (seats_taken >= 0)",
+]
+
+if __name__ == "__main__":
+    run("007_course_seats", STATEMENTS)
@@ -0,0 +1,28 @@
+"""
+Catalog search: a generated full-text document on courses plus trigram indexes.
+Run from the backend directory: python migrations/008_course_search.py
+
+Adding the generated column rewrites courses, which is small. The indexes are
+built CONCURRENTLY, so this migration runs outside a transaction.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations.utils import run
+from app.models.course import COURSE_SEARCH_DOCUMENT
+
+STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""
+    ALTER TABLE courses
+        ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ({COURSE_SEARCH_DOCUMENT}) STORED
+    """,
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_courses_search_vector ON courses USING gin (search_vector)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_courses_name_trgm ON courses USING gin (course_name gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_courses_code_trgm ON courses USING gin (course_code gin_trgm_ops)",
+]
+
+if __name__ == "__main__":
+    run("008_course_search", STATEMENTS, transactional=False)
@@ -0,0 +1,3 @@
+"""
+Database migration scripts, applied in numeric order
+"""
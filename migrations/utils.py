@@ -0,0 +1,55 @@
+"""
+Helpers shared by the migration scripts
+"""
+import asyncio
+from typing import Awaitable, Callable, Iterable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core import database
+
+async def apply_migration(
+    name: str,
+    migrate: Callable[[AsyncConnection], Awaitable[None]],
+    transactional: bool = True
+) -> bool:
+    """Run a migration function inside a single transaction, or in autocommit mode
+    for statements that cannot run in one (CREATE INDEX CONCURRENTLY)"""
+    print(f"🔄 Applying migration: {name}")
+
+    if not database.create_database_engine():
+        print("❌ Could not create database engine")
+        return False
+
+    try:
+        if transactional:
+            async with database.async_engine.begin() as conn:
+                await migrate(conn)
+        else:
+            async with database.async_engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await migrate(conn)
+        print(f"✅ Migration applied: {name}")
+        return True
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+    finally:
+        await database.async_engine.dispose()
+
+async def run_statements(name: str, statements: Iterable[str], transactional: bool = True) -> bool:
+    """Run a migration's SQL statements in order"""
+    async def migrate(conn: AsyncConnection):
+        for statement in statements:
+            await conn.execute(text(statement))
+
+    return await apply_migration(name, migrate, transactional)
+
+def run(name: str, statements: Iterable[str], transactional: bool = True):
+    """Entry point used by migration scripts that are plain SQL"""
+    asyncio.run(run_statements(name, statements, transactional))
+
+def run_function(name: str, migrate: Callable[[AsyncConnection], Awaitable[None]]):
+    """Entry point used by migration scripts that transform data in Python"""
+    asyncio.run(apply_migration(name, migrate))
@@ -52,6 +52,23 @@ class AuthResponse(BaseModel):
     token_type: str
     user: UserResponse
 
+class UserListItem(BaseModel):
+    """Directory row, without password hashes, face data or other profile fields"""
+    id: str
+    email: str
+    full_name: str
+    user_type: str
+    matricle_number: Optional[str] = None
+    employee_id: Optional[str] = None
+    department: Optional[str] = None
+    level: Optional[str] = None
+    is_active: Optional[bool] = None
+    created_at: datetime
+
+class UserPage(BaseModel):
+    items: List[UserListItem]
+    next_cursor: Optional[str] = None
+
 # Student schemas
 class StudentCreate(BaseModel):
     matricule: str
@@ -126,6 +143,10 @@ class AttendanceRecordResponse(BaseModel):
     location_lng: Optional[float] = None
     created_at: datetime
 
+class AttendanceRecordPage(BaseModel):
+    items: List[AttendanceRecordResponse]
+    next_cursor: Optional[str] = None
+
 # Dashboard schemas
 class DashboardStats(BaseModel):
     total_students: int
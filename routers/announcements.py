@@ -2,43 +2,59 @@
 Announcements router for announcement management
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
 from typing import List
 from database.connection import get_supabase_client
 from middleware.auth_middleware import get_current_user, require_lecturer_or_admin, UserResponse
+from app.core.etag import conditional_response, counter_versions, bump_version, enrollment_version_name
 
 router = APIRouter()
 
+# Bumped by every announcement write made through this router
+ANNOUNCEMENTS_VERSION = "announcements"
+
 @router.get("/", response_model=List[dict])
 async def get_announcements(
+    request: Request,
+    response: Response,
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Get announcements"""
     supabase = get_supabase_client()
     
+    if current_user.user_type == "student":
+        # A student's list also changes when they enroll or drop a course
+        versions = await counter_versions(ANNOUNCEMENTS_VERSION, enrollment_version_name(current_user.id))
+    else:
+        versions = await counter_versions(ANNOUNCEMENTS_VERSION)
+    if versions is not None:
+        not_modified = conditional_response(
+            request, response, "announcements", current_user.id, current_user.user_type, *versions
+        )
+        if not_modified:
+            return not_modified
+    
     try:
-        query = supabase.table("announcements").select("*")
-        
         # Filter based on user type
         if current_user.user_type == "student":
-            # Students see announcements for their courses
-            enrollments = supabase.table("course_enrollments")\
-                .select("course_id")\
-                .eq("student_id", current_user.id)\
-                .eq("status", "active")\
-                .execute()
-            
-            course_ids = [enrollment["course_id"] for enrollment in enrollments.data]
-            if course_ids:
-                query = query.in_("course_id", course_ids)
-            else:
-                return []
-        elif current_user.user_type == "lecturer":
-            # Lecturers see announcements for their courses
-            query = query.eq("created_by", current_user.id)
+            # Students see announcements for their courses, joined through
+            # their active enrollments in the same request
+            query = supabase.table("announcements")\
+                .select("*, courses!inner(course_enrollments!inner(course_id))")\
+                .eq("courses.course_enrollments.student_id", current_user.id)\
+                .eq("courses.course_enrollments.status", "active")
+        else:
+            query = supabase.table("announcements").select("*")
+            if current_user.user_type == "lecturer":
+                # Lecturers see announcements for their courses
+                query = query.eq("created_by", current_user.id)
         
         result = query.order("created_at", desc=True).execute()
-        return result.data
+        
+        announcements = result.data
+        for announcement in announcements:
+            announcement.pop("courses", None)
+        return announcements
         
     except Exception as e:
         raise HTTPException(
@@ -60,6 +76,7 @@ async def create_announcement(
         result = supabase.table("announcements").insert(announcement_data).execute()
         
         if result.data:
+            await bump_version(ANNOUNCEMENTS_VERSION)
             return result.data[0]
         else:
             raise HTTPException(
@@ -1,17 +1,22 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import List, Optional
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from database.connection import get_supabase_client
 from models.schemas import (
     AttendanceSessionCreate, AttendanceSessionResponse,
-    AttendanceRecordCreate, AttendanceRecordResponse
+    AttendanceRecordCreate, AttendanceRecordResponse, AttendanceRecordPage
 )
 from middleware.auth_middleware import get_current_user, UserResponse
+from app.core.pagination import encode_cursor, decode_created_at_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.etag import conditional_response, counter_versions, bump_version, enrollment_version_name
 
 router = APIRouter()
 security = HTTPBearer()
 
+# Bumped by every attendance session write made through this router
+SESSIONS_VERSION = "attendance_sessions"
+
 @router.post("/sessions", response_model=AttendanceSessionResponse)
 async def create_attendance_session(
     session_data: AttendanceSessionCreate,
@@ -51,6 +56,7 @@ async def create_attendance_session(
         result = supabase.table("attendance_sessions").insert(session_record).execute()
         
         if result.data:
+            await bump_version(SESSIONS_VERSION)
             return AttendanceSessionResponse(**result.data[0])
         else:
             raise HTTPException(
@@ -66,6 +72,8 @@ async def create_attendance_session(
 
 @router.get("/sessions", response_model=List[AttendanceSessionResponse])
 async def get_attendance_sessions(
+    request: Request,
+    response: Response,
     course_id: Optional[str] = Query(None),
     date_from: Optional[date] = Query(None),
     date_to: Optional[date] = Query(None),
@@ -74,25 +82,32 @@ async def get_attendance_sessions(
     """Get attendance sessions"""
     supabase = get_supabase_client()
     
+    if current_user.user_type == "student":
+        # A student's list also changes when they enroll or drop a course
+        versions = await counter_versions(SESSIONS_VERSION, enrollment_version_name(current_user.id))
+    else:
+        versions = await counter_versions(SESSIONS_VERSION)
+    if versions is not None:
+        not_modified = conditional_response(
+            request, response, "attendance_sessions",
+            current_user.id, current_user.user_type, course_id, date_from, date_to, *versions
+        )
+        if not_modified:
+            return not_modified
+    
     try:
-        query = supabase.table("attendance_sessions").select("*")
-        
         # Filter by user type
-        if current_user.user_type == "lecturer":
-            query = query.eq("lecturer_id", current_user.id)
-        elif current_user.user_type == "student":
-            # Students can only see sessions for their enrolled courses
-            enrolled_courses = supabase.table("course_enrollments")\
-                .select("course_id")\
-                .eq("student_id", current_user.id)\
-                .eq("status", "active")\
-                .execute()
-            
-            course_ids = [enrollment["course_id"] for enrollment in enrolled_courses.data]
-            if course_ids:
-                query = query.in_("course_id", course_ids)
-            else:
-                return []
+        if current_user.user_type == "student":
+            # Students can only see sessions for their enrolled courses,
+            # joined through their active enrollments in the same request
+            query = supabase.table("attendance_sessions")\
+                .select("*, courses!inner(course_enrollments!inner(course_id))")\
+                .eq("courses.course_enrollments.student_id", current_user.id)\
+                .eq("courses.course_enrollments.status", "active")
+        else:
+            query = supabase.table("attendance_sessions").select("*")
+            if current_user.user_type == "lecturer":
+                query = query.eq("lecturer_id", current_user.id)
         
         # Apply filters
         if course_id:
@@ -105,7 +120,11 @@ async def get_attendance_sessions(
         query = query.order("session_date", desc=True).order("start_time", desc=True)
         result = query.execute()
         
-        return [AttendanceSessionResponse(**session) for session in result.data]
+        sessions = []
+        for session in result.data:
+            session.pop("courses", None)
+            sessions.append(AttendanceSessionResponse(**session))
+        return sessions
         
     except Exception as e:
         raise HTTPException(
@@ -245,49 +264,75 @@ async def update_session_stats(session_id: str):
                 })\
                 .eq("id", session_id)\
                 .execute()
+            await bump_version(SESSIONS_VERSION)
                 
     except Exception as e:
         print(f"Failed to update session stats: {str(e)}")
 
-@router.get("/records", response_model=List[AttendanceRecordResponse])
+@router.get("/records", response_model=AttendanceRecordPage)
 async def get_attendance_records(
     session_id: Optional[str] = Query(None),
     student_id: Optional[str] = Query(None),
+    course_id: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Get attendance records"""
+    """Get attendance records, newest first, one keyset page at a time"""
     supabase = get_supabase_client()
     
     try:
-        query = supabase.table("attendance_records").select("*")
+        # Inner-join the owning session so lecturer and course filters run in the same query
+        query = supabase.table("attendance_records")\
+            .select("*, attendance_sessions!inner(lecturer_id, course_id)")
         
         # Filter based on user type
         if current_user.user_type == "student":
             query = query.eq("student_id", current_user.id)
         elif current_user.user_type == "lecturer":
             # Lecturers can see records for their sessions
-            lecturer_sessions = supabase.table("attendance_sessions")\
-                .select("id")\
-                .eq("lecturer_id", current_user.id)\
-                .execute()
-            
-            session_ids = [session["id"] for session in lecturer_sessions.data]
-            if session_ids:
-                query = query.in_("session_id", session_ids)
-            else:
-                return []
+            query = query.eq("attendance_sessions.lecturer_id", current_user.id)
         
         # Apply filters
         if session_id:
             query = query.eq("session_id", session_id)
         if student_id and current_user.user_type in ["lecturer", "admin"]:
             query = query.eq("student_id", student_id)
+        if course_id:
+            query = query.eq("attendance_sessions.course_id", course_id)
+        if date_from:
+            query = query.gte("created_at", date_from.isoformat())
+        if date_to:
+            query = query.lt("created_at", (date_to + timedelta(days=1)).isoformat())
+        
+        # Continue after the last row of the previous page on (created_at, id)
+        if cursor:
+            last_created_at, last_id = decode_created_at_cursor(cursor)
+            query = query.or_(
+                f'created_at.lt."{last_created_at.isoformat()}",'
+                f'and(created_at.eq."{last_created_at.isoformat()}",id.lt.{last_id})'
+            )
         
-        query = query.order("created_at", desc=True)
+        query = query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1)
         result = query.execute()
         
-        return [AttendanceRecordResponse(**record) for record in result.data]
+        rows = result.data
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+        
+        items = []
+        for record in rows:
+            record.pop("attendance_sessions", None)
+            items.append(AttendanceRecordResponse(**record))
+        
+        return AttendanceRecordPage(items=items, next_cursor=next_cursor)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -17,27 +17,24 @@ async def get_courses(
     supabase = get_supabase_client()
     
     try:
-        query = supabase.table("courses").select("*")
-        
         # Filter courses based on user type
-        if current_user.user_type == "lecturer":
-            query = query.eq("lecturer_id", current_user.id)
-        elif current_user.user_type == "student":
-            # Get enrolled courses for students
-            enrollments = supabase.table("course_enrollments")\
-                .select("course_id")\
-                .eq("student_id", current_user.id)\
-                .eq("status", "active")\
-                .execute()
-            
-            course_ids = [enrollment["course_id"] for enrollment in enrollments.data]
-            if course_ids:
-                query = query.in_("id", course_ids)
-            else:
-                return []
+        if current_user.user_type == "student":
+            # Join the student's active enrollments in the same request
+            query = supabase.table("courses")\
+                .select("*, course_enrollments!inner(course_id)")\
+                .eq("course_enrollments.student_id", current_user.id)\
+                .eq("course_enrollments.status", "active")
+        else:
+            query = supabase.table("courses").select("*")
+            if current_user.user_type == "lecturer":
+                query = query.eq("lecturer_id", current_user.id)
         
         result = query.execute()
-        return result.data
+        
+        courses = result.data
+        for course in courses:
+            course.pop("course_enrollments", None)
+        return courses
         
     except Exception as e:
         raise HTTPException(
@@ -5,14 +5,28 @@ Dashboard router for dashboard statistics and data
 from fastapi import APIRouter, HTTPException, status, Depends
 from database.connection import get_supabase_client
 from middleware.auth_middleware import get_current_user, UserResponse
+from app.core.cache import TTLCache
+from app.core.config import settings
 
 router = APIRouter()
 
+# Stats per (role, user), shared by all admins; counts may lag writes by the TTL
+_stats_cache = TTLCache(settings.DASHBOARD_CACHE_SIZE, settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+def count_rows(query) -> int:
+    """Exact row count of a filtered query; only the count crosses the wire, not the rows"""
+    return query.limit(1).execute().count or 0
+
 @router.get("/stats")
 async def get_dashboard_stats(
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Get dashboard statistics based on user role"""
+    cache_key = ("admin",) if current_user.user_type == "admin" else (current_user.user_type, current_user.id)
+    stats = _stats_cache.get(cache_key)
+    if stats is not None:
+        return stats
+    
     supabase = get_supabase_client()
     
     try:
@@ -20,42 +34,46 @@ async def get_dashboard_stats(
         
         if current_user.user_type == "admin":
             # Admin dashboard stats
-            users_count = supabase.table("users").select("*", count="exact").execute()
-            students_count = supabase.table("users").select("*", count="exact").eq("user_type", "student").execute()
-            lecturers_count = supabase.table("users").select("*", count="exact").eq("user_type", "lecturer").execute()
-            courses_count = supabase.table("courses").select("*", count="exact").execute()
-            active_sessions = supabase.table("attendance_sessions").select("*", count="exact").eq("status", "active").execute()
-            
             stats = {
-                "total_users": users_count.count or 0,
-                "total_students": students_count.count or 0,
-                "total_lecturers": lecturers_count.count or 0,
-                "total_courses": courses_count.count or 0,
-                "active_sessions": active_sessions.count or 0
+                "total_users": count_rows(supabase.table("users").select("id", count="exact")),
+                "total_students": count_rows(
+                    supabase.table("users").select("id", count="exact").eq("user_type", "student")
+                ),
+                "total_lecturers": count_rows(
+                    supabase.table("users").select("id", count="exact").eq("user_type", "lecturer")
+                ),
+                "total_courses": count_rows(supabase.table("courses").select("id", count="exact")),
+                "active_sessions": count_rows(
+                    supabase.table("attendance_sessions").select("id", count="exact").eq("status", "active")
+                )
             }
-            
+        
         elif current_user.user_type == "lecturer":
             # Lecturer dashboard stats
-            courses = supabase.table("courses").select("*", count="exact").eq("lecturer_id", current_user.id).execute()
-            sessions = supabase.table("attendance_sessions").select("*", count="exact").eq("lecturer_id", current_user.id).execute()
-            
             stats = {
-                "total_courses": courses.count or 0,
-                "total_sessions": sessions.count or 0
+                "total_courses": count_rows(
+                    supabase.table("courses").select("id", count="exact").eq("lecturer_id", current_user.id)
+                ),
+                "total_sessions": count_rows(
+                    supabase.table("attendance_sessions").select("id", count="exact").eq("lecturer_id", current_user.id)
+                )
             }
-            
+        
         elif current_user.user_type == "student":
             # Student dashboard stats
-            enrollments = supabase.table("course_enrollments").select("*", count="exact").eq("student_id", current_user.id).eq("status", "active").execute()
-            attendance_records = supabase.table("attendance_records").select("*", count="exact").eq("student_id", current_user.id).execute()
-            
             stats = {
-                "enrolled_courses": enrollments.count or 0,
-                "attendance_records": attendance_records.count or 0
+                "enrolled_courses": count_rows(
+                    supabase.table("course_enrollments").select("id", count="exact")
+                    .eq("student_id", current_user.id).eq("status", "active")
+                ),
+                "attendance_records": count_rows(
+                    supabase.table("attendance_records").select("id", count="exact").eq("student_id", current_user.id)
+                )
             }
         
+        _stats_cache.set(cache_key, stats)
         return stats
-        
+    
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
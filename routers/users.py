@@ -3,29 +3,99 @@ Users router for user management operations
 """
 
 from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+import json
 from database.connection import get_supabase_client
+from models.schemas import UserType, UserListItem, UserPage
 from middleware.auth_middleware import get_current_user, require_admin, UserResponse
+from app.core.config import settings
+from app.core.pagination import encode_cursor, decode_created_at_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter()
 
-@router.get("/", response_model=List[dict])
+# Only the columns of the slim listing schema are selected
+USER_LIST_COLUMNS = ", ".join(UserListItem.model_fields)
+
+def fetch_users_page(
+    supabase,
+    role: Optional[UserType],
+    user_status: Optional[str],
+    department: Optional[str],
+    cursor: Optional[str],
+    limit: int
+):
+    """One page of users in (created_at, id) order; returns (rows, next_cursor)"""
+    query = supabase.table("users").select(USER_LIST_COLUMNS)
+    
+    if role:
+        query = query.eq("user_type", role.value)
+    if user_status:
+        query = query.eq("is_active", user_status == "active")
+    if department:
+        query = query.eq("department", department)
+    
+    # Continue after the last row of the previous page
+    if cursor:
+        last_created_at, last_id = decode_created_at_cursor(cursor)
+        query = query.or_(
+            f'created_at.gt."{last_created_at.isoformat()}",'
+            f'and(created_at.eq."{last_created_at.isoformat()}",id.gt.{last_id})'
+        )
+    
+    result = query.order("created_at").order("id").limit(limit + 1).execute()
+    
+    rows = result.data
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return rows, next_cursor
+
+def stream_users(role: Optional[UserType], user_status: Optional[str], department: Optional[str]):
+    """Every matching user as JSON lines, holding one page in memory at a time.
+
+    A plain generator: the blocking client calls run in Starlette's threadpool.
+    """
+    supabase = get_supabase_client()
+    cursor = None
+    while True:
+        rows, cursor = fetch_users_page(
+            supabase, role, user_status, department, cursor, settings.EXPORT_CHUNK_ROWS
+        )
+        yield "".join(json.dumps(row) + "\n" for row in rows)
+        if cursor is None:
+            return
+
+@router.get("/", response_model=UserPage)
 async def get_users(
-    user_type: Optional[str] = Query(None),
+    role: Optional[UserType] = Query(None),
+    user_status: Optional[str] = Query(None, alias="status", pattern="^(active|inactive)$"),
+    department: Optional[str] = Query(None),
+    user_type: Optional[UserType] = Query(None, deprecated=True),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    export_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
     current_user: UserResponse = Depends(require_admin)
 ):
-    """Get all users (Admin only)"""
+    """List users one keyset page at a time, or the whole directory as NDJSON (Admin only)"""
+    role = role or user_type
+    
+    if export_format == "ndjson":
+        return StreamingResponse(
+            stream_users(role, user_status, department),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="users.ndjson"'}
+        )
+    
     supabase = get_supabase_client()
     
     try:
-        query = supabase.table("users").select("*")
-        
-        if user_type:
-            query = query.eq("user_type", user_type)
-        
-        result = query.execute()
-        return result.data
+        rows, next_cursor = fetch_users_page(supabase, role, user_status, department, cursor, limit)
+        return UserPage(items=[UserListItem(**row) for row in rows], next_cursor=next_cursor)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,